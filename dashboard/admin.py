@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Building, Unit, Tenant, Lease, Payment, MaintenanceRequest, Document, Expense, Notification, Company, ContractTemplate, Invoice, InvoiceItem
+from .models import Building, Unit, Tenant, Lease, Payment, MaintenanceRequest, Document, Expense, Notification, Company, ContractTemplate, Invoice, InvoiceItem, AccountingPeriod, IncomeSnapshot, ExpenseSnapshot
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
@@ -73,7 +73,36 @@ class InvoiceItemInline(admin.TabularInline):
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ('invoice_number', 'tenant', 'lease', 'issue_date', 'due_date', 'total_amount', 'status')
+    list_display = ('invoice_number', 'tenant', 'lease', 'issue_date', 'due_date', 'total', 'status')
     list_filter = ('status', 'issue_date', 'due_date')
+    readonly_fields = ('total',)
     search_fields = ('invoice_number', 'tenant__name', 'lease__contract_number')
-    inlines = [InvoiceItemInline]
\ No newline at end of file
+    inlines = [InvoiceItemInline]
+
+# الفترات المحاسبية المقفلة: اللقطات للعرض فقط، وإعادة الفتح بحذف الفترة
+class IncomeSnapshotInline(admin.TabularInline):
+    model = IncomeSnapshot
+    extra = 0
+    can_delete = False
+    readonly_fields = ('building', 'building_name', 'payment_method', 'total', 'count')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+class ExpenseSnapshotInline(admin.TabularInline):
+    model = ExpenseSnapshot
+    extra = 0
+    can_delete = False
+    readonly_fields = ('building', 'building_name', 'category', 'total', 'count')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(AccountingPeriod)
+class AccountingPeriodAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'income_total', 'expense_total', 'closed_at', 'closed_by')
+    readonly_fields = ('year', 'month', 'income_total', 'expense_total', 'closed_at', 'closed_by')
+    inlines = [IncomeSnapshotInline, ExpenseSnapshotInline]
+
+    def has_add_permission(self, request):
+        return False
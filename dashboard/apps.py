@@ -7,4 +7,6 @@ class DashboardConfig(AppConfig):
     verbose_name = _('لوحة التحكم')
 
     def ready(self):
+        import dashboard.checks
         import dashboard.signals
+        import dashboard.jobs
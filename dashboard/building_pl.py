@@ -0,0 +1,129 @@
+"""
+Per-building profit and loss.
+
+Payments reach a building through lease -> unit -> building while expenses
+point at it directly; ProfitLossService already reads both in one grouped
+query each (or from the snapshots of closed months), keyed by building, so
+this module only folds those rows into one line per building: income,
+expenses per category, net and margin.
+
+Periods that ended before the current month are cached. Their key carries a
+version, kept in a NumberSequence row so every worker process sees the same
+number, that signals.py and the payment import bump once a payment or expense
+dated in such a period is committed, so back-dated edits are picked up on the
+next read.
+"""
+import calendar
+import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import Building, Expense, NumberSequence
+from .profit_loss import ProfitLossService
+
+
+class BuildingProfitLoss:
+    """Income, expenses by category, net and margin per building for a period"""
+
+    KEY_PREFIX = 'building_pl'
+    VERSION_SEQUENCE = 'building_pl_version'
+
+    @classmethod
+    def timeout(cls):
+        return getattr(settings, 'BUILDING_PL_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+
+    @staticmethod
+    def period(year, month=None):
+        """First and last day of a month, or of the whole year when month is None"""
+        if month:
+            start = datetime.date(year, month, 1)
+            return start, start.replace(day=calendar.monthrange(year, month)[1])
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+
+    @staticmethod
+    def is_past(end, today=None):
+        """True once the month after the period's last day has started"""
+        today = today or timezone.now().date()
+        return end < today.replace(day=1)
+
+    @classmethod
+    def version(cls):
+        return NumberSequence.objects.filter(name=cls.VERSION_SEQUENCE).values_list('next_value', flat=True).first() or 0
+
+    @classmethod
+    def invalidate(cls, *dates):
+        """Drop cached past periods if any of `dates` falls inside one.
+
+        The version moves once the surrounding transaction commits, so no
+        reader can cache a rebuild of the uncommitted rows under the new key.
+        """
+        if any(day and cls.is_past(day) for day in dates):
+            transaction.on_commit(lambda: NumberSequence.reserve(cls.VERSION_SEQUENCE))
+
+    @classmethod
+    def get(cls, start, end):
+        if not cls.is_past(end):
+            return cls.build(start, end)
+        version = cls.version()
+        key = f"{cls.KEY_PREFIX}:{version}:{start.isoformat()}:{end.isoformat()}"
+        report = cache.get(key)
+        if report is None:
+            report = cls.build(start, end)
+            cache.set(key, report, cls.timeout())
+        return report
+
+    @classmethod
+    def build(cls, start, end):
+        categories = list(Expense.EXPENSE_CATEGORY_CHOICES)
+        buildings = {}
+        for building_id, name in Building.objects.order_by('name').values_list('id', 'name'):
+            buildings[building_id] = {
+                'building_id': building_id, 'building_name': name, 'income': Decimal('0'),
+                'categories': {key: Decimal('0') for key, label in categories},
+            }
+        income_rows, expense_rows = ProfitLossService.period_rows(start, end)
+        for row in income_rows:
+            cls._building(buildings, row, categories)['income'] += row['total']
+        for row in expense_rows:
+            cls._building(buildings, row, categories)['categories'][row['category']] += row['total']
+
+        rows = list(buildings.values())
+        for row in rows:
+            cls._finish(row, categories)
+        totals = {'building_name': '', 'income': sum((row['income'] for row in rows), Decimal('0')),
+                  'categories': {key: sum((row['categories'][key] for row in rows), Decimal('0')) for key, label in categories}}
+        cls._finish(totals, categories)
+        return {
+            'start': start, 'end': end, 'rows': rows, 'totals': totals,
+            'category_labels': [label for key, label in categories],
+        }
+
+    @staticmethod
+    def _building(buildings, row, categories):
+        # Snapshots outlive deleted buildings; keep their figures under the frozen name
+        key = row['building_id'] or row['building_name']
+        if key not in buildings:
+            buildings[key] = {
+                'building_id': row['building_id'], 'building_name': row['building_name'], 'income': Decimal('0'),
+                'categories': {category: Decimal('0') for category, label in categories},
+            }
+        return buildings[key]
+
+    @staticmethod
+    def _finish(row, categories):
+        row['expense_list'] = [row['categories'][key] for key, label in categories]
+        row['expenses'] = sum(row['expense_list'], Decimal('0'))
+        row['net'] = row['income'] - row['expenses']
+        row['margin'] = round(row['net'] / row['income'] * 100, 1) if row['income'] else None
+
+    @classmethod
+    def chart(cls, report):
+        """Chart.js friendly income, expenses and net per building"""
+        return {
+            'labels': [row['building_name'] for row in report['rows']],
+            'income': [float(row['income']) for row in report['rows']],
+            'expenses': [float(row['expenses']) for row in report['rows']],
+            'net': [float(row['net']) for row in report['rows']],
+        }
@@ -0,0 +1,140 @@
+"""
+Twelve-month cash-flow forecast for the dashboard.
+
+Inflows per month come from three sources:
+- rent of active and expiring leases, up to each lease's last billed month,
+  less whatever has already been paid or covered by a cheque for that month;
+- pending post-dated cheques, in the month of their check_date (cheques
+  already past their date are expected in the first month);
+- renewals of leases ending inside the window, at the same rent, weighted by
+  CASHFLOW_RENEWAL_PROBABILITY.
+
+Recurring expenses are projected at the trailing twelve-month monthly
+average of the categories in CASHFLOW_RECURRING_EXPENSE_CATEGORIES.
+Month buckets are NumPy month indexes, so each source is one query and a
+few array operations. The forecast is cached per day.
+"""
+from decimal import Decimal
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from .models import Lease, Payment, Expense
+from .rent_roll import RentRoll
+
+
+class CashFlowForecast:
+    """Projected inflows, recurring expenses and net cash per month"""
+
+    MONTHS = 12
+    KEY_PREFIX = 'cashflow_forecast'
+
+    @classmethod
+    def renewal_probability(cls):
+        return float(getattr(settings, 'CASHFLOW_RENEWAL_PROBABILITY', 0.7))
+
+    @classmethod
+    def recurring_categories(cls):
+        return getattr(settings, 'CASHFLOW_RECURRING_EXPENSE_CATEGORIES', ['utilities', 'salaries', 'admin', 'maintenance'])
+
+    @classmethod
+    def get(cls, today=None):
+        """The forecast starting this month, built at most once per day"""
+        today = today or timezone.now().date()
+        key = f"{cls.KEY_PREFIX}:{today.isoformat()}:{cls.renewal_probability()}"
+        forecast = cache.get(key)
+        if forecast is None:
+            forecast = cls.build(today)
+            cache.set(key, forecast, 60 * 60 * 24)
+        return forecast
+
+    @classmethod
+    def build(cls, today, months=None, renewal_probability=None):
+        months = months or cls.MONTHS
+        probability = cls.renewal_probability() if renewal_probability is None else renewal_probability
+        first = RentRoll.month_index(today)
+        window = np.arange(first, first + months)
+        last = first + months - 1
+        window_start = today.replace(day=1)
+        window_end = window_start + relativedelta(months=months, days=-1)
+
+        leases = Lease.objects.filter(status__in=['active', 'expiring_soon'])
+        lease_rows = list(leases.order_by('id').values_list('id', 'monthly_rent', 'start_date', 'end_date'))
+        count = len(lease_rows)
+        rent = np.array([RentRoll.to_cents(row[1]) for row in lease_rows], dtype=np.int64)
+        start = np.array([RentRoll.month_index(row[2]) for row in lease_rows], dtype=np.int64)
+        end = np.array([RentRoll.last_billed_index(row[2], row[3]) for row in lease_rows], dtype=np.int64)
+
+        # Rent still to be received: billed months in the window minus what is already paid for them
+        billed = (window[None, :] >= start[:, None]) & (window[None, :] <= end[:, None])
+        expected = billed * rent[:, None]
+        covered = np.zeros((count, months), dtype=np.int64)
+        if count:
+            position = {row[0]: i for i, row in enumerate(lease_rows)}
+            paid = list(Payment.objects.filter(lease__in=leases.values('id'), payment_for_year__gte=first // 12,
+                                               payment_for_year__lte=last // 12)
+                        .exclude(check_status='returned')
+                        .values_list('lease_id', 'payment_for_year', 'payment_for_month')
+                        .annotate(total=Sum('amount')).order_by())
+            if paid:
+                lease_idx = np.array([position[row[0]] for row in paid], dtype=np.int64)
+                month_idx = np.array([row[1] * 12 + row[2] - 1 for row in paid], dtype=np.int64) - first
+                amounts = np.array([RentRoll.to_cents(row[3]) for row in paid], dtype=np.int64)
+                inside = (month_idx >= 0) & (month_idx < months)
+                np.add.at(covered, (lease_idx[inside], month_idx[inside]), amounts[inside])
+        rent_inflow = np.maximum(expected - covered, 0).sum(axis=0)
+
+        # Renewals: months after a lease's last billed month, weighted by the probability
+        renewed = (window[None, :] > end[:, None]) & (end[:, None] < last)
+        renewal_inflow = (renewed * rent[:, None]).sum(axis=0) * probability
+
+        # Pending post-dated cheques by the month of their date
+        cheques = list(Payment.objects.filter(payment_method='check', check_status='pending', check_date__lte=window_end)
+                       .values_list('check_date').annotate(total=Sum('amount')).order_by())
+        cheque_inflow = np.zeros(months, dtype=np.int64)
+        if cheques:
+            month_idx = np.maximum(np.array([RentRoll.month_index(row[0]) for row in cheques], dtype=np.int64) - first, 0)
+            cheque_inflow = np.bincount(month_idx, weights=[RentRoll.to_cents(row[1]) for row in cheques], minlength=months)
+
+        # Recurring expenses: trailing twelve-month average, the same every month
+        spent = Expense.objects.filter(category__in=cls.recurring_categories(),
+                                       expense_date__gte=window_start - relativedelta(months=12), expense_date__lt=window_start) \
+            .aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        expenses = np.full(months, RentRoll.to_cents(spent) / 12)
+
+        inflow = rent_inflow + cheque_inflow + renewal_inflow
+        net = inflow - expenses
+        cumulative = np.cumsum(net)
+        rows = []
+        for i, index in enumerate(window):
+            rows.append({
+                'year': int(index // 12), 'month': int(index % 12 + 1),
+                'rent': RentRoll.to_decimal(round(rent_inflow[i])),
+                'cheques': RentRoll.to_decimal(round(cheque_inflow[i])),
+                'renewals': RentRoll.to_decimal(round(renewal_inflow[i])),
+                'expenses': RentRoll.to_decimal(round(expenses[i])),
+                'net': RentRoll.to_decimal(round(net[i])),
+                'cumulative': RentRoll.to_decimal(round(cumulative[i])),
+            })
+        return {
+            'generated_on': today,
+            'renewal_probability': probability,
+            'months': rows,
+            'total_inflow': RentRoll.to_decimal(round(inflow.sum())),
+            'total_expenses': RentRoll.to_decimal(round(expenses.sum())),
+            'total_net': RentRoll.to_decimal(round(net.sum())),
+        }
+
+    @classmethod
+    def chart(cls, forecast):
+        """Chart.js friendly series of the forecast"""
+        return {
+            'labels': [f"{row['month']}/{row['year']}" for row in forecast['months']],
+            'rent': [float(row['rent']) for row in forecast['months']],
+            'cheques': [float(row['cheques']) for row in forecast['months']],
+            'renewals': [float(row['renewals']) for row in forecast['months']],
+            'expenses': [float(row['expenses']) for row in forecast['months']],
+            'net': [float(row['net']) for row in forecast['months']],
+        }
@@ -0,0 +1,67 @@
+"""
+Incremental "changes since" feed for BI and accounting sync jobs.
+
+Tenant, Lease, Payment, Expense, Invoice and MaintenanceRequest rows carry a
+change_seq from one global sequence (ChangeTrackedModel) and deleting one
+leaves a Tombstone numbered from the same sequence. A client keeps the cursor
+of its last page and asks for everything above it; each page holds the
+`limit` lowest numbers across all models, rows as plain value lists under a
+per-model column header plus per-model lists of deleted ids.
+"""
+from .models import (
+    CHANGE_SEQUENCE, NumberSequence, Tombstone, Tenant, Lease, Payment, Expense, Invoice, MaintenanceRequest,
+)
+
+
+class ChangeFeed:
+    MODELS = {
+        'tenant': Tenant, 'lease': Lease, 'payment': Payment, 'expense': Expense,
+        'invoice': Invoice, 'maintenancerequest': MaintenanceRequest,
+    }
+    PAGE_SIZE = 500
+    MAX_PAGE_SIZE = 5000
+
+    @staticmethod
+    def columns(model):
+        return [field.attname for field in model._meta.concrete_fields]
+
+    @classmethod
+    def record_deletion(cls, instance):
+        """Runs inside the delete's transaction, so the tombstone commits together with the delete"""
+        Tombstone.objects.create(
+            model=instance._meta.model_name, object_id=instance.pk,
+            change_seq=NumberSequence.reserve(CHANGE_SEQUENCE)[0],
+        )
+
+    @classmethod
+    def page(cls, since=0, limit=PAGE_SIZE, models=None):
+        names = list(models or cls.MODELS)
+        limit = max(1, min(limit, cls.MAX_PAGE_SIZE))
+        # Each source contributes at most limit + 1 entries; the page keeps the lowest numbers overall
+        entries = []
+        columns = {}
+        for name in names:
+            model = cls.MODELS[name]
+            columns[name] = cls.columns(model)
+            seq_index = columns[name].index('change_seq')
+            rows = model.objects.filter(change_seq__gt=since).order_by('change_seq').values_list(*columns[name])[:limit + 1]
+            entries.extend((row[seq_index], name, list(row)) for row in rows)
+        tombstones = Tombstone.objects.filter(change_seq__gt=since, model__in=names).order_by('change_seq') \
+            .values_list('change_seq', 'model', 'object_id')[:limit + 1]
+        entries.extend((seq, name, None, object_id) for seq, name, object_id in tombstones)
+        entries.sort(key=lambda entry: entry[0])
+
+        changes, deleted = {}, {}
+        for entry in entries[:limit]:
+            name = entry[1]
+            if entry[2] is None:
+                deleted.setdefault(name, []).append(entry[3])
+            else:
+                changes.setdefault(name, {'columns': columns[name], 'rows': []})['rows'].append(entry[2])
+        return {
+            'since': since,
+            'cursor': entries[:limit][-1][0] if entries else since,
+            'has_more': len(entries) > limit,
+            'changes': changes,
+            'deleted': deleted,
+        }
@@ -0,0 +1,23 @@
+"""
+JSON endpoint for incremental sync (see change_feed.py)
+"""
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from .change_feed import ChangeFeed
+
+
+@never_cache
+@login_required
+@user_passes_test(lambda user: user.is_staff)
+def change_feed(request):
+    """?since=<cursor>&limit=<n>&models=payment,expense -> next page of changes and deletions"""
+    since = request.GET.get('since', '0')
+    limit = request.GET.get('limit', str(ChangeFeed.PAGE_SIZE))
+    models = [name for name in request.GET.get('models', '').split(',') if name]
+    if not since.isdigit() or not limit.isdigit():
+        return JsonResponse({'error': 'since and limit must be non-negative integers'}, status=400)
+    unknown = [name for name in models if name not in ChangeFeed.MODELS]
+    if unknown:
+        return JsonResponse({'error': f"unknown models: {', '.join(unknown)}", 'models': list(ChangeFeed.MODELS)}, status=400)
+    return JsonResponse(ChangeFeed.page(int(since), int(limit), models))
@@ -0,0 +1,38 @@
+"""
+System checks for deployment settings the dashboard relies on
+"""
+import os
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Portal snapshots and report caches are invalidated from other processes (scheduler, other workers)"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint="Set CACHE_URL to a Redis or Memcached server (or db://<table>) so that writes from the "
+                 "scheduler and other workers invalidate cached portal pages and reports.",
+            id='dashboard.W001',
+        )]
+    return []
+
+
+@register()
+def check_live_events_backend(app_configs, **kwargs):
+    """The memory backend only reaches streams opened in the publishing process"""
+    workers = os.environ.get('WEB_CONCURRENCY', '1')
+    if getattr(settings, 'LIVE_EVENTS_BACKEND', 'database') == 'memory' and workers.isdigit() and int(workers) > 1:
+        return [Warning(
+            f"LIVE_EVENTS_BACKEND is 'memory' but WEB_CONCURRENCY runs {workers} web workers.",
+            hint="Use the 'database' backend so that every worker's streams see every event.",
+            id='dashboard.W002',
+        )]
+    return []
@@ -0,0 +1,117 @@
+"""
+Post-dated cheque maturity: deposit batches and the maturity calendar.
+
+Every query here filters on (check_status, check_date), which is covered by
+the check_status_date_idx index on Payment, and aggregates in the database so
+tens of thousands of pending cheques come back as a handful of grouped rows.
+Pending cheques recorded without a date never fall due, so both pages list
+them separately for staff to complete instead of dropping them.
+"""
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from .models import Payment
+
+
+class ChequeService:
+    """Queries behind the cheque management, deposit batch and calendar pages"""
+
+    CALENDAR_DAYS = 90
+
+    @classmethod
+    def cheques(cls):
+        return Payment.objects.filter(payment_method='check')
+
+    @classmethod
+    def status_counts(cls):
+        """Counts per cheque status plus the overall total, from one grouped query"""
+        counts = {status: 0 for status, label in Payment.CHECK_STATUS_CHOICES}
+        total = 0
+        for row in cls.cheques().order_by().values('check_status').annotate(count=Count('id')):
+            total += row['count']
+            if row['check_status'] in counts:
+                counts[row['check_status']] = row['count']
+        # Every cheque, including ones saved without a status
+        counts['total'] = total
+        return counts
+
+    @classmethod
+    def due_for_deposit(cls, on_date=None, bank_name=None):
+        """Pending cheques whose date has arrived, ordered for a deposit slip"""
+        on_date = on_date or timezone.now().date()
+        cheques = cls.cheques().filter(check_status='pending', check_date__lte=on_date) \
+            .select_related('lease__tenant', 'lease__unit') \
+            .order_by('bank_name', 'check_date', 'id')
+        return cheques.filter(bank_name=bank_name) if bank_name else cheques
+
+    @classmethod
+    def undated(cls):
+        """Pending cheques without a check date"""
+        return cls.cheques().filter(check_status='pending', check_date__isnull=True) \
+            .select_related('lease__tenant', 'lease__unit') \
+            .order_by('bank_name', 'payment_date', 'id')
+
+    @classmethod
+    def deposit_batch(cls, on_date=None, bank_name=None):
+        """
+        Group the cheques due on `on_date` by bank.
+
+        Returns a list of {'bank_name', 'cheques', 'count', 'total'} dicts;
+        the per-bank totals come from the same rows that are listed.
+        """
+        banks = OrderedDict()
+        for cheque in cls.due_for_deposit(on_date, bank_name):
+            bank = banks.setdefault(cheque.bank_name or '', {'bank_name': cheque.bank_name or _('غير محدد'), 'cheques': [], 'count': 0, 'total': Decimal('0')})
+            bank['cheques'].append(cheque)
+            bank['count'] += 1
+            bank['total'] += cheque.amount
+        return list(banks.values())
+
+    @classmethod
+    def maturity_calendar(cls, start_date=None, days=None):
+        """
+        Expected clearing amounts per day for the next `days` days.
+
+        One query grouped by (check_date, bank_name) returns every pending
+        cheque in the window; days without cheques are filled with zeros.
+        Cheques already past their date are reported separately as overdue
+        and cheques without a date as undated.
+        """
+        start_date = start_date or timezone.now().date()
+        days = days or cls.CALENDAR_DAYS
+        end_date = start_date + datetime.timedelta(days=days - 1)
+        calendar = OrderedDict(
+            (start_date + datetime.timedelta(days=offset), {'date': start_date + datetime.timedelta(days=offset), 'count': 0, 'total': Decimal('0'), 'banks': []})
+            for offset in range(days)
+        )
+        rows = cls.cheques().filter(Q(check_date__lte=end_date) | Q(check_date__isnull=True), check_status='pending') \
+            .order_by().values('check_date', 'bank_name').annotate(count=Count('id'), total=Sum('amount'))
+        overdue = {'count': 0, 'total': Decimal('0')}
+        undated = {'count': 0, 'total': Decimal('0')}
+        for row in rows:
+            if row['check_date'] is None:
+                undated['count'] += row['count']
+                undated['total'] += row['total']
+                continue
+            if row['check_date'] < start_date:
+                overdue['count'] += row['count']
+                overdue['total'] += row['total']
+                continue
+            day = calendar[row['check_date']]
+            day['count'] += row['count']
+            day['total'] += row['total']
+            day['banks'].append({'bank_name': row['bank_name'] or _('غير محدد'), 'count': row['count'], 'total': row['total']})
+        day_list = list(calendar.values())
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'days': day_list,
+            'weeks': [day_list[i:i + 7] for i in range(0, len(day_list), 7)],
+            'overdue': overdue,
+            'undated': undated,
+            'total': sum((day['total'] for day in day_list), Decimal('0')),
+            'count': sum(day['count'] for day in day_list),
+        }
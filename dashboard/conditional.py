@@ -0,0 +1,102 @@
+"""
+Conditional GET (ETag / Last-Modified) for detail pages, PDFs and exports.
+
+A view names the querysets its output is built from. Their watermark is one
+aggregate per queryset, COUNT(*) and MAX(updated_at). The ETag hashes those
+watermarks together with the URL, the user's session and today's date, so a
+matching If-None-Match gets a 304 before anything is rendered. The count picks
+up deletions and rows moving out of the set, which leave no newer updated_at
+behind. Because of that, Last-Modified (the newest updated_at) is only a hint
+for clients that never send If-None-Match.
+"""
+import hashlib
+from functools import wraps
+from django.contrib import messages
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+
+class ConditionalGet:
+    """Validators for a set of querysets and the 304-or-render decision"""
+
+    @staticmethod
+    def tables(*models):
+        return [model.objects.all() for model in models]
+
+    @staticmethod
+    def watermark(querysets):
+        """[(label, count, newest timestamp)] for querysets or (queryset, timestamp_field) pairs"""
+        marks = []
+        for queryset in querysets:
+            queryset, field = queryset if isinstance(queryset, tuple) else (queryset, 'updated_at')
+            row = queryset.order_by().aggregate(count=Count('pk'), latest=Max(field))
+            marks.append((queryset.model._meta.label, row['count'], row['latest']))
+        return marks
+
+    @classmethod
+    def validators(cls, request, querysets, extra=()):
+        marks = cls.watermark(querysets)
+        user = getattr(request, 'user', None)
+        session = getattr(request, 'session', None)
+        key = repr((
+            request.get_full_path(), get_language(), timezone.localdate().isoformat(),
+            user.pk if user else None, session.session_key if session is not None else None,
+            [(label, count, latest.isoformat() if latest else None) for label, count, latest in marks], tuple(extra),
+        ))
+        etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+        latest = max((latest for label, count, latest in marks if latest), default=None)
+        return etag, latest
+
+    @classmethod
+    def respond(cls, request, querysets, render, extra=()):
+        """304 when the client's copy is current, otherwise render() with validators attached"""
+        # A page carrying flash messages must be rendered even if the data is unchanged
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return render()
+        etag, latest = cls.validators(request, querysets, extra)
+        last_modified = int(latest.timestamp()) if latest else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # Keep private copies but revalidate them on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def conditional_get(querysets):
+    """Decorator for function views; querysets(request, *args, **kwargs) names what the output is built from"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return ConditionalGet.respond(request, querysets(request, *args, **kwargs),
+                                          lambda: view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Class-based views built from whole tables list their models in
+    watermark_models; views built from a filtered set of rows override
+    get_watermark_querysets() instead.
+    """
+    watermark_models = []
+
+    def get_watermark_querysets(self):
+        if not self.watermark_models:
+            raise ImproperlyConfigured(f"{type(self).__name__} needs watermark_models or get_watermark_querysets()")
+        return ConditionalGet.tables(*self.watermark_models)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Listed after the access mixins, so this only runs for permitted users
+        return ConditionalGet.respond(request, self.get_watermark_querysets(),
+                                      lambda: super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs))
@@ -0,0 +1,23 @@
+"""
+Server-sent events endpoint for live dashboard updates (served under ASGI)
+"""
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from .live_events import LiveEventBroker
+
+
+async def dashboard_events(request):
+    user = await request.auser()
+    if not user.is_authenticated or not user.is_staff:
+        return HttpResponseForbidden()
+    if isinstance(request, WSGIRequest):
+        # A sync worker would hold a thread per open stream forever. 204 tells
+        # EventSource clients to stop reconnecting; the page still works without live updates.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        LiveEventBroker.stream(request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,4 @@
+from copy import copy
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
@@ -28,6 +29,8 @@ class ExcelExporter:
         self.ws = self.wb.active
         self.title = title
         self.current_row = 1
+        # نمط الخلية المحسوب لكل (style, number_format) يُنسخ بدل إعادة بنائه لكل خلية
+        self._row_styles = {}
         
     def create_header(self, headers):
         """إنشاء صف العناوين بتنسيق جميل"""
@@ -73,6 +76,11 @@ class ExcelExporter:
             else:
                 cell.value = value
             
+            cached_style = self._row_styles.get((style, num_format))
+            if cached_style is not None:
+                cell._style = copy(cached_style)
+                continue
+
             # تطبيق التنسيق الرقمي
             if num_format == 'currency':
                 cell.number_format = '#,##0.00 "ر.ع"'
@@ -112,6 +120,7 @@ class ExcelExporter:
                 readingOrder=2
             )
             cell.border = self._create_border()
+            self._row_styles[(style, num_format)] = copy(cell._style)
         
         self.ws.row_dimensions[self.current_row].height = 22
         self.current_row += 1
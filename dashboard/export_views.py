@@ -1,9 +1,26 @@
+from functools import wraps
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import redirect
+from django.urls import reverse
 from django.utils.translation import gettext as _
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Q, OuterRef, Subquery
+from django.utils import timezone
 from decimal import Decimal
+import datetime
 from .models import Tenant, Lease, Payment, Expense, Building, Unit, MaintenanceRequest
 from .excel_utils import ExcelExporter
+from .csv_utils import CsvExporter
+from .cheque_service import ChequeService
+from .rent_roll import RentRoll
+from .aging import AgingReport
+from .building_pl import BuildingProfitLoss
+from .conditional import ConditionalGet, conditional_get
+from .search_service import SearchService
+from .views import (
+    TenantListView, LeaseListView, PaymentListView, ExpenseListView, BuildingListView,
+    UnitListView, MaintenanceRequestAdminListView, building_pl_period, pl_watermark, report_year,
+)
 
 
 def staff_required(user):
@@ -11,10 +28,55 @@ def staff_required(user):
     return user.is_staff
 
 
+def list_queryset(view_class, request):
+    """The list page's filtered queryset for the same query string, so an export holds exactly what the user sees"""
+    view = view_class()
+    view.setup(request)
+    return view.get_queryset()
+
+
+def complete_search_export(view_class, list_url_name):
+    """
+    Refuse exports whose search hit SEARCH_RESULT_LIMIT: the list page shows the
+    best matches with a warning, but a file silently missing rows would pass for
+    the complete result. The user is sent back to the list to narrow the search.
+    """
+    def decorator(export_view):
+        @wraps(export_view)
+        def wrapper(request, *args, **kwargs):
+            if request.GET.get('q'):
+                view = view_class()
+                view.setup(request)
+                view.get_queryset()
+                if view.search_truncated:
+                    messages.error(request, _("نتائج البحث تتجاوز %(limit)s سجل، الرجاء تضييق البحث قبل التصدير.") % {
+                        'limit': SearchService.result_limit()})
+                    params = request.GET.copy()
+                    params.pop('format', None)
+                    return redirect(f"{reverse(list_url_name)}?{params.urlencode()}")
+            return export_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 @login_required
 @user_passes_test(staff_required)
+@complete_search_export(TenantListView, 'tenant_list')
+@conditional_get(lambda request: [list_queryset(TenantListView, request)])
 def export_tenants_excel(request):
     """تصدير قائمة المستأجرين إلى Excel"""
+    if CsvExporter.requested(request):
+        types = CsvExporter.labels(Tenant.TENANT_TYPE_CHOICES)
+        rows = list_queryset(TenantListView, request).order_by('name').values_list(
+            'name', 'tenant_type', 'phone', 'email', 'authorized_signatory', 'rating',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_المستأجرين.csv",
+            ["الاسم", "النوع", "رقم الهاتف", "البريد الإلكتروني", "المفوض بالتوقيع", "التقييم"],
+            ((name, types.get(kind, kind), phone, email, signatory, rating)
+             for name, kind, phone, email, signatory, rating in rows),
+        )
+
     exporter = ExcelExporter("قائمة المستأجرين")
     
     # العناوين
@@ -27,7 +89,7 @@ def export_tenants_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    tenants = Tenant.objects.all().order_by('name')
+    tenants = list_queryset(TenantListView, request).order_by('name')
     total_count = tenants.count()
     
     for idx, tenant in enumerate(tenants, 1):
@@ -54,8 +116,22 @@ def export_tenants_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@complete_search_export(LeaseListView, 'lease_list')
+@conditional_get(lambda request: [list_queryset(LeaseListView, request), *ConditionalGet.tables(Tenant, Unit, Building)])
 def export_leases_excel(request):
     """تصدير قائمة العقود إلى Excel"""
+    if CsvExporter.requested(request):
+        statuses = CsvExporter.labels(Lease.STATUS_CHOICES)
+        rows = list_queryset(LeaseListView, request).order_by('-start_date').values_list(
+            'contract_number', 'tenant__name', 'unit__building__name', 'unit__unit_number',
+            'monthly_rent', 'start_date', 'end_date', 'status',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_العقود.csv",
+            ["رقم العقد", "المستأجر", "المبنى", "الوحدة", "الإيجار الشهري", "تاريخ البدء", "تاريخ الانتهاء", "الحالة"],
+            (row[:7] + (statuses.get(row[7], row[7]),) for row in rows),
+        )
+
     exporter = ExcelExporter("قائمة العقود")
     
     # العناوين
@@ -68,7 +144,7 @@ def export_leases_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    leases = Lease.objects.all().select_related('tenant', 'unit', 'unit__building').order_by('-start_date')
+    leases = list_queryset(LeaseListView, request).select_related('tenant', 'unit', 'unit__building').order_by('-start_date')
     total_leases = leases.count()
     total_monthly_rent = Decimal('0')
     active_leases = 0
@@ -121,8 +197,23 @@ def export_leases_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@conditional_get(lambda request: [list_queryset(PaymentListView, request), *ConditionalGet.tables(Lease, Tenant)])
 def export_payments_excel(request):
     """تصدير قائمة المدفوعات إلى Excel"""
+    if CsvExporter.requested(request):
+        methods = CsvExporter.labels(Payment.PAYMENT_METHOD_CHOICES)
+        cheque_statuses = CsvExporter.labels(Payment.CHECK_STATUS_CHOICES)
+        rows = list_queryset(PaymentListView, request).order_by('-payment_date', '-id').values_list(
+            'lease__contract_number', 'lease__tenant__name', 'amount', 'payment_date', 'payment_for_month',
+            'payment_for_year', 'payment_method', 'check_number', 'check_date', 'check_status',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_المدفوعات.csv",
+            ["رقم العقد", "المستأجر", "المبلغ", "تاريخ الدفع", "الشهر", "السنة", "طريقة الدفع", "رقم الشيك", "تاريخ الشيك", "حالة الشيك"],
+            (row[:6] + (methods.get(row[6], row[6]), row[7], row[8],
+                        cheque_statuses.get(row[9], row[9]) if row[6] == 'check' else None) for row in rows),
+        )
+
     exporter = ExcelExporter("قائمة المدفوعات")
     
     # العناوين
@@ -135,7 +226,7 @@ def export_payments_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    payments = Payment.objects.all().select_related('lease', 'lease__tenant').order_by('-payment_date')
+    payments = list_queryset(PaymentListView, request).select_related('lease', 'lease__tenant').order_by('-payment_date')
     total_payments = payments.count()
     total_amount = Decimal('0')
     cash_amount = Decimal('0')
@@ -195,8 +286,21 @@ def export_payments_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@conditional_get(lambda request: [list_queryset(ExpenseListView, request), *ConditionalGet.tables(Building)])
 def export_expenses_excel(request):
     """تصدير قائمة المصروفات إلى Excel"""
+    if CsvExporter.requested(request):
+        categories = CsvExporter.labels(Expense.EXPENSE_CATEGORY_CHOICES)
+        rows = list_queryset(ExpenseListView, request).order_by('-expense_date', '-id').values_list(
+            'building__name', 'category', 'description', 'amount', 'expense_date',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_المصروفات.csv",
+            ["المبنى", "الفئة", "الوصف", "المبلغ", "تاريخ المصروف"],
+            ((building, categories.get(category, category), description, amount, day)
+             for building, category, description, amount, day in rows),
+        )
+
     exporter = ExcelExporter("قائمة المصروفات")
     
     # العناوين
@@ -209,7 +313,7 @@ def export_expenses_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    expenses = Expense.objects.all().select_related('building').order_by('-expense_date')
+    expenses = list_queryset(ExpenseListView, request).select_related('building').order_by('-expense_date')
     total_expenses = expenses.count()
     total_amount = Decimal('0')
     category_totals = {}
@@ -263,8 +367,21 @@ def export_expenses_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@complete_search_export(BuildingListView, 'building_list')
+@conditional_get(lambda request: [list_queryset(BuildingListView, request), *ConditionalGet.tables(Unit)])
 def export_buildings_excel(request):
     """تصدير قائمة المباني إلى Excel"""
+    if CsvExporter.requested(request):
+        rows = list_queryset(BuildingListView, request).order_by('name').annotate(
+            units_count=Count('unit'), occupied=Count('unit', filter=Q(unit__is_available=False)),
+        ).values_list('name', 'address', 'units_count', 'occupied').iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_المباني.csv",
+            ["اسم المبنى", "العنوان", "عدد الوحدات", "الوحدات المشغولة", "الوحدات المتاحة", "نسبة الإشغال"],
+            ((name, address, units, occupied, units - occupied, round(occupied / units * 100, 2) if units else 0)
+             for name, address, units, occupied in rows),
+        )
+
     exporter = ExcelExporter("قائمة المباني")
     
     # العناوين
@@ -277,7 +394,7 @@ def export_buildings_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    buildings = Building.objects.all().order_by('name')
+    buildings = list_queryset(BuildingListView, request).order_by('name')
     total_buildings = buildings.count()
     total_units = 0
     total_occupied = 0
@@ -332,8 +449,26 @@ def export_buildings_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@complete_search_export(UnitListView, 'unit_list')
+@conditional_get(lambda request: [list_queryset(UnitListView, request), *ConditionalGet.tables(Lease, Tenant, Building)])
 def export_units_excel(request):
     """تصدير قائمة الوحدات إلى Excel"""
+    if CsvExporter.requested(request):
+        types = CsvExporter.labels(Unit.UNIT_TYPE_CHOICES)
+        current_lease = Lease.objects.filter(unit=OuterRef('pk'), status__in=['active', 'expiring_soon']).order_by('-start_date')
+        rows = list_queryset(UnitListView, request).order_by('building__name', 'unit_number').annotate(
+            tenant_name=Subquery(current_lease.values('tenant__name')[:1]),
+            rent=Subquery(current_lease.values('monthly_rent')[:1]),
+        ).values_list(
+            'building__name', 'unit_number', 'unit_type', 'floor', 'is_available', 'tenant_name', 'rent',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "قائمة_الوحدات.csv",
+            ["المبنى", "رقم الوحدة", "النوع", "الطابق", "الحالة", "المستأجر الحالي", "الإيجار الشهري"],
+            ((building, number, types.get(kind, kind), floor, "متاحة" if available else "مشغولة", tenant, rent)
+             for building, number, kind, floor, available, tenant, rent in rows),
+        )
+
     exporter = ExcelExporter("قائمة الوحدات")
     
     # العناوين
@@ -346,7 +481,7 @@ def export_units_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    units = Unit.objects.all().select_related('building').order_by('building', 'unit_number')
+    units = list_queryset(UnitListView, request).select_related('building').order_by('building', 'unit_number')
     total_units = units.count()
     available_units = 0
     occupied_units = 0
@@ -411,8 +546,24 @@ def export_units_excel(request):
 
 @login_required
 @user_passes_test(staff_required)
+@conditional_get(lambda request: [list_queryset(MaintenanceRequestAdminListView, request), *ConditionalGet.tables(Lease, Tenant, Unit, Building)])
 def export_maintenance_excel(request):
     """تصدير قائمة طلبات الصيانة إلى Excel"""
+    if CsvExporter.requested(request):
+        priorities = CsvExporter.labels(MaintenanceRequest.PRIORITY_CHOICES)
+        statuses = CsvExporter.labels(MaintenanceRequest.STATUS_CHOICES)
+        rows = list_queryset(MaintenanceRequestAdminListView, request).order_by('-reported_date').values_list(
+            'title', 'lease__tenant__name', 'lease__unit__building__name', 'lease__unit__unit_number',
+            'priority', 'status', 'reported_date',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, "طلبات_الصيانة.csv",
+            ["العنوان", "المستأجر", "المبنى", "الوحدة", "الأولوية", "الحالة", "تاريخ الإبلاغ"],
+            ((title, tenant, building, unit, priorities.get(priority, priority), statuses.get(status, status),
+              reported.strftime('%Y-%m-%d %H:%M'))
+             for title, tenant, building, unit, priority, status, reported in rows),
+        )
+
     exporter = ExcelExporter("طلبات الصيانة")
     
     # العناوين
@@ -425,7 +576,7 @@ def export_maintenance_excel(request):
     exporter.create_header(headers)
     
     # البيانات
-    requests = MaintenanceRequest.objects.all().select_related('lease', 'lease__tenant', 'lease__unit').order_by('-reported_date')
+    requests = list_queryset(MaintenanceRequestAdminListView, request).select_related('lease', 'lease__tenant', 'lease__unit').order_by('-reported_date')
     total_requests = requests.count()
     pending_count = 0
     in_progress_count = 0
@@ -481,3 +632,184 @@ def export_maintenance_excel(request):
     exporter.set_column_widths([8, 30, 25, 30, 15, 18, 18])
     
     return exporter.get_response("طلبات_الصيانة.xlsx")
+
+
+@login_required
+@user_passes_test(staff_required)
+@conditional_get(lambda request: ConditionalGet.tables(Payment, Lease, Tenant))
+def export_cheque_deposit_slip(request):
+    """تصدير كشف إيداع الشيكات المستحقة مجمعة حسب البنك"""
+    try:
+        on_date = datetime.date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        on_date = timezone.now().date()
+    bank_name = request.GET.get('bank') or None
+    if CsvExporter.requested(request):
+        unnamed = _('غير محدد')
+        rows = ChequeService.due_for_deposit(on_date, bank_name).values_list(
+            'bank_name', 'check_number', 'check_date', 'lease__tenant__name', 'lease__contract_number', 'amount',
+        ).iterator(chunk_size=CsvExporter.FETCH_SIZE)
+        return CsvExporter.get_response(
+            request, f"كشف_إيداع_الشيكات_{on_date.strftime('%Y-%m-%d')}.csv",
+            ["البنك", "رقم الشيك", "تاريخ الشيك", "المستأجر", "رقم العقد", "المبلغ"],
+            ((bank or unnamed, *row) for bank, *row in rows),
+        )
+
+    banks = ChequeService.deposit_batch(on_date, bank_name=bank_name)
+
+    exporter = ExcelExporter("كشف إيداع الشيكات")
+    headers = ["#", "رقم الشيك", "تاريخ الشيك", "المستأجر", "رقم العقد", "المبلغ"]
+    exporter.add_title(f"كشف إيداع الشيكات - {on_date.strftime('%Y-%m-%d')}", num_columns=len(headers))
+    exporter.add_empty_row()
+
+    grand_total = Decimal('0')
+    for bank in banks:
+        exporter.add_row([f"البنك: {bank['bank_name']}"] + [""] * (len(headers) - 1), style='success')
+        exporter.create_header(headers)
+        for idx, cheque in enumerate(bank['cheques'], 1):
+            exporter.add_row([
+                idx,
+                cheque.check_number or "-",
+                cheque.check_date.strftime('%Y-%m-%d'),
+                cheque.lease.tenant.name,
+                cheque.lease.contract_number,
+                cheque.amount
+            ], number_formats=[None, None, None, None, None, 'currency'])
+        exporter.add_total_row(f"إجمالي {bank['bank_name']} ({bank['count']} شيك)", bank['total'], col_span=len(headers), value_type='currency')
+        exporter.add_empty_row()
+        grand_total += bank['total']
+
+    exporter.add_total_row("إجمالي الإيداع", grand_total, col_span=len(headers), value_type='currency')
+    exporter.set_column_widths([8, 18, 15, 30, 18, 15])
+
+    return exporter.get_response(f"كشف_إيداع_الشيكات_{on_date.strftime('%Y-%m-%d')}.xlsx")
+
+
+@login_required
+@user_passes_test(staff_required)
+@conditional_get(lambda request: ConditionalGet.tables(Lease, Payment, Tenant, Unit, Building))
+def export_rent_roll_excel(request):
+    """تصدير كشف الإيجارات المتوقعة والمحصلة لكل عقد وشهر"""
+    year = report_year(request.GET)
+    building_id = int(request.GET['building']) if request.GET.get('building', '').isdigit() else None
+    roll = RentRoll.for_year(year, building_id=building_id)
+    months = roll.by_month()
+    if CsvExporter.requested(request):
+        return CsvExporter.get_response(
+            request, f"كشف_الإيجارات_{year}.csv",
+            ["رقم العقد", "المستأجر", "المبنى", "الوحدة"] + [f"{m['month']}/{m['year']}" for m in months]
+            + ["المتوقع", "المحصل", "الفرق", "المتأخرات", "نسبة التحصيل"],
+            ([row['contract_number'], row['tenant_name'], row['building_name'], row['unit_number']] + row['monthly_collected']
+             + [row['expected'], row['collected'], row['variance'], row['arrears'], row['collection_rate']]
+             for row in roll.by_lease()),
+        )
+
+    exporter = ExcelExporter("كشف الإيجارات")
+    headers = ["رقم العقد", "المستأجر", "المبنى", "الوحدة"] + [f"{m['month']}/{m['year']}" for m in months] \
+        + ["المتوقع", "المحصل", "الفرق", "المتأخرات", "نسبة التحصيل"]
+    exporter.add_title(f"كشف الإيجارات المتوقعة والمحصلة - {year}", num_columns=len(headers))
+    exporter.add_empty_row()
+    exporter.create_header(headers)
+
+    money = ['currency'] * (len(months) + 4)
+    for row in roll.by_lease():
+        exporter.add_row(
+            [row['contract_number'], row['tenant_name'], row['building_name'], row['unit_number']]
+            + row['monthly_collected']
+            + [row['expected'], row['collected'], row['variance'], row['arrears'], row['collection_rate'] if row['collection_rate'] is not None else "-"],
+            style='warning' if row['arrears'] > 0 else 'normal',
+            number_formats=[None] * 4 + money + ['percentage'],
+        )
+
+    exporter.add_empty_row()
+    exporter.add_row(["الشهر", "", "", ""] + [f"{m['month']}/{m['year']}" for m in months], style='total')
+    exporter.add_row(["المتوقع", "", "", ""] + [m['expected'] for m in months], number_formats=[None] * 4 + money)
+    exporter.add_row(["المحصل", "", "", ""] + [m['collected'] for m in months], number_formats=[None] * 4 + money)
+    exporter.add_row(["المتأخرات المتراكمة", "", "", ""] + [m['cumulative_arrears'] for m in months], style='warning', number_formats=[None] * 4 + money)
+
+    totals = roll.totals()
+    exporter.add_empty_row()
+    exporter.add_total_row("إجمالي المتوقع", totals['expected'], col_span=4, value_type='currency')
+    exporter.add_total_row("إجمالي المحصل", totals['collected'], col_span=4, value_type='currency')
+    exporter.add_total_row("إجمالي المتأخرات", totals['arrears'], col_span=4, value_type='currency')
+    exporter.set_column_widths([18, 30, 20, 12] + [12] * len(months) + [15, 15, 15, 15, 12])
+
+    return exporter.get_response(f"كشف_الإيجارات_{year}.xlsx")
+
+
+@login_required
+@user_passes_test(staff_required)
+@conditional_get(lambda request: ConditionalGet.tables(Lease, Payment, Tenant, Unit, Building))
+def export_aging_report_excel(request):
+    """تصدير تقرير أعمار الذمم المدينة"""
+    report = AgingReport.from_query(request.GET)
+    bucket_labels = [str(label) for key, label in AgingReport.bucket_labels()]
+    if CsvExporter.requested(request):
+        return CsvExporter.get_response(
+            request, f"أعمار_الذمم_{report.as_of.strftime('%Y-%m-%d')}.csv",
+            ["رقم العقد", "المستأجر", "المبنى", "الوحدة"] + bucket_labels + ["الإجمالي", "رصيد دائن"],
+            ([row['contract_number'], row['tenant_name'], row['building_name'], row['unit_number']]
+             + row['buckets'] + [row['total'], row['credit']] for row in report.rows),
+        )
+
+    exporter = ExcelExporter("أعمار الذمم")
+    headers = ["#", "رقم العقد", "المستأجر", "المبنى", "الوحدة"] + bucket_labels + ["الإجمالي", "رصيد دائن"]
+    exporter.add_title(f"تقرير أعمار الذمم المدينة - {report.as_of.strftime('%Y-%m-%d')}", num_columns=len(headers))
+    exporter.add_empty_row()
+    exporter.create_header(headers)
+
+    money = ['currency'] * (len(bucket_labels) + 2)
+    for idx, row in enumerate(report.rows, 1):
+        exporter.add_row(
+            [idx, row['contract_number'], row['tenant_name'], row['building_name'], row['unit_number']]
+            + row['buckets'] + [row['total'], row['credit']],
+            style='warning' if row['buckets'][-1] > 0 else 'normal',
+            number_formats=[None] * 5 + money,
+        )
+
+    exporter.add_row(["", "الإجمالي", "", "", ""] + report.totals['buckets'] + [report.totals['total'], report.totals['credit']],
+                     style='total', number_formats=[None] * 5 + money)
+    exporter.set_column_widths([8, 18, 30, 20, 12] + [15] * len(bucket_labels) + [15, 15])
+
+    return exporter.get_response(f"أعمار_الذمم_{report.as_of.strftime('%Y-%m-%d')}.xlsx")
+
+
+@login_required
+@user_passes_test(staff_required)
+@conditional_get(lambda request: pl_watermark(*BuildingProfitLoss.period(*building_pl_period(request.GET))))
+def export_building_pl_excel(request):
+    """تصدير مقارنة الأرباح والخسائر بين المباني"""
+    year, month = building_pl_period(request.GET)
+    report = BuildingProfitLoss.get(*BuildingProfitLoss.period(year, month))
+    period = f"{month}/{year}" if month else str(year)
+    category_labels = [str(label) for label in report['category_labels']]
+    if CsvExporter.requested(request):
+        return CsvExporter.get_response(
+            request, f"أرباح_المباني_{period.replace('/', '_')}.csv",
+            ["المبنى", "الإيرادات"] + category_labels + ["إجمالي المصاريف", "الصافي", "الهامش"],
+            ([row['building_name'], row['income']] + row['expense_list'] + [row['expenses'], row['net'], row['margin']]
+             for row in report['rows']),
+        )
+
+    exporter = ExcelExporter("أرباح المباني")
+    headers = ["#", "المبنى", "الإيرادات"] + category_labels + ["إجمالي المصاريف", "الصافي", "الهامش"]
+    exporter.add_title(f"مقارنة الأرباح والخسائر بين المباني - {period}", num_columns=len(headers))
+    exporter.add_empty_row()
+    exporter.create_header(headers)
+
+    money = ['currency'] * (len(category_labels) + 3)
+    for idx, row in enumerate(report['rows'], 1):
+        exporter.add_row(
+            [idx, row['building_name'], row['income']] + row['expense_list']
+            + [row['expenses'], row['net'], row['margin'] if row['margin'] is not None else ""],
+            style='warning' if row['net'] < 0 else 'normal',
+            number_formats=[None, None] + money + ['percentage'],
+        )
+
+    totals = report['totals']
+    exporter.add_row(["", "الإجمالي", totals['income']] + totals['expense_list']
+                     + [totals['expenses'], totals['net'], totals['margin'] if totals['margin'] is not None else ""],
+                     style='total', number_formats=[None, None] + money + ['percentage'])
+    exporter.set_column_widths([8, 25, 15] + [15] * len(category_labels) + [15, 15, 12])
+
+    return exporter.get_response(f"أرباح_المباني_{period.replace('/', '_')}.xlsx")
@@ -154,6 +154,20 @@ class PaymentForm(forms.ModelForm):
         
         return cleaned_data
 
+class PaymentImportForm(forms.Form):
+    file = forms.FileField(label=_("ملف كشف الحساب (CSV أو Excel)"), help_text=_("الأعمدة المطلوبة: رقم العقد، تاريخ الدفع، المبلغ"))
+    dry_run = forms.BooleanField(label=_("تحقق فقط دون حفظ"), required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs.update({'accept': '.csv,.xlsx', 'class': 'w-full p-2 border rounded-md'})
+
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError(_("يجب أن يكون الملف بصيغة CSV أو XLSX."))
+        return uploaded
+
 class InvoiceForm(forms.ModelForm):
     class Meta:
         model = Invoice
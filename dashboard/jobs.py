@@ -0,0 +1,140 @@
+"""
+Periodic jobs run by the built-in scheduler (see scheduler.py and the
+run_scheduler management command). Each job returns the number of rows it
+affected, or None when that is not known.
+"""
+import datetime
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from .models import Lease, JobRun
+from .live_events import LiveEventBroker
+from .notification_service import NotificationService
+from .rent_ledger import RentLedger
+from .scheduler import JobScheduler
+
+
+@JobScheduler.register('update_lease_statuses', '5 0 * * *', 'تحديث حالات العقود حسب تاريخ الانتهاء')
+def update_lease_statuses():
+    """
+    Save only the leases whose status is about to change, so signal receivers
+    (notifications, search index, portal cache) still run for those rows.
+    """
+    today = timezone.now().date()
+    soon = today + relativedelta(months=1)
+    candidates = Lease.objects.exclude(status__in=['expired', 'cancelled']).filter(
+        Q(end_date__lt=today)
+        | Q(status='active', end_date__lte=soon)
+        | Q(status='expiring_soon', end_date__gt=soon)
+    ).select_related('tenant')
+    updated = 0
+    for lease in candidates:
+        original_status = lease.status
+        lease.update_status()
+        if lease.status != original_status:
+            lease.save()
+            updated += 1
+    return updated
+
+
+@JobScheduler.register('send_payment_reminders', '0 8 * * *', 'إرسال تذكيرات الدفعات المستحقة والمتأخرة')
+def send_payment_reminders(today=None):
+    """
+    Remind tenants and staff of rent due in five days and of every past month
+    with a balance. Amounts come from RentLedger's grouped query and the
+    notifications are inserted in bulk; dedupe keys such as
+    "lease:42:overdue:2026-09" make reruns add only what is new.
+    """
+    today = today or timezone.now().date()
+    staff_ids = list(User.objects.filter(is_staff=True).values_list('id', flat=True))
+    lease_type = ContentType.objects.get_for_model(Lease)
+    notifications = []
+
+    def notify(row, message, kind):
+        key = f"lease:{row['lease_id']}:{kind}:{row['year']}-{row['month']:02d}"
+        recipients = set(staff_ids)
+        if row['tenant_user_id']:
+            recipients.add(row['tenant_user_id'])
+        for user_id in recipients:
+            notifications.append({
+                'user_id': user_id, 'message': message, 'dedupe_key': key,
+                'content_type': lease_type, 'object_id': row['lease_id'],
+            })
+
+    due_date_reminder = today + relativedelta(days=5)
+    reminder_month = (due_date_reminder.year, due_date_reminder.month) if due_date_reminder.day == 1 else None
+    first_day_of_current_month = today.replace(day=1)
+    for row in RentLedger.month_rows(until=due_date_reminder):
+        period = (row['year'], row['month'])
+        if period == reminder_month:
+            if row['amount_paid'] <= 0 < row['rent_due']:
+                msg = _("تذكير: دفعة ايجار عقد %(contracts)s عن شهر %(month)s / %(year)s تستحق قريبا.") % {
+                    'contracts': row['contract_number'], 'month': row['month'], 'year': row['year']
+                }
+                notify(row, msg, 'reminder')
+        elif datetime.date(row['year'], row['month'], 1) < first_day_of_current_month and row['balance'] > 0:
+            msg = _("تنبيه: يوجد مبلغ متاخر بقيمة %(balance)s على عقد %(contract)s عن شهر %(month)s / %(year)s.") % {
+                'balance': row['balance'], 'contract': row['contract_number'], 'month': row['month'], 'year': row['year']
+            }
+            notify(row, msg, 'overdue')
+
+    return NotificationService.bulk_notify(notifications)
+
+
+@JobScheduler.register('send_lease_notifications', '30 8 * * *', 'إرسال إشعارات التأخر وتجديد العقود')
+def send_lease_notifications(today=None):
+    """
+    Warn about leases with three or more past months left entirely unpaid and
+    ask tenants whose lease ends within a month whether they want to renew.
+    The warning is keyed by month and the renewal question by end date, so
+    each is sent at most once per period.
+    """
+    today = today or timezone.now().date()
+    fallback_user_id = User.objects.filter(is_staff=True).order_by('id').values_list('id', flat=True).first()
+    lease_type = ContentType.objects.get_for_model(Lease)
+    notifications = []
+
+    def notify(lease_id, user_id, message, key):
+        user_id = user_id or fallback_user_id
+        if user_id:
+            notifications.append({
+                'user_id': user_id, 'message': message, 'dedupe_key': key,
+                'content_type': lease_type, 'object_id': lease_id,
+            })
+
+    # Late payments: months before the current one with nothing paid
+    unpaid = {}
+    for row in RentLedger.arrears(today):
+        if row['amount_paid'] <= 0:
+            unpaid.setdefault(row['lease_id'], []).append(row)
+    for lease_id, months in unpaid.items():
+        if len(months) >= 3:
+            lease = months[0]
+            notify(
+                lease_id, lease['tenant_user_id'],
+                f'إنذار: تأخر في سداد الإيجار لعقد {lease["contract_number"]} لمدة {len(months)} شهر',
+                f"lease:{lease_id}:late:{today.strftime('%Y-%m')}",
+            )
+
+    # Lease renewal (1 month before expiry)
+    one_month_later = today + relativedelta(months=1)
+    expiring = Lease.objects.filter(end_date__lte=one_month_later, end_date__gte=today, status='expiring_soon') \
+        .values_list('id', 'contract_number', 'end_date', 'tenant__user_id')
+    for lease_id, contract_number, end_date, user_id in expiring:
+        notify(
+            lease_id, user_id,
+            f'هل لديك رغبة في تجديد عقد الإيجار رقم {contract_number}؟ ينتهي في {end_date.strftime("%d/%m/%Y")}',
+            f"lease:{lease_id}:renewal:{end_date.strftime('%Y-%m')}",
+        )
+
+    return NotificationService.bulk_notify(notifications)
+
+
+@JobScheduler.register('prune_history', '15 3 * * *', 'حذف الأحداث المباشرة وسجلات المهام القديمة')
+def prune_history():
+    deleted = LiveEventBroker.prune()
+    deleted += JobRun.objects.filter(started_at__lt=timezone.now() - datetime.timedelta(days=90)).delete()[0]
+    return deleted
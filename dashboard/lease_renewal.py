@@ -0,0 +1,161 @@
+"""
+Lease renewal service shared by the single-lease renewal page, the bulk
+renewal screen and the renew_leases management command.
+"""
+import re
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _, gettext_lazy
+from .models import Lease, Unit, NumberSequence
+from .search_service import SearchService
+from .portal_snapshot import PortalSnapshotService
+
+RENEWAL_SUFFIX = re.compile(r'-R\d+$')
+
+
+class LeaseRenewalService:
+    """Computes renewal terms and creates renewed leases in one transaction"""
+
+    SEQUENCE_NAME = 'lease_renewal'
+    DURATIONS = {
+        '1y': relativedelta(years=1, days=-1),
+        '6m': relativedelta(months=6, days=-1),
+        '3m': relativedelta(months=3, days=-1),
+    }
+    DURATION_CHOICES = [('1y', gettext_lazy('سنة واحدة')), ('6m', gettext_lazy('6 أشهر')), ('3m', gettext_lazy('3 أشهر')), ('manual', gettext_lazy('تاريخ مخصص'))]
+    # Allowed rent change in percent, lowest and highest
+    RENT_CHANGE_RANGE = (Decimal('-50'), Decimal('100'))
+
+    @classmethod
+    def expiring_leases(cls, days=60):
+        """Active or expiring leases ending within `days` days"""
+        today = timezone.now().date()
+        return Lease.objects.filter(
+            status__in=['active', 'expiring_soon'], end_date__lte=today + datetime.timedelta(days=days)
+        ).select_related('tenant', 'unit', 'unit__building').order_by('end_date', 'id')
+
+    @classmethod
+    def new_end_date(cls, start_date, duration, manual_end_date=None):
+        if duration in cls.DURATIONS:
+            return start_date + cls.DURATIONS[duration]
+        if not manual_end_date:
+            raise ValueError(_("الرجاء إدخال تاريخ انتهاء صحيح."))
+        if isinstance(manual_end_date, str):
+            try:
+                manual_end_date = datetime.date.fromisoformat(manual_end_date)
+            except ValueError:
+                raise ValueError(_("الرجاء إدخال تاريخ انتهاء صحيح."))
+        if manual_end_date <= start_date:
+            raise ValueError(_("تاريخ الانتهاء يجب أن يكون بعد تاريخ بدء العقد الجديد."))
+        return manual_end_date
+
+    @classmethod
+    def new_rent(cls, monthly_rent, rent_change_percent=None):
+        if not rent_change_percent:
+            return monthly_rent
+        low, high = cls.RENT_CHANGE_RANGE
+        rent_change_percent = Decimal(rent_change_percent)
+        if not rent_change_percent.is_finite() or not low <= rent_change_percent <= high:
+            raise ValueError(_("نسبة تغيير الإيجار يجب أن تكون بين %(low)s%% و %(high)s%%.") % {'low': low, 'high': high})
+        factor = Decimal('1') + rent_change_percent / Decimal('100')
+        return (monthly_rent * factor).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    @classmethod
+    def renewed_ids(cls, leases):
+        """Ids of the leases whose unit already has a later lease for the same tenant"""
+        later = Lease.objects.filter(
+            unit_id__in={lease.unit_id for lease in leases}, tenant_id__in={lease.tenant_id for lease in leases},
+        ).values_list('unit_id', 'tenant_id', 'start_date')
+        starts = {}
+        for unit_id, tenant_id, start_date in later:
+            key = (unit_id, tenant_id)
+            starts[key] = max(starts.get(key, start_date), start_date)
+        return {lease.pk for lease in leases if starts.get((lease.unit_id, lease.tenant_id), lease.end_date) > lease.end_date}
+
+    @classmethod
+    def contract_numbers(cls, leases):
+        """
+        New "<base>-R<n>" numbers from the renewal sequence, one per lease.
+
+        Numbers typed in by hand can already hold a suffix the sequence has not
+        reached; those are skipped and replaced from a further block.
+        """
+        bases = [RENEWAL_SUFFIX.sub('', lease.contract_number) for lease in leases]
+        numbers = [None] * len(bases)
+        pending = list(range(len(bases)))
+        while pending:
+            candidates = {index: f"{bases[index]}-R{number}"
+                          for index, number in zip(pending, NumberSequence.reserve(cls.SEQUENCE_NAME, len(pending)))}
+            taken = set(Lease.objects.filter(contract_number__in=candidates.values()).values_list('contract_number', flat=True))
+            pending = []
+            for index, candidate in candidates.items():
+                if candidate in taken:
+                    pending.append(index)
+                else:
+                    numbers[index] = candidate
+        return numbers
+
+    @classmethod
+    def preview(cls, leases, duration, manual_end_date=None, rent_change_percent=None):
+        """Return the proposed terms for each lease without touching the database"""
+        terms = []
+        for lease in leases:
+            start_date = lease.end_date + relativedelta(days=1)
+            terms.append({
+                'lease': lease,
+                'start_date': start_date,
+                'end_date': cls.new_end_date(start_date, duration, manual_end_date),
+                'monthly_rent': cls.new_rent(lease.monthly_rent, rent_change_percent),
+            })
+        return terms
+
+    @classmethod
+    def renew(cls, leases, duration, manual_end_date=None, rent_change_percent=None):
+        """
+        Renew every lease in `leases` atomically and return the new leases.
+
+        The originals are locked and re-read first, so two renewals of the
+        same lease run one after the other, and leases that already have a
+        renewal are skipped. Contract numbers come from the renewal sequence
+        (see contract_numbers), the originals are marked expired with a single
+        UPDATE and the new leases are written with bulk_create. Raises
+        ValueError when every lease was already renewed.
+        """
+        lease_ids = [lease.pk for lease in leases]
+        if not lease_ids:
+            return []
+        with transaction.atomic():
+            leases = list(Lease.objects.select_for_update().filter(pk__in=lease_ids).order_by('id'))
+            renewed = cls.renewed_ids(leases)
+            leases = [lease for lease in leases if lease.pk not in renewed]
+            if not leases:
+                raise ValueError(_("تم تجديد العقود المحددة مسبقاً."))
+            terms = cls.preview(leases, duration, manual_end_date, rent_change_percent)
+            numbers = cls.contract_numbers(leases)
+            new_leases = []
+            for contract_number, term in zip(numbers, terms):
+                original = term['lease']
+                new_lease = Lease(
+                    unit_id=original.unit_id, tenant_id=original.tenant_id,
+                    contract_number=contract_number,
+                    contract_form_number=original.contract_form_number,
+                    monthly_rent=term['monthly_rent'],
+                    start_date=term['start_date'], end_date=term['end_date'],
+                    electricity_meter=original.electricity_meter, water_meter=original.water_meter,
+                    office_fee=original.office_fee, admin_fee=original.admin_fee,
+                    registration_fee=(term['monthly_rent'] * 12) * Decimal('0.03'),
+                )
+                new_lease.update_status()
+                new_leases.append(new_lease)
+            Lease.objects.bulk_create(Lease.stamp(new_leases))
+            now = timezone.now()
+            expired = [lease.pk for lease in leases]
+            Lease.objects.filter(pk__in=expired).update(status='expired', updated_at=now, change_seq=Lease.sequence_case(expired))
+            Unit.objects.filter(pk__in={lease.unit_id for lease in new_leases}, is_available=True).update(is_available=False, updated_at=now)
+            created = Lease.objects.filter(contract_number__in=[lease.contract_number for lease in new_leases])
+            SearchService.index_queryset(created)
+        PortalSnapshotService.invalidate_tenants({lease.tenant_id for lease in leases})
+        return list(created.order_by('id'))
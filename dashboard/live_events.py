@@ -0,0 +1,137 @@
+"""
+Live dashboard events delivered to staff browsers over server-sent events.
+
+Two backends, chosen with settings.LIVE_EVENTS_BACKEND:
+
+- 'database' (default): events are written to DashboardEvent and each stream
+  polls for rows newer than the last id it sent, so any worker sees every
+  event, including those published by the scheduler process.
+- 'memory': an in-process pub/sub. Publishing hands the event to every open
+  stream of this process through its event loop. Only correct when the site
+  runs as a single ASGI worker.
+"""
+import json
+import asyncio
+import datetime
+import itertools
+import logging
+import threading
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .models import DashboardEvent
+
+logger = logging.getLogger(__name__)
+
+
+class LiveEventBroker:
+    """Publishes dashboard events and turns them into SSE streams"""
+
+    HEARTBEAT_SECONDS = 15
+    DATABASE_POLL_SECONDS = 2
+    QUEUE_SIZE = 100
+    RETENTION = datetime.timedelta(days=1)
+
+    _subscribers = set()
+    _lock = threading.Lock()
+    _counter = itertools.count(1)
+
+    @classmethod
+    def backend(cls):
+        return getattr(settings, 'LIVE_EVENTS_BACKEND', 'database')
+
+    @classmethod
+    def publish(cls, event_type, payload):
+        try:
+            # Decimals, dates and lazy translations become plain JSON values
+            payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+            if cls.backend() == 'database':
+                DashboardEvent.objects.create(event_type=event_type, payload=payload)
+            else:
+                cls._dispatch({'id': next(cls._counter), 'type': event_type, 'data': payload})
+        except Exception as e:
+            logger.error(f"Failed to publish live event {event_type}: {str(e)}")
+
+    @classmethod
+    def publish_on_commit(cls, event_type, payload):
+        """Publish once the current transaction commits so streams never see rolled-back rows"""
+        transaction.on_commit(lambda: cls.publish(event_type, payload))
+
+    @classmethod
+    def _dispatch(cls, event):
+        with cls._lock:
+            subscribers = list(cls._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(cls._enqueue, queue, event)
+            except RuntimeError:
+                # The stream's event loop is closed; its finally block will unsubscribe
+                pass
+
+    @staticmethod
+    def _enqueue(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: drop the event rather than grow without bound
+            pass
+
+    @classmethod
+    def prune(cls, older_than=None):
+        """Delete stored events older than the retention period"""
+        cutoff = timezone.now() - (older_than or cls.RETENTION)
+        return DashboardEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+    @staticmethod
+    def format_event(event_id, event_type, data):
+        return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+    @classmethod
+    async def stream(cls, last_event_id=None):
+        """Async generator of SSE frames, with keep-alive comments while idle"""
+        yield f"retry: {cls.HEARTBEAT_SECONDS * 1000}\n\n"
+        if cls.backend() == 'database':
+            async for frame in cls._database_stream(last_event_id):
+                yield frame
+        else:
+            async for frame in cls._memory_stream():
+                yield frame
+
+    @classmethod
+    async def _memory_stream(cls):
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=cls.QUEUE_SIZE))
+        with cls._lock:
+            cls._subscribers.add(entry)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(entry[1].get(), timeout=cls.HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield cls.format_event(event['id'], event['type'], event['data'])
+        finally:
+            with cls._lock:
+                cls._subscribers.discard(entry)
+
+    @classmethod
+    async def _database_stream(cls, last_event_id=None):
+        try:
+            last_id = int(last_event_id)
+        except (TypeError, ValueError):
+            last_id = await DashboardEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+        idle = 0
+        while True:
+            events = [event async for event in DashboardEvent.objects.filter(id__gt=last_id).order_by('id')[:cls.QUEUE_SIZE]]
+            for event in events:
+                last_id = event.pk
+                yield cls.format_event(event.pk, event.event_type, event.payload)
+            if events:
+                idle = 0
+                continue
+            await asyncio.sleep(cls.DATABASE_POLL_SECONDS)
+            idle += cls.DATABASE_POLL_SECONDS
+            if idle >= cls.HEARTBEAT_SECONDS:
+                idle = 0
+                yield ": keep-alive\n\n"
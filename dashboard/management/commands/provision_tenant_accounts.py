@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from dashboard.tenant_accounts import TenantAccountService
+
+
+class Command(BaseCommand):
+    help = 'Creates portal accounts for tenants that have none (e.g. tenants added with bulk_create).'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(_('Provisioning tenant accounts...')))
+        created = TenantAccountService.provision_missing()
+        self.stdout.write(f"  - {created}")
+        self.stdout.write(self.style.SUCCESS(_('Process finished.')))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from dashboard.search_service import SearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for tenants, leases, units, buildings and invoices.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Model names to rebuild (default: all indexed models)')
+
+    def handle(self, *args, **options):
+        models = [m for m in SearchService.INDEXED_MODELS if not options['models'] or m._meta.model_name in options['models']]
+        self.stdout.write(self.style.SUCCESS(_('Rebuilding search index...')))
+        counts = SearchService.rebuild(models)
+        for model_name, count in counts.items():
+            self.stdout.write(f"  - {model_name}: {count}")
+        self.stdout.write(self.style.SUCCESS(_('Process finished.')))
@@ -0,0 +1,35 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext as _
+from dashboard.lease_renewal import LeaseRenewalService
+
+
+class Command(BaseCommand):
+    help = 'Previews, and with --commit renews, all leases expiring within the given number of days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Renew leases ending within this many days')
+        parser.add_argument('--duration', default='1y', choices=['1y', '6m', '3m', 'manual'])
+        parser.add_argument('--end-date', help='End date (YYYY-MM-DD) when --duration=manual')
+        parser.add_argument('--rent-change', type=Decimal, default=None, help='Rent change in percent, e.g. 5 or -2.5')
+        parser.add_argument('--commit', action='store_true', help='Create the renewed leases (default is preview only)')
+
+    def handle(self, *args, **options):
+        leases = list(LeaseRenewalService.expiring_leases(options['days']))
+        try:
+            terms = LeaseRenewalService.preview(leases, options['duration'], options['end_date'], options['rent_change'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for term in terms:
+            self.stdout.write(
+                f"  - {term['lease'].contract_number}: {term['start_date']} → {term['end_date']}, "
+                f"{term['lease'].monthly_rent} → {term['monthly_rent']}"
+            )
+
+        if not options['commit']:
+            self.stdout.write(self.style.WARNING(_('Preview only. Re-run with --commit to renew %(count)d leases.') % {'count': len(terms)}))
+            return
+
+        new_leases = LeaseRenewalService.renew(leases, options['duration'], options['end_date'], options['rent_change'])
+        self.stdout.write(self.style.SUCCESS(_('Renewed %(count)d leases.') % {'count': len(new_leases)}))
@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from dashboard.scheduler import JobScheduler
+
+
+class Command(BaseCommand):
+    help = 'Runs registered periodic jobs on their cron schedules (use --once from an external cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now and exit')
+        parser.add_argument('--job', help='Run this job immediately, regardless of its schedule')
+        parser.add_argument('--list', action='store_true', help='List registered jobs and their next run')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            now = timezone.localtime()
+            for job in JobScheduler.jobs.values():
+                next_run = job.schedule.next_run(now)
+                self.stdout.write(f"  - {job.name} [{job.schedule.expression}] next: {next_run:%Y-%m-%d %H:%M}" if next_run else f"  - {job.name} [{job.schedule.expression}]")
+            return
+
+        if options['job']:
+            job = JobScheduler.jobs.get(options['job'])
+            if not job:
+                raise CommandError(_('Unknown job: %(name)s') % {'name': options['job']})
+            self.report(JobScheduler.run_job(job, force=True), job.name)
+            return
+
+        self.stdout.write(self.style.SUCCESS(_('Scheduler started.')))
+        while True:
+            for run in JobScheduler.run_pending():
+                self.report(run, run.job_name)
+            if options['once']:
+                return
+            # wake up at the start of the next minute
+            time.sleep(60 - timezone.now().second)
+
+    def report(self, run, name):
+        if run is None:
+            self.stdout.write(self.style.WARNING(_('%(name)s is already running in another process.') % {'name': name}))
+        elif run.status == 'success':
+            self.stdout.write(f"  - {run.job_name}: {run.rows_affected if run.rows_affected is not None else '-'} ({run.duration}s)")
+        else:
+            self.stdout.write(self.style.ERROR(f"  - {run.job_name}: {run.error.strip().splitlines()[-1]}"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:53
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_invoice_totals(apps, schema_editor):
+    Invoice = apps.get_model('dashboard', 'Invoice')
+    InvoiceItem = apps.get_model('dashboard', 'InvoiceItem')
+    items_total = InvoiceItem.objects.filter(invoice=OuterRef('pk')).order_by().values('invoice').annotate(s=Sum('amount')).values('s')
+    Invoice.objects.update(
+        total=Coalesce(Subquery(items_total, output_field=models.DecimalField(max_digits=12, decimal_places=2)), Value(Decimal('0.00')))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0021_alter_otp_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='المبلغ الإجمالي'),
+        ),
+        migrations.RunPython(populate_invoice_totals, migrations.RunPython.noop),
+    ]
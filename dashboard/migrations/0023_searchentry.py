@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'dashboard_searchentry_fts'
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"content, content='dashboard_searchentry', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER dashboard_searchentry_ai AFTER INSERT ON dashboard_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER dashboard_searchentry_ad AFTER DELETE ON dashboard_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER dashboard_searchentry_au AFTER UPDATE ON dashboard_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute("CREATE FULLTEXT INDEX dashboard_searchentry_content_ft ON dashboard_searchentry (content)")
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS dashboard_searchentry_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'mysql':
+        schema_editor.execute("DROP INDEX dashboard_searchentry_content_ft ON dashboard_searchentry")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0022_invoice_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content', models.TextField(verbose_name='محتوى البحث')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'فهرس البحث',
+                'verbose_name_plural': 'فهرس البحث',
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0023_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['expense_date', 'id'], name='expense_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lease',
+            index=models.Index(fields=['start_date', 'id'], name='lease_start_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0024_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='اسم التسلسل')),
+                ('next_value', models.PositiveBigIntegerField(default=1, verbose_name='القيمة التالية')),
+            ],
+            options={
+                'verbose_name': 'تسلسل ترقيم',
+                'verbose_name_plural': 'تسلسلات الترقيم',
+            },
+        ),
+    ]
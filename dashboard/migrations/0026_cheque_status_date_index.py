@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0025_numbersequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['check_status', 'check_date'], name='check_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0026_cheque_status_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50, verbose_name='نوع الحدث')),
+                ('payload', models.JSONField(default=dict, verbose_name='البيانات')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='الوقت')),
+            ],
+            options={
+                'verbose_name': 'حدث مباشر',
+                'verbose_name_plural': 'الأحداث المباشرة',
+                'ordering': ['id'],
+            },
+        ),
+    ]
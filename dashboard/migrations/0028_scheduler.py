@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0027_dashboardevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='اسم المهمة')),
+                ('owner', models.CharField(blank=True, max_length=100, verbose_name='المالك')),
+                ('locked_until', models.DateTimeField(verbose_name='مقفل حتى')),
+            ],
+            options={
+                'verbose_name': 'قفل مهمة',
+                'verbose_name_plural': 'أقفال المهام',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_name', models.CharField(max_length=100, verbose_name='اسم المهمة')),
+                ('status', models.CharField(choices=[('running', 'قيد التشغيل'), ('success', 'نجحت'), ('failed', 'فشلت')], default='running', max_length=20, verbose_name='الحالة')),
+                ('started_at', models.DateTimeField(verbose_name='وقت البدء')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='وقت الانتهاء')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='المدة (ثانية)')),
+                ('rows_affected', models.IntegerField(blank=True, null=True, verbose_name='السجلات المتأثرة')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ')),
+                ('host', models.CharField(blank=True, max_length=100, verbose_name='الخادم')),
+            ],
+            options={
+                'verbose_name': 'تشغيل مهمة',
+                'verbose_name_plural': 'سجل تشغيل المهام',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['job_name', 'started_at'], name='jobrun_name_started_idx'), models.Index(fields=['started_at', 'id'], name='jobrun_started_id_idx')],
+            },
+        ),
+    ]
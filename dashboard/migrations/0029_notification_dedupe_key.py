@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0028_scheduler'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, verbose_name='مفتاح عدم التكرار'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'dedupe_key'), name='unique_notification_dedupe'),
+        ),
+    ]
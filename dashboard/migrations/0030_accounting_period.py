@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0029_notification_dedupe_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='السنة')),
+                ('month', models.IntegerField(choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4'), (5, '5'), (6, '6'), (7, '7'), (8, '8'), (9, '9'), (10, '10'), (11, '11'), (12, '12')], verbose_name='الشهر')),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='إجمالي الإيرادات')),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='إجمالي المصاريف')),
+                ('closed_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإقفال')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_periods', to=settings.AUTH_USER_MODEL, verbose_name='أقفلت بواسطة')),
+            ],
+            options={
+                'verbose_name': 'فترة محاسبية مقفلة',
+                'verbose_name_plural': 'الفترات المحاسبية المقفلة',
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenseSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('building_name', models.CharField(max_length=200, verbose_name='اسم المبنى')),
+                ('category', models.CharField(choices=[('maintenance', 'صيانة'), ('utilities', 'خدمات (كهرباء، ماء)'), ('salaries', 'رواتب'), ('marketing', 'تسويق'), ('admin', 'رسوم إدارية/حكومية'), ('other', 'أخرى')], max_length=50, verbose_name='فئة المصروف')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='المبلغ')),
+                ('count', models.PositiveIntegerField(verbose_name='العدد')),
+                ('building', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.building', verbose_name='المبنى')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_snapshots', to='dashboard.accountingperiod', verbose_name='الفترة')),
+            ],
+            options={
+                'verbose_name': 'لقطة مصاريف',
+                'verbose_name_plural': 'لقطات المصاريف',
+            },
+        ),
+        migrations.CreateModel(
+            name='IncomeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('building_name', models.CharField(max_length=200, verbose_name='اسم المبنى')),
+                ('payment_method', models.CharField(choices=[('cash', 'نقداً'), ('check', 'شيك'), ('bank_transfer', 'تحويل بنكي'), ('other', 'أخرى')], max_length=20, verbose_name='طريقة الدفع')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='المبلغ')),
+                ('count', models.PositiveIntegerField(verbose_name='العدد')),
+                ('building', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.building', verbose_name='المبنى')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='income_snapshots', to='dashboard.accountingperiod', verbose_name='الفترة')),
+            ],
+            options={
+                'verbose_name': 'لقطة إيرادات',
+                'verbose_name_plural': 'لقطات الإيرادات',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountingperiod',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_accounting_period'),
+        ),
+    ]
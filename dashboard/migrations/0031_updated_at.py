@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0030_accounting_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='lease',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخر تعديل'),
+        ),
+    ]
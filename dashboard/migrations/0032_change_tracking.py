@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:50
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_rows(apps, schema_editor):
+    """Give every existing row its own change number so a first sync from 0 pages cleanly"""
+    NumberSequence = apps.get_model('dashboard', 'NumberSequence')
+    offset = 0
+    for model_name in ('Tenant', 'Lease', 'Payment', 'Expense', 'Invoice', 'MaintenanceRequest'):
+        model = apps.get_model('dashboard', model_name)
+        model.objects.update(change_seq=F('pk') + offset)
+        offset += model.objects.aggregate(top=Max('pk'))['top'] or 0
+    NumberSequence.objects.update_or_create(name='changes', defaults={'next_value': offset + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0031_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='النموذج')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='المعرف')),
+                ('change_seq', models.PositiveBigIntegerField(unique=True, verbose_name='رقم التغيير')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الحذف')),
+            ],
+            options={
+                'verbose_name': 'سجل حذف',
+                'verbose_name_plural': 'سجلات الحذف',
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='lease',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='lease',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='maintenancerequest',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequest',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='رقم التغيير'),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='تاريخ الإنشاء'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء'),
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+    ]
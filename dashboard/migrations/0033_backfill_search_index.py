@@ -0,0 +1,101 @@
+import re
+from django.db import migrations
+
+# A frozen copy of the normalisation and indexed values in search_service.py as of
+# this migration, so later changes to the service or the models cannot break it
+BATCH_SIZE = 1000
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه', 'ى': 'ي', 'ؤ': 'و', 'ئ': 'ي',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+})
+NON_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = ARABIC_DIACRITICS.sub('', str(text)).translate(ARABIC_LETTER_MAP).casefold()
+    return NON_WORD.sub(' ', text).replace('_', ' ').split()
+
+
+def join_tokens(values):
+    tokens = []
+    for value in values:
+        for token in tokenize(value):
+            if token not in tokens:
+                tokens.append(token)
+    return ' '.join(tokens)
+
+
+def translated(instance, field):
+    return [getattr(instance, f"{field}_ar", None), getattr(instance, f"{field}_en", None), getattr(instance, field, None)]
+
+
+def tenant_values(tenant):
+    return translated(tenant, 'name') + translated(tenant, 'authorized_signatory') + [tenant.phone, tenant.email]
+
+
+def building_values(building):
+    return translated(building, 'name') + translated(building, 'address')
+
+
+def unit_values(unit):
+    return [unit.unit_number, unit.get_unit_type_display()] + translated(unit.building, 'name')
+
+
+def lease_values(lease):
+    return [lease.contract_number, lease.contract_form_number, lease.electricity_meter, lease.water_meter] \
+        + translated(lease.tenant, 'name') + unit_values(lease.unit)
+
+
+def invoice_values(invoice):
+    values = [invoice.invoice_number] + translated(invoice.tenant, 'name')
+    if invoice.lease_id:
+        values.append(invoice.lease.contract_number)
+    return values
+
+
+# model name -> (values builder, select_related)
+INDEXED_MODELS = {
+    'tenant': (tenant_values, ()),
+    'building': (building_values, ()),
+    'unit': (unit_values, ('building',)),
+    'lease': (lease_values, ('tenant', 'unit', 'unit__building')),
+    'invoice': (invoice_values, ('tenant', 'lease')),
+}
+
+
+def backfill_search_index(apps, schema_editor):
+    """Index the rows that existed before 0023 created the search index; rows indexed since are kept"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SearchEntry = apps.get_model('dashboard', 'SearchEntry')
+    for model_name, (values_builder, select_related) in INDEXED_MODELS.items():
+        queryset = apps.get_model('dashboard', model_name).objects.select_related(*select_related).order_by('pk')
+        if not queryset.exists():
+            continue
+        content_type, _ = ContentType.objects.get_or_create(app_label='dashboard', model=model_name)
+        batch = []
+        for instance in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(SearchEntry(content_type=content_type, object_id=instance.pk,
+                                     content=join_tokens(values_builder(instance))))
+            if len(batch) >= BATCH_SIZE:
+                SearchEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        SearchEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0032_change_tracking'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
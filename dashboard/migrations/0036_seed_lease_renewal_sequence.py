@@ -0,0 +1,30 @@
+import re
+from django.db import migrations
+
+SEQUENCE_NAME = 'lease_renewal'
+RENEWAL_SUFFIX = re.compile(r'-R(\d+)$')
+
+
+def seed_lease_renewal_sequence(apps, schema_editor):
+    """Start the renewal sequence past every -R<n> suffix issued before it existed"""
+    Lease = apps.get_model('dashboard', 'Lease')
+    NumberSequence = apps.get_model('dashboard', 'NumberSequence')
+    suffixes = [int(RENEWAL_SUFFIX.search(number).group(1)) for number in
+                Lease.objects.filter(contract_number__regex=r'-R[0-9]+$').values_list('contract_number', flat=True)]
+    if not suffixes:
+        return
+    sequence, _ = NumberSequence.objects.get_or_create(name=SEQUENCE_NAME)
+    if sequence.next_value <= max(suffixes):
+        sequence.next_value = max(suffixes) + 1
+        sequence.save(update_fields=['next_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0035_notification_user_read_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_lease_renewal_sequence, migrations.RunPython.noop),
+    ]
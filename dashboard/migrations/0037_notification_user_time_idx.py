@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0036_seed_lease_renewal_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'timestamp', 'id'], name='notification_user_time_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
@@ -8,12 +8,129 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from decimal import Decimal
 import datetime
-from django.db.models import Sum
+from django.db.models import Sum, OuterRef, Subquery, Value, Case, When, F, Q
+from django.db.models.functions import Coalesce
 import secrets
 import string
 from django.core.validators import RegexValidator
 
-class Company(models.Model):
+class FieldTrackerMixin:
+    """Remember the column values a row was loaded with so saves can skip unchanged work."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _snapshot_loaded_values(self):
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields if f.attname in self.__dict__}
+
+    def has_changed(self, field_name):
+        if self._state.adding:
+            return True
+        attname = self._meta.get_field(field_name).attname
+        loaded = getattr(self, '_loaded_values', {})
+        return attname not in loaded or loaded[attname] != getattr(self, attname)
+
+    def get_loaded_value(self, field_name, default=None):
+        attname = self._meta.get_field(field_name).attname
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def get_dirty_fields(self):
+        """Names of concrete, non-pk fields whose value differs from the loaded one."""
+        return [f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname in self.__dict__ and self.has_changed(f.name)]
+
+
+class ClosedPeriodGuardMixin:
+    """Reject changes to the financial fields of rows dated in a closed accounting period."""
+    period_date_field = None
+    period_fields = ()
+
+    def check_period_open(self, deleting=False):
+        from django.core.exceptions import ValidationError
+
+        if not (self._state.adding or deleting or any(self.has_changed(field) for field in self.period_fields)):
+            return
+        dates = [getattr(self, self.period_date_field)]
+        if not self._state.adding:
+            dates.append(self.get_loaded_value(self.period_date_field))
+        closed = [day for day in dates if AccountingPeriod.is_closed(day)]
+        if closed:
+            raise ValidationError({self.period_date_field: _("الفترة المحاسبية %(period)s مقفلة ولا يمكن تعديل حركاتها.") % {
+                'period': closed[0].strftime('%m/%Y'),
+            }})
+
+
+class TimestampedModel(models.Model):
+    """Rows carrying updated_at, the watermark conditional GET compares (see conditional.py)."""
+    updated_at = models.DateTimeField(_("آخر تعديل"), auto_now=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # auto_now is only applied to the fields being written
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        super().save(*args, **kwargs)
+
+
+CHANGE_SEQUENCE = 'changes'
+
+
+class ChangeTrackedModel(TimestampedModel):
+    """
+    Rows numbered from one global change sequence for the sync API (see change_feed.py).
+
+    Every save takes the next number while holding the sequence row lock until
+    the row itself is written, so numbers become visible in commit order and a
+    reader that has seen number N will never later find an unseen row below it.
+
+    That lock is held until the outermost transaction commits, so every write
+    of a tracked row waits for the one before it to commit. The number is taken
+    as late as possible, right before the row's own INSERT/UPDATE (after the
+    pre_save receivers, some of which call a translation service), and
+    post_save receivers run after it; transactions that write tracked rows
+    should stay short and leave slow work (HTTP calls, PDFs, mail) until after
+    commit.
+    """
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    change_seq = models.PositiveBigIntegerField(_("رقم التغيير"), default=0, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None, update_fields=None):
+        # Fixtures (raw) keep the numbers they carry
+        if raw:
+            return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        with transaction.atomic(using=using):
+            self.change_seq = NumberSequence.reserve(CHANGE_SEQUENCE)[0]
+            if update_fields is not None:
+                update_fields = update_fields | {'change_seq'}
+            return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+
+    @staticmethod
+    def stamp(objs):
+        """Number unsaved instances right before bulk_create, inside the transaction that inserts them"""
+        objs = list(objs)
+        for obj, number in zip(objs, NumberSequence.reserve(CHANGE_SEQUENCE, len(objs)) if objs else ()):
+            obj.change_seq = number
+        return objs
+
+    @staticmethod
+    def sequence_case(pks):
+        """Per-row change numbers for a queryset .update(), built right before it inside the same transaction"""
+        pks = list(pks)
+        numbers = NumberSequence.reserve(CHANGE_SEQUENCE, len(pks)) if pks else ()
+        return Case(*[When(pk=pk, then=Value(number)) for pk, number in zip(pks, numbers)],
+                    default=F('change_seq'), output_field=models.PositiveBigIntegerField())
+
+
+class Company(TimestampedModel):
     name = models.CharField(_("اسم الشركة"), max_length=200)
     logo = models.ImageField(_("الشعار"), upload_to='company_logos/', blank=True, null=True)
     contact_email = models.EmailField(_("البريد الإلكتروني للتواصل"), blank=True, null=True)
@@ -27,7 +144,7 @@ class Company(models.Model):
     def __str__(self):
         return self.name
 
-class Building(models.Model):
+class Building(TimestampedModel):
     name = models.CharField(_("اسم المبنى"), max_length=100)
     address = models.TextField(_("العنوان"))
     
@@ -38,7 +155,7 @@ class Building(models.Model):
     def __str__(self):
         return self.name
 
-class Unit(models.Model):
+class Unit(TimestampedModel):
     UNIT_TYPE_CHOICES = [('office', _('مكتب')), ('apartment', _('شقة')), ('shop', _('محل'))]
     building = models.ForeignKey(Building, on_delete=models.CASCADE, verbose_name=_("المبنى"))
     unit_number = models.CharField(_("رقم الوحدة"), max_length=20)
@@ -53,7 +170,7 @@ class Unit(models.Model):
     def __str__(self):
         return f"{self.building.name} - {self.unit_number}"
 
-class Tenant(models.Model):
+class Tenant(FieldTrackerMixin, ChangeTrackedModel):
     TENANT_TYPE_CHOICES = [('individual', _('فرد')), ('company', _('شركة'))]
     user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("حساب المستخدم"), help_text=_("اربط المستأجر بحساب مستخدم لتسجيل الدخول إلى البوابة."))
     name = models.CharField(_("اسم المستأجر"), max_length=150)
@@ -81,7 +198,7 @@ class ContractTemplate(models.Model):
     def __str__(self):
         return self.title
 
-class Lease(models.Model):
+class Lease(FieldTrackerMixin, ChangeTrackedModel):
     STATUS_CHOICES = [('active', _('نشط')), ('expiring_soon', _('قريب الانتهاء')), ('expired', _('منتهي')), ('cancelled', _('ملغي'))]
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE, verbose_name=_("الوحدة"))
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, verbose_name=_("المستأجر"))
@@ -102,26 +219,34 @@ class Lease(models.Model):
     class Meta:
         verbose_name = _("عقد إيجار")
         verbose_name_plural = _("عقود الإيجار")
+        indexes = [models.Index(fields=['start_date', 'id'], name='lease_start_date_id_idx')]
         
     def save(self, *args, **kwargs):
-        self.registration_fee = (self.monthly_rent * 12) * Decimal('0.03')
-        if self.pk:
-            old_lease = Lease.objects.get(pk=self.pk)
-            if old_lease.unit != self.unit:
-                old_lease.unit.is_available = True
-                old_lease.unit.save()
-                
-        if self.status in ['active', 'expiring_soon']:
-            self.unit.is_available = False
-        else:
-            self.unit.is_available = True
-        self.unit.save()
-
-        is_being_cancelled = 'cancellation_reson' in kwargs.get('update_fields', [])
-        if not is_being_cancelled:
-            self.update_status()
+        adding = self._state.adding
+        if self.registration_fee is None or self.has_changed('monthly_rent'):
+            self.registration_fee = (self.monthly_rent * 12) * Decimal('0.03')
+        # In memory only; also moves a lease past its end date on any edit
+        self.update_status()
+
+        if not adding and kwargs.get('update_fields') is None:
+            # Only the changed columns are written; an unchanged save still goes through
+            # (touching updated_at) so its post_save receivers run
+            kwargs['update_fields'] = self.get_dirty_fields() or ['updated_at']
+
+        unit_changed = self.has_changed('unit')
+        availability_changed = unit_changed or self.has_changed('status')
+        old_unit_id = self.get_loaded_value('unit') if unit_changed else None
         super().save(*args, **kwargs)
 
+        if old_unit_id:
+            Unit.objects.filter(pk=old_unit_id, is_available=False).update(is_available=True, updated_at=timezone.now())
+        if availability_changed:
+            is_available = self.status not in ['active', 'expiring_soon']
+            Unit.objects.filter(pk=self.unit_id).exclude(is_available=is_available).update(is_available=is_available, updated_at=timezone.now())
+            if Lease.unit.is_cached(self):
+                self.unit.is_available = is_available
+        self._snapshot_loaded_values()
+
     def update_status(self):
         today = timezone.now().date()
         if self.status == 'cancelled': return
@@ -234,13 +359,43 @@ class Lease(models.Model):
             parts.append("0 " + _("يوم"))
         return "، ".join(parts)
 
-class Payment(models.Model):
+class NumberSequence(models.Model):
+    """Named counter handing out blocks of numbers (e.g. renewal contract suffixes)"""
+    name = models.CharField(_("اسم التسلسل"), max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(_("القيمة التالية"), default=1)
+
+    class Meta:
+        verbose_name = _("تسلسل ترقيم")
+        verbose_name_plural = _("تسلسلات الترقيم")
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+    @classmethod
+    def reserve(cls, name, count=1):
+        """Reserve `count` consecutive numbers and return them as a range.
+
+        The sequence row is locked for the duration of the surrounding
+        transaction, so concurrent callers always get disjoint blocks.
+        """
+        with transaction.atomic():
+            cls.objects.get_or_create(name=name)
+            sequence = cls.objects.select_for_update().get(name=name)
+            start = sequence.next_value
+            sequence.next_value = start + count
+            sequence.save(update_fields=['next_value'])
+        return range(start, start + count)
+
+
+class Payment(FieldTrackerMixin, ClosedPeriodGuardMixin, ChangeTrackedModel):
     PAYMENT_METHOD_CHOICES = [
         ('cash', _('نقداً')),
         ('check', _('شيك')),
         ('bank_transfer', _('تحويل بنكي')),
         ('other', _('أخرى'))
     ]
+    period_date_field = 'payment_date'
+    period_fields = ('lease', 'amount', 'payment_date', 'payment_method')
     
     CHECK_STATUS_CHOICES = [
         ('pending', _('معلق - في الانتظار')),
@@ -265,6 +420,10 @@ class Payment(models.Model):
         verbose_name = _("دفعة")
         verbose_name_plural = _("الدفعات")
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+            models.Index(fields=['check_status', 'check_date'], name='check_status_date_idx'),
+        ]
         
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -275,6 +434,8 @@ class Payment(models.Model):
             
             if self.check_status == 'returned' and not self.return_reason:
                 raise ValidationError({'return_reason': _('سبب إرجاع الشيك مطلوب عند اختيار حالة "مرتجع"')})
+
+        self.check_period_open()
     
     def save(self, *args, **kwargs):
         self.full_clean()
@@ -286,7 +447,20 @@ class Payment(models.Model):
     def get_receipt_url(self):
         return reverse('report_payment_receipt', kwargs={'pk': self.pk})
 
-class MaintenanceRequest(models.Model):
+    @staticmethod
+    def received_by(as_of):
+        """
+        Q for payments that count as rent received by `as_of`, the one rule the
+        aging report, rent roll and rent ledger share. Non-cheque payments always
+        count. A cheque counts once cashed, or while pending from its cheque date
+        (payment date when it has none), so post-dated cheques are not money yet.
+        Returned cheques never count.
+        """
+        pending = Q(check_status='pending') | Q(check_status__isnull=True)
+        dated = Q(check_date__lte=as_of) | Q(check_date__isnull=True, payment_date__lte=as_of)
+        return ~Q(payment_method='check') | Q(check_status='cashed') | (pending & dated)
+
+class MaintenanceRequest(ChangeTrackedModel):
     STATUS_CHOICES = [('submitted', _('تم الإرسال')), ('in_progress', _('قيد التنفيذ')), ('completed', _('مكتمل')), ('cancelled', _('ملغي'))]
     PRIORITY_CHOICES = [('low', _('منخفضة')), ('medium', _('متوسطة')), ('high', _('عالية'))]
     lease = models.ForeignKey(Lease, on_delete=models.CASCADE, related_name='maintenance_requests', verbose_name=_("العقد"))
@@ -306,7 +480,7 @@ class MaintenanceRequest(models.Model):
     def __str__(self):
         return self.title
 
-class Document(models.Model):
+class Document(TimestampedModel):
     lease = models.ForeignKey(Lease, on_delete=models.CASCADE, related_name='documents', verbose_name=_("العقد"))
     title = models.CharField(_("عنوان المستند"), max_length=200)
     file = models.FileField(_("الملف"), upload_to='lease_documents/')
@@ -320,7 +494,7 @@ class Document(models.Model):
     def __str__(self):
         return self.title
 
-class Expense(models.Model):
+class Expense(FieldTrackerMixin, ClosedPeriodGuardMixin, ChangeTrackedModel):
     EXPENSE_CATEGORY_CHOICES = [('maintenance', _('صيانة')), ('utilities', _('خدمات (كهرباء، ماء)')), ('salaries', _('رواتب')), ('marketing', _('تسويق')), ('admin', _('رسوم إدارية/حكومية')), ('other', _('أخرى'))]
     building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name='expenses', verbose_name=_("المبنى"))
     category = models.CharField(_("فئة المصروف"), max_length=50, choices=EXPENSE_CATEGORY_CHOICES)
@@ -328,12 +502,22 @@ class Expense(models.Model):
     amount = models.DecimalField(_("المبلغ"), max_digits=10, decimal_places=2)
     expense_date = models.DateField(_("تاريخ المصروف"))
     receipt = models.FileField(_("إيصال/فاتورة (اختياري)"), upload_to='expense_receipts/', blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = _("مصروف")
         verbose_name_plural = _("المصاريف")
         ordering = ['-expense_date']
+        indexes = [models.Index(fields=['expense_date', 'id'], name='expense_date_id_idx')]
+    period_date_field = 'expense_date'
+    period_fields = ('building', 'category', 'amount', 'expense_date')
+
+    def clean(self):
+        self.check_period_open()
+
+    def save(self, *args, **kwargs):
+        # Enforced here as well so code paths that skip clean() (API, scripts) hit the guard too
+        self.check_period_open()
+        super().save(*args, **kwargs)
         
     def __str__(self):
         return f"{self.get_category_display()} - {self.amount}"
@@ -346,16 +530,28 @@ class Notification(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     related_object = GenericForeignKey('content_type', 'object_id')
+    # Identifies the event a notification is about (e.g. "lease:42:overdue:2026-09")
+    # so producers can insert the same notification again without duplicating it
+    dedupe_key = models.CharField(_("مفتاح عدم التكرار"), max_length=100, null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = _("إشعار")
         verbose_name_plural = _("الإشعارات")
         ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dedupe_key'], name='unique_notification_dedupe'),
+        ]
+        indexes = [
+            # Unread badge counts on every page
+            models.Index(fields=['user', 'read'], name='notification_user_read_idx'),
+            # Inbox pages: keyset on (timestamp, id) within one user
+            models.Index(fields=['user', 'timestamp', 'id'], name='notification_user_time_idx'),
+        ]
 
     def __str__(self):
         return self.message
 
-class Invoice(models.Model):
+class Invoice(ChangeTrackedModel):
     INVOICE_STATUS_CHOICES = [
         ('draft', _('مسودة')),
         ('sent', _('مرسلة')),
@@ -370,6 +566,9 @@ class Invoice(models.Model):
     due_date = models.DateField(_("تاريخ الاستحقاق"))
     status = models.CharField(_("الحالة"), max_length=20, choices=INVOICE_STATUS_CHOICES, default='draft')
     notes = models.TextField(_("ملاحظات"), blank=True, null=True)
+    total = models.DecimalField(_("المبلغ الإجمالي"), max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, db_index=True)
+
+    OUTSTANDING_STATUSES = ['sent', 'overdue']
 
     class Meta:
         verbose_name = _("فاتورة")
@@ -381,12 +580,31 @@ class Invoice(models.Model):
 
     @property
     def total_amount(self):
-        return self.items.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        return self.total
+
+    def recalculate_total(self):
+        """Recompute the stored total from the invoice items in a single UPDATE."""
+        Invoice.recalculate_totals([self.pk])
+        self.refresh_from_db(fields=['total'])
+        return self.total
+
+    @classmethod
+    def recalculate_totals(cls, invoice_ids):
+        items_total = InvoiceItem.objects.filter(invoice=OuterRef('pk')).order_by().values('invoice').annotate(s=Sum('amount')).values('s')
+        with transaction.atomic():
+            return cls.objects.filter(pk__in=invoice_ids).update(
+                total=Coalesce(Subquery(items_total, output_field=models.DecimalField(max_digits=12, decimal_places=2)), Value(Decimal('0.00'))),
+                updated_at=timezone.now(), change_seq=cls.sequence_case(invoice_ids),
+            )
+
+    @classmethod
+    def outstanding_total(cls):
+        return cls.objects.filter(status__in=cls.OUTSTANDING_STATUSES).aggregate(total=Sum('total'))['total'] or Decimal('0.00')
 
     def get_absolute_url(self):
         return reverse('invoice_detail', kwargs={'pk': self.pk})
 
-class InvoiceItem(models.Model):
+class InvoiceItem(FieldTrackerMixin, TimestampedModel):
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='items', verbose_name=_("الفاتورة"))
     description = models.CharField(_("الوصف"), max_length=255)
     amount = models.DecimalField(_("المبلغ"), max_digits=10, decimal_places=2)
@@ -399,6 +617,157 @@ class InvoiceItem(models.Model):
         return self.description
 
 
+class SearchEntry(models.Model):
+    """Normalized Arabic/English search tokens for one searchable record"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content = models.TextField(_("محتوى البحث"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("فهرس البحث")
+        verbose_name_plural = _("فهرس البحث")
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model}:{self.object_id}"
+
+
+class Tombstone(models.Model):
+    """Left behind by a deleted change-tracked row so sync clients can drop their copy"""
+    model = models.CharField(_("النموذج"), max_length=100)
+    object_id = models.PositiveBigIntegerField(_("المعرف"))
+    change_seq = models.PositiveBigIntegerField(_("رقم التغيير"), unique=True)
+    deleted_at = models.DateTimeField(_("تاريخ الحذف"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("سجل حذف")
+        verbose_name_plural = _("سجلات الحذف")
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id}"
+
+
+class DashboardEvent(models.Model):
+    """Live dashboard event, read by SSE streams when workers cannot share memory"""
+    event_type = models.CharField(_("نوع الحدث"), max_length=50)
+    payload = models.JSONField(_("البيانات"), default=dict)
+    created_at = models.DateTimeField(_("الوقت"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("حدث مباشر")
+        verbose_name_plural = _("الأحداث المباشرة")
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk}"
+
+
+class JobLock(models.Model):
+    """Lease-style lock row so only one process runs a scheduled job at a time"""
+    name = models.CharField(_("اسم المهمة"), max_length=100, unique=True)
+    owner = models.CharField(_("المالك"), max_length=100, blank=True)
+    locked_until = models.DateTimeField(_("مقفل حتى"))
+
+    class Meta:
+        verbose_name = _("قفل مهمة")
+        verbose_name_plural = _("أقفال المهام")
+
+    def __str__(self):
+        return self.name
+
+
+class JobRun(models.Model):
+    STATUS_CHOICES = [('running', _('قيد التشغيل')), ('success', _('نجحت')), ('failed', _('فشلت'))]
+    job_name = models.CharField(_("اسم المهمة"), max_length=100)
+    status = models.CharField(_("الحالة"), max_length=20, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField(_("وقت البدء"))
+    finished_at = models.DateTimeField(_("وقت الانتهاء"), null=True, blank=True)
+    duration = models.FloatField(_("المدة (ثانية)"), null=True, blank=True)
+    rows_affected = models.IntegerField(_("السجلات المتأثرة"), null=True, blank=True)
+    error = models.TextField(_("الخطأ"), blank=True)
+    host = models.CharField(_("الخادم"), max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = _("تشغيل مهمة")
+        verbose_name_plural = _("سجل تشغيل المهام")
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['job_name', 'started_at'], name='jobrun_name_started_idx'),
+            models.Index(fields=['started_at', 'id'], name='jobrun_started_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_name} @ {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class AccountingPeriod(models.Model):
+    """A closed month; its P&L aggregates are frozen in IncomeSnapshot and ExpenseSnapshot"""
+    year = models.IntegerField(_("السنة"))
+    month = models.IntegerField(_("الشهر"), choices=[(i, str(i)) for i in range(1, 13)])
+    income_total = models.DecimalField(_("إجمالي الإيرادات"), max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(_("إجمالي المصاريف"), max_digits=14, decimal_places=2, default=0)
+    closed_at = models.DateTimeField(_("تاريخ الإقفال"), auto_now_add=True)
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='closed_periods', verbose_name=_("أقفلت بواسطة"))
+
+    class Meta:
+        verbose_name = _("فترة محاسبية مقفلة")
+        verbose_name_plural = _("الفترات المحاسبية المقفلة")
+        ordering = ['-year', '-month']
+        constraints = [models.UniqueConstraint(fields=['year', 'month'], name='unique_accounting_period')]
+
+    def __str__(self):
+        return f"{self.month:02d}/{self.year}"
+
+    @property
+    def start(self):
+        return datetime.date(self.year, self.month, 1)
+
+    @property
+    def net(self):
+        return self.income_total - self.expense_total
+
+    @classmethod
+    def closed_months(cls):
+        """Set of (year, month) pairs that are closed; read from the table (one row per month) so
+        every process sees a close or reopen as soon as it commits"""
+        return set(cls.objects.values_list('year', 'month'))
+
+    @classmethod
+    def is_closed(cls, day):
+        return bool(day) and cls.objects.filter(year=day.year, month=day.month).exists()
+
+
+class IncomeSnapshot(models.Model):
+    """Payments of a closed period per building and payment method"""
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='income_snapshots', verbose_name=_("الفترة"))
+    building = models.ForeignKey(Building, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name=_("المبنى"))
+    building_name = models.CharField(_("اسم المبنى"), max_length=200)
+    payment_method = models.CharField(_("طريقة الدفع"), max_length=20, choices=Payment.PAYMENT_METHOD_CHOICES)
+    total = models.DecimalField(_("المبلغ"), max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField(_("العدد"))
+
+    class Meta:
+        verbose_name = _("لقطة إيرادات")
+        verbose_name_plural = _("لقطات الإيرادات")
+
+
+class ExpenseSnapshot(models.Model):
+    """Expenses of a closed period per building and category"""
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='expense_snapshots', verbose_name=_("الفترة"))
+    building = models.ForeignKey(Building, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name=_("المبنى"))
+    building_name = models.CharField(_("اسم المبنى"), max_length=200)
+    category = models.CharField(_("فئة المصروف"), max_length=50, choices=Expense.EXPENSE_CATEGORY_CHOICES)
+    total = models.DecimalField(_("المبلغ"), max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField(_("العدد"))
+
+    class Meta:
+        verbose_name = _("لقطة مصاريف")
+        verbose_name_plural = _("لقطات المصاريف")
+
+
 class UserProfile(models.Model):
     """Extended user profile to add phone number for OTP authentication"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile', verbose_name=_("المستخدم"))
@@ -0,0 +1,160 @@
+"""
+Notification inbox: cached unread counters, bulk mark-read and long polling.
+
+Each user has two entries in the shared cache: the unread count, counted
+once on the (user, read) index and then adjusted in place as notifications
+are created or read, and the id of their newest notification, which base.html
+renders to seed the long poll. Both are refilled from the database on a miss,
+so a page view costs no query while they are warm. Long polls are async and
+read the notification table between awaits, so a waiting browser tab holds no
+worker thread and sees rows written by any process, the scheduler included.
+
+Every producer creates notifications through notify() or bulk_notify().
+A dedupe key names the event a notification is about (for example
+"lease:42:expiring:2026-11"), and the unique (user, dedupe_key) constraint
+makes sending it again a no-op found by an index probe.
+"""
+import asyncio
+import time
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Max
+from .models import Notification
+
+
+class NotificationService:
+    """Unread counters and inbox operations for the notification API"""
+
+    POLL_INTERVAL = 2
+
+    @classmethod
+    def unread_key(cls, user_id):
+        return f"notifications_unread:{user_id}"
+
+    @classmethod
+    def latest_key(cls, user_id):
+        return f"notifications_latest:{user_id}"
+
+    @classmethod
+    def counter_timeout(cls):
+        return getattr(settings, 'NOTIFICATION_COUNTER_TIMEOUT', 60 * 60 * 24)
+
+    @classmethod
+    def unread_count(cls, user):
+        """Cached number of unread notifications; counts on the (user, read) index only on a miss"""
+        return cache.get_or_set(
+            cls.unread_key(user.pk),
+            lambda: Notification.objects.filter(user=user, read=False).count(),
+            cls.counter_timeout(),
+        )
+
+    @classmethod
+    def latest_id(cls, user):
+        return cache.get_or_set(
+            cls.latest_key(user.pk),
+            lambda: Notification.objects.filter(user=user).aggregate(latest=Max('id'))['latest'] or 0,
+            cls.counter_timeout(),
+        )
+
+    @classmethod
+    def _adjust_unread(cls, user_id, delta):
+        try:
+            if delta > 0:
+                cache.incr(cls.unread_key(user_id), delta)
+            elif delta < 0 and cache.decr(cls.unread_key(user_id), -delta) < 0:
+                cache.delete(cls.unread_key(user_id))
+        except ValueError:
+            # Not cached yet; the next unread_count() call counts from the database
+            pass
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cache.delete_many([cls.unread_key(user_id), cls.latest_key(user_id)])
+
+    @classmethod
+    def notify(cls, user_ids, message, dedupe_key=None, related_object=None):
+        """Send one message to several users; returns the number of notifications inserted"""
+        entry = {'message': str(message), 'dedupe_key': dedupe_key}
+        if related_object is not None:
+            entry['content_type'] = ContentType.objects.get_for_model(related_object)
+            entry['object_id'] = related_object.pk
+        return cls.bulk_notify({**entry, 'user_id': user_id} for user_id in set(user_ids) if user_id)
+
+    @classmethod
+    def bulk_notify(cls, entries, batch_size=1000):
+        """
+        Insert notifications given as dicts of Notification field values
+        (user_id, message, dedupe_key, content_type, object_id), skipping
+        those whose (user, dedupe_key) already exists. Model instances are
+        built only for the new rows, and each recipient's cached unread count
+        grows by the number they received. Returns the number of notifications inserted.
+        """
+        entries = list(entries)
+        created = 0
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            keys = {entry['dedupe_key'] for entry in batch if entry.get('dedupe_key')}
+            seen = set()
+            if keys:
+                seen.update(Notification.objects.filter(
+                    user_id__in={entry['user_id'] for entry in batch}, dedupe_key__in=keys
+                ).values_list('user_id', 'dedupe_key'))
+            new = []
+            for entry in batch:
+                if entry.get('dedupe_key'):
+                    key = (entry['user_id'], entry['dedupe_key'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                new.append(Notification(**entry))
+            if not new:
+                continue
+            # A concurrent run may have inserted the same keys since the lookup above
+            Notification.objects.bulk_create(new, ignore_conflicts=True)
+            created += len(new)
+            received = {}
+            for notification in new:
+                received[notification.user_id] = received.get(notification.user_id, 0) + 1
+            for user_id, count in received.items():
+                cls._adjust_unread(user_id, count)
+            # ignore_conflicts gives no ids back on every backend; the newest id is looked up again
+            cache.delete_many([cls.latest_key(user_id) for user_id in received])
+        return created
+
+    @classmethod
+    def mark_read(cls, user, notification_ids):
+        """Mark the given notifications of `user` as read with one UPDATE"""
+        updated = Notification.objects.filter(user=user, pk__in=notification_ids, read=False).update(read=True)
+        cls._adjust_unread(user.pk, -updated)
+        return updated
+
+    @classmethod
+    def mark_all_read(cls, user):
+        updated = Notification.objects.filter(user=user, read=False).update(read=True)
+        cache.set(cls.unread_key(user.pk), 0, cls.counter_timeout())
+        return updated
+
+    @classmethod
+    async def wait_for_new(cls, user, since_id, timeout=None):
+        """
+        Wait until `user` has a notification newer than `since_id` or the
+        timeout expires, checking the database every POLL_INTERVAL seconds.
+        Returns the new notifications, oldest first.
+        """
+        timeout = timeout if timeout is not None else getattr(settings, 'NOTIFICATION_POLL_TIMEOUT', 25)
+        deadline = time.monotonic() + timeout
+        while True:
+            notifications = [n async for n in Notification.objects.filter(user=user, pk__gt=since_id).order_by('id')]
+            if notifications or time.monotonic() >= deadline:
+                return notifications
+            await asyncio.sleep(min(cls.POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+
+    @classmethod
+    def serialize(cls, notification):
+        return {
+            'id': notification.pk,
+            'message': notification.message,
+            'read': notification.read,
+            'timestamp': notification.timestamp.isoformat(),
+        }
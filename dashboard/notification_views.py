@@ -0,0 +1,77 @@
+"""
+JSON endpoints for the notification inbox
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+from django.views.generic import ListView
+from .models import Notification
+from .notification_service import NotificationService
+from .pagination import KeysetPaginationMixin
+
+
+class NotificationInboxView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """Newest-first page of the current user's notifications"""
+    model = Notification
+    paginate_by = 20
+    keyset_field = 'timestamp'
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.GET.get('unread'):
+            queryset = queryset.filter(read=False)
+        return queryset
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        return JsonResponse({
+            'results': [NotificationService.serialize(n) for n in context['object_list']],
+            'unread_count': NotificationService.unread_count(self.request.user),
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        })
+
+
+@login_required
+def notification_unread_count(request):
+    return JsonResponse({'unread_count': NotificationService.unread_count(request.user)})
+
+
+@login_required
+@require_POST
+def notification_mark_read(request):
+    ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+    updated = NotificationService.mark_read(request.user, ids)
+    return JsonResponse({'updated': updated, 'unread_count': NotificationService.unread_count(request.user)})
+
+
+@login_required
+@require_POST
+def notification_mark_all_read(request):
+    updated = NotificationService.mark_all_read(request.user)
+    return JsonResponse({'updated': updated, 'unread_count': 0})
+
+
+@never_cache
+@login_required
+async def notification_poll(request):
+    """
+    Long poll: answer as soon as a notification newer than ?since= arrives.
+    Without a usable ?since= it answers at once with the newest id to wait from.
+    """
+    user = await request.auser()
+    since = request.GET.get('since', '')
+    if since.isdigit():
+        since_id = int(since)
+        notifications = await NotificationService.wait_for_new(user, since_id)
+    else:
+        since_id = await sync_to_async(NotificationService.latest_id)(user)
+        notifications = []
+    return JsonResponse({
+        'results': [NotificationService.serialize(n) for n in notifications],
+        'latest_id': notifications[-1].pk if notifications else since_id,
+        'unread_count': await sync_to_async(NotificationService.unread_count)(user),
+    })
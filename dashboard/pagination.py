@@ -0,0 +1,151 @@
+"""
+Keyset (cursor) pagination for list views over tables that only grow.
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a range condition on
+an indexed (date, id) pair taken from the edge of the previous page, so a deep
+page of the payment history costs the same as the first one.
+"""
+import base64
+import datetime
+import hashlib
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def encode_cursor(value, pk, direction):
+    raw = f"{direction}|{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, date or datetime, pk) or None if the cursor is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, value, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        if direction not in ('next', 'prev'):
+            return None
+        if len(value) == 10:
+            return direction, datetime.date.fromisoformat(value), int(pk)
+        return direction, datetime.datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """Minimal page object exposing the attributes the list templates use"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, total_count=None,
+                 total_capped=False):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total_count = total_count
+        self.total_capped = total_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing Django's Paginator with keyset pagination on
+    (keyset_field, id), newest first.
+
+    keyset_total: when True, the page also carries an estimate of the number of
+    matching rows, counted over at most keyset_count_cap + 1 rows so the count
+    stays cheap on big tables, and cached per filter for keyset_count_timeout
+    seconds so paging through a list does not count again. Past the cap the
+    page reports "more than keyset_count_cap".
+
+    A cursor whose page has since become empty (its rows were deleted or
+    filtered away) falls back to the first page, so the list never renders
+    without rows and navigation.
+    """
+    keyset_field = None
+    keyset_total = False
+    keyset_count_cap = 1000
+    keyset_count_timeout = 300
+    cursor_param = 'cursor'
+
+    def keyset_enabled(self):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_enabled():
+            return super().paginate_queryset(queryset, page_size)
+
+        field = self.keyset_field
+        cursor = decode_cursor(self.request.GET.get(self.cursor_param, ''))
+        object_list, has_next, has_previous = self._fetch_page(queryset, page_size, cursor)
+        if cursor and not object_list:
+            object_list, has_next, has_previous = self._fetch_page(queryset, page_size, None)
+
+        next_cursor = previous_cursor = None
+        if object_list:
+            first, last = object_list[0], object_list[-1]
+            if has_next:
+                next_cursor = encode_cursor(getattr(last, field), last.pk, 'next')
+            if has_previous:
+                previous_cursor = encode_cursor(getattr(first, field), first.pk, 'prev')
+
+        total_count, total_capped = self.get_capped_count(queryset) if self.keyset_total else (None, False)
+        page = KeysetPage(object_list, has_next, has_previous, next_cursor, previous_cursor, total_count, total_capped)
+        return None, page, object_list, page.has_other_pages()
+
+    def _fetch_page(self, queryset, page_size, cursor):
+        """(rows newest first, has_next, has_previous) for the page a cursor points at"""
+        field = self.keyset_field
+        if cursor and cursor[0] == 'prev':
+            _, value, pk = cursor
+            rows = list(queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})).order_by(field, 'id')[:page_size + 1])
+            return list(reversed(rows[:page_size])), True, len(rows) > page_size
+        ordered = queryset.order_by(f'-{field}', '-id')
+        if cursor:
+            _, value, pk = cursor
+            ordered = ordered.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+        rows = list(ordered[:page_size + 1])
+        return rows[:page_size], len(rows) > page_size, cursor is not None
+
+    def get_capped_count(self, queryset):
+        """(count, capped): COUNT(*) over a LIMIT keyset_count_cap + 1 subquery, cached per filter"""
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = 'keyset_count:' + hashlib.md5(f"{sql}{params}{self.keyset_count_cap}".encode()).hexdigest()
+        count = cache.get_or_set(key, lambda: queryset.order_by()[:self.keyset_count_cap + 1].count(),
+                                 self.keyset_count_timeout)
+        if count > self.keyset_count_cap:
+            return self.keyset_count_cap, True
+        return count, False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if isinstance(page, KeysetPage):
+            context['keyset_pagination'] = True
+            context['next_page_query'] = self._cursor_query(page.next_cursor)
+            context['previous_page_query'] = self._cursor_query(page.previous_cursor)
+            context['first_page_query'] = self._cursor_query(None, first=True)
+        return context
+
+    def _cursor_query(self, cursor, first=False):
+        if not cursor and not first:
+            return None
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params.pop(self.cursor_param, None)
+        if cursor:
+            params[self.cursor_param] = cursor
+        return params.urlencode()
@@ -0,0 +1,281 @@
+"""
+Bulk payment import from CSV/XLSX bank statements.
+
+Rows are streamed from the uploaded file in chunks of BATCH_SIZE. For each
+chunk the leases are resolved with one contract-number query, every row is
+parsed and checked with Payment.clean_fields() in memory and the valid ones are
+inserted with one bulk_create in a short transaction of their own, instead of
+running Payment.save() per row; only the error list grows with the file.
+Rows matching a payment stored before the import (same lease, date, amount
+and cheque number) are rejected, so importing the same statement twice adds
+nothing, and a file that fails part-way can simply be imported again.
+"""
+import csv
+import datetime
+import io
+import itertools
+import zipfile
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.translation import gettext as _
+from .models import Lease, Payment, AccountingPeriod
+from .portal_snapshot import PortalSnapshotService
+from .building_pl import BuildingProfitLoss
+from .live_events import LiveEventBroker
+
+
+class PaymentImportService:
+    """Parses, validates and bulk-inserts payment rows"""
+
+    BATCH_SIZE = 1000
+
+    # Accepted header names (English and Arabic) -> Payment field
+    COLUMN_ALIASES = {
+        'contract_number': 'contract_number', 'رقم العقد': 'contract_number',
+        'payment_date': 'payment_date', 'تاريخ الدفع': 'payment_date',
+        'amount': 'amount', 'المبلغ': 'amount',
+        'payment_for_month': 'payment_for_month', 'month': 'payment_for_month', 'الشهر': 'payment_for_month',
+        'payment_for_year': 'payment_for_year', 'year': 'payment_for_year', 'السنة': 'payment_for_year',
+        'payment_method': 'payment_method', 'طريقة الدفع': 'payment_method',
+        'check_number': 'check_number', 'رقم الشيك': 'check_number',
+        'check_date': 'check_date', 'تاريخ الشيك': 'check_date',
+        'bank_name': 'bank_name', 'اسم البنك': 'bank_name',
+        'check_status': 'check_status', 'حالة الشيك': 'check_status',
+        'return_reason': 'return_reason', 'سبب الإرجاع': 'return_reason',
+        'notes': 'notes', 'ملاحظات': 'notes',
+    }
+    REQUIRED_COLUMNS = ('contract_number', 'payment_date', 'amount')
+    DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+    YEAR_RANGE = (2000, 2100)
+
+    @classmethod
+    def _choice_lookup(cls, choices):
+        lookup = {}
+        for value, label in choices:
+            lookup[str(value).lower()] = value
+            lookup[str(label).lower()] = value
+        return lookup
+
+    @classmethod
+    def read_rows(cls, uploaded_file):
+        """Yield (row_number, {field: raw value}) from a CSV or XLSX upload"""
+        name = (uploaded_file.name or '').lower()
+        if name.endswith('.xlsx'):
+            from openpyxl import load_workbook
+            from openpyxl.utils.exceptions import InvalidFileException
+            try:
+                workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+            except (zipfile.BadZipFile, InvalidFileException, KeyError):
+                raise ValueError(_("تعذرت قراءة ملف Excel، قد يكون تالفاً أو ليس بصيغة XLSX."))
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                yield from cls._map_rows(rows)
+            finally:
+                workbook.close()
+        else:
+            text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+            try:
+                yield from cls._map_rows(csv.reader(text))
+            except UnicodeDecodeError:
+                raise ValueError(_("يجب أن يكون ملف CSV بترميز UTF-8."))
+
+    @classmethod
+    def _map_rows(cls, rows):
+        headers = None
+        for row_number, row in enumerate(rows, 1):
+            if headers is None:
+                headers = [cls.COLUMN_ALIASES.get(str(h or '').strip().lower(), cls.COLUMN_ALIASES.get(str(h or '').strip())) for h in row]
+                missing = [c for c in cls.REQUIRED_COLUMNS if c not in headers]
+                if missing:
+                    raise ValueError(_("أعمدة مفقودة في الملف: %(columns)s") % {'columns': ', '.join(missing)})
+                continue
+            if not any(value not in (None, '') for value in row):
+                continue
+            yield row_number, {field: value for field, value in zip(headers, row) if field}
+
+    @classmethod
+    def _parse_date(cls, value):
+        if value in (None, ''):
+            return None
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        if isinstance(value, datetime.date):
+            return value
+        for fmt in cls.DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(str(value).strip(), fmt).date()
+            except ValueError:
+                continue
+        raise ValueError
+
+    @classmethod
+    def _clean_text(cls, value):
+        if value in (None, ''):
+            return None
+        return str(value).strip() or None
+
+    @staticmethod
+    def _field_errors(error):
+        return [f"{Payment._meta.get_field(field).verbose_name}: {message}"
+                for field, messages in error.message_dict.items() for message in messages]
+
+    @staticmethod
+    def duplicate_key(lease_id, payment_date, amount, check_number):
+        return lease_id, payment_date, amount, check_number or None
+
+    @classmethod
+    def existing_keys(cls, payments):
+        """Duplicate keys of the stored payments that could match the given ones"""
+        if not payments:
+            return set()
+        dates = [payment.payment_date for payment in payments]
+        stored = Payment.objects.filter(
+            lease_id__in={payment.lease_id for payment in payments}, payment_date__range=(min(dates), max(dates)),
+        ).values_list('lease_id', 'payment_date', 'amount', 'check_number')
+        return {cls.duplicate_key(*row) for row in stored}
+
+    @classmethod
+    def validate_row(cls, raw, leases, method_lookup, status_lookup, closed_months):
+        """Return (Payment instance or None, list of error messages)"""
+        errors = []
+        # Fields whose own parse error is already reported, so clean_fields() skips them
+        unparsed = set()
+        contract_number = cls._clean_text(raw.get('contract_number'))
+        lease = leases.get(contract_number)
+        if not lease:
+            errors.append(_("رقم العقد غير موجود: %(number)s") % {'number': contract_number or '-'})
+
+        try:
+            payment_date = cls._parse_date(raw.get('payment_date'))
+            if not payment_date:
+                unparsed.add('payment_date')
+                errors.append(_("تاريخ الدفع مطلوب"))
+        except ValueError:
+            payment_date = None
+            unparsed.add('payment_date')
+            errors.append(_("تاريخ الدفع غير صالح"))
+
+        try:
+            amount = Decimal(str(raw.get('amount')).replace(',', '').strip()).quantize(Decimal('0.01'))
+            if amount <= 0:
+                errors.append(_("المبلغ يجب أن يكون أكبر من صفر"))
+        except (InvalidOperation, ValueError):
+            amount = None
+            unparsed.add('amount')
+            errors.append(_("المبلغ غير صالح"))
+
+        try:
+            month = int(raw.get('payment_for_month') or (payment_date.month if payment_date else 0))
+            year = int(raw.get('payment_for_year') or (payment_date.year if payment_date else 0))
+            if not 1 <= month <= 12:
+                unparsed.add('payment_for_month')
+                errors.append(_("الشهر يجب أن يكون بين 1 و 12"))
+            if not cls.YEAR_RANGE[0] <= year <= cls.YEAR_RANGE[1]:
+                unparsed.add('payment_for_year')
+                errors.append(_("السنة يجب أن تكون بين %(first)d و %(last)d") % {'first': cls.YEAR_RANGE[0], 'last': cls.YEAR_RANGE[1]})
+        except (TypeError, ValueError):
+            month = year = None
+            unparsed.update(('payment_for_month', 'payment_for_year'))
+            errors.append(_("الشهر أو السنة غير صالح"))
+
+        payment_method = method_lookup.get(str(raw.get('payment_method') or 'cash').strip().lower())
+        if not payment_method:
+            unparsed.add('payment_method')
+            errors.append(_("طريقة الدفع غير معروفة: %(method)s") % {'method': raw.get('payment_method')})
+
+        check_status = None
+        check_date = None
+        return_reason = cls._clean_text(raw.get('return_reason'))
+        if payment_method == 'check':
+            check_status = status_lookup.get(str(raw.get('check_status') or 'pending').strip().lower())
+            if not check_status:
+                errors.append(_('حالة الشيك مطلوبة عند اختيار طريقة الدفع بالشيك'))
+            elif check_status == 'returned' and not return_reason:
+                errors.append(_('سبب إرجاع الشيك مطلوب عند اختيار حالة "مرتجع"'))
+            try:
+                check_date = cls._parse_date(raw.get('check_date'))
+            except ValueError:
+                errors.append(_("تاريخ الشيك غير صالح"))
+
+        if payment_date and (payment_date.year, payment_date.month) in closed_months:
+            errors.append(_("الفترة المحاسبية %(period)s مقفلة ولا يمكن تعديل حركاتها.") % {'period': payment_date.strftime('%m/%Y')})
+
+        payment = Payment(
+            lease=lease, payment_date=payment_date, amount=amount,
+            payment_for_month=month, payment_for_year=year, payment_method=payment_method,
+            check_number=cls._clean_text(raw.get('check_number')), check_date=check_date,
+            bank_name=cls._clean_text(raw.get('bank_name')), check_status=check_status,
+            return_reason=return_reason, notes=cls._clean_text(raw.get('notes')),
+        )
+        # Field lengths, max_digits and choices, as the payment form checks them
+        try:
+            payment.clean_fields(exclude=['lease', *unparsed])
+        except ValidationError as e:
+            errors.extend(cls._field_errors(e))
+
+        if errors:
+            return None, errors
+        return payment, []
+
+    @classmethod
+    def import_file(cls, uploaded_file, dry_run=False):
+        """
+        Validate every row of the file and bulk-insert the valid ones, one
+        chunk of BATCH_SIZE rows at a time.
+
+        Returns a dict with 'total_rows', 'created' and 'errors' (a list of
+        (row_number, [messages]) tuples).
+        """
+        method_lookup = cls._choice_lookup(Payment.PAYMENT_METHOD_CHOICES)
+        status_lookup = cls._choice_lookup(Payment.CHECK_STATUS_CHOICES)
+        closed_months = AccountingPeriod.closed_months()
+        rows = cls.read_rows(uploaded_file)
+        total_rows = valid_count = 0
+        errors = []
+        # Keys this import accepted: later chunks must not take them for payments stored before the import
+        imported_keys = set()
+        lease_ids, payment_dates, total_amount = set(), set(), Decimal('0')
+
+        while chunk := list(itertools.islice(rows, cls.BATCH_SIZE)):
+            total_rows += len(chunk)
+            contract_numbers = {cls._clean_text(raw.get('contract_number')) for row_number, raw in chunk} - {None}
+            leases = Lease.objects.only('id', 'contract_number').in_bulk(contract_numbers, field_name='contract_number')
+            valid = []
+            for row_number, raw in chunk:
+                payment, row_errors = cls.validate_row(raw, leases, method_lookup, status_lookup, closed_months)
+                if row_errors:
+                    errors.append((row_number, row_errors))
+                else:
+                    valid.append((row_number, payment))
+
+            existing = cls.existing_keys([payment for row_number, payment in valid]) - imported_keys
+            payments = []
+            for row_number, payment in valid:
+                key = cls.duplicate_key(payment.lease_id, payment.payment_date, payment.amount, payment.check_number)
+                if key in existing:
+                    errors.append((row_number, [_("سبق تسجيل دفعة بنفس العقد والتاريخ والمبلغ ورقم الشيك")]))
+                else:
+                    imported_keys.add(key)
+                    payments.append(payment)
+            valid_count += len(payments)
+            if payments and not dry_run:
+                with transaction.atomic():
+                    Payment.objects.bulk_create(Payment.stamp(payments))
+                lease_ids.update(payment.lease_id for payment in payments)
+                payment_dates.update(payment.payment_date for payment in payments)
+                total_amount += sum(payment.amount for payment in payments)
+        errors.sort(key=lambda error: error[0])
+
+        if lease_ids:
+            # bulk_create skips the post_save receivers that normally drop portal snapshots and cached P&L periods
+            PortalSnapshotService.invalidate_leases(lease_ids)
+            BuildingProfitLoss.invalidate(*payment_dates)
+            LiveEventBroker.publish('payment_import', {'count': valid_count, 'total': total_amount})
+
+        return {
+            'total_rows': total_rows,
+            'created': 0 if dry_run else valid_count,
+            'valid': valid_count,
+            'errors': errors,
+        }
@@ -0,0 +1,67 @@
+"""
+Accounting period close.
+
+Closing a month writes its payments per (building, payment method) and its
+expenses per (building, category) into IncomeSnapshot and ExpenseSnapshot,
+using the same grouped queries as the live P&L. From then on the P&L reports
+read that month from the snapshots, and Payment and Expense refuse changes to
+their financial fields (or deletion) while their date lies in the month; see
+ClosedPeriodGuardMixin. Reopening deletes the period and its snapshots.
+"""
+import datetime
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from .models import AccountingPeriod, IncomeSnapshot, ExpenseSnapshot
+from .profit_loss import ProfitLossService
+
+
+class PeriodCloseService:
+    """Close and reopen accounting months"""
+
+    @classmethod
+    def close(cls, year, month, user=None, today=None):
+        """Freeze the aggregates of year/month; only months that have ended can be closed"""
+        today = today or timezone.now().date()
+        start = datetime.date(year, month, 1)
+        end = start + relativedelta(months=1, days=-1)
+        if end >= today.replace(day=1):
+            raise ValueError(_("لا يمكن إقفال شهر لم ينتهِ بعد."))
+
+        with transaction.atomic():
+            if AccountingPeriod.objects.select_for_update().filter(year=year, month=month).exists():
+                raise ValueError(_("الفترة %(period)s مقفلة بالفعل.") % {'period': f"{month:02d}/{year}"})
+            period = AccountingPeriod.objects.create(year=year, month=month, closed_by=user)
+            income = ProfitLossService.income_rows(start, end)
+            expenses = ProfitLossService.expense_rows(start, end)
+            IncomeSnapshot.objects.bulk_create([IncomeSnapshot(
+                period=period, building_id=row['building_id'], building_name=row['building_name'],
+                payment_method=row['payment_method'], total=row['total'], count=row['count'],
+            ) for row in income])
+            ExpenseSnapshot.objects.bulk_create([ExpenseSnapshot(
+                period=period, building_id=row['building_id'], building_name=row['building_name'],
+                category=row['category'], total=row['total'], count=row['count'],
+            ) for row in expenses])
+            period.income_total = sum(row['total'] for row in income)
+            period.expense_total = sum(row['total'] for row in expenses)
+            period.save(update_fields=['income_total', 'expense_total'])
+        return period
+
+    @classmethod
+    def reopen(cls, period):
+        with transaction.atomic():
+            period.delete()
+
+    @classmethod
+    def months(cls, count=12, today=None):
+        """The last `count` ended months, newest first, with their period if closed"""
+        today = today or timezone.now().date()
+        closed = {(period.year, period.month): period for period in AccountingPeriod.objects.select_related('closed_by')}
+        month = today.replace(day=1)
+        rows = []
+        for i in range(count):
+            month -= relativedelta(months=1)
+            rows.append({'year': month.year, 'month': month.month, 'start': month,
+                         'period': closed.get((month.year, month.month))})
+        return rows
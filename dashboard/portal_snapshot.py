@@ -0,0 +1,74 @@
+"""
+Cached per-tenant snapshot of the tenant portal home page.
+
+The snapshot holds everything PortalDashboardView renders (tenant, active
+lease, payment summary, documents and latest maintenance requests) under a
+key derived from the tenant's user id and today's date, so the page is served
+from one cache hit. Receivers in signals.py drop the snapshot whenever one of
+the tenant's Tenant, Lease, Payment, Document or MaintenanceRequest rows
+changes; bulk code paths that bypass signals call invalidate_leases().
+Those writes also come from the scheduler process, so settings.CACHES must
+name a cache shared between processes (see checks.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Tenant, Lease, MaintenanceRequest
+
+
+class PortalSnapshotService:
+    """Builds, caches and invalidates tenant portal snapshots"""
+
+    KEY_PREFIX = 'portal_snapshot'
+
+    @classmethod
+    def timeout(cls):
+        return getattr(settings, 'PORTAL_SNAPSHOT_TIMEOUT', 60 * 60 * 24)
+
+    @classmethod
+    def cache_key(cls, user_id, day=None):
+        # The payment summary statuses depend on today's date
+        day = day or timezone.now().date()
+        return f"{cls.KEY_PREFIX}:{user_id}:{day.isoformat()}"
+
+    @classmethod
+    def get(cls, user):
+        """Return the snapshot for `user`, building and caching it on a miss"""
+        key = cls.cache_key(user.pk)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = cls.build(user)
+            cache.set(key, snapshot, cls.timeout())
+        return snapshot
+
+    @classmethod
+    def build(cls, user):
+        tenant = Tenant.objects.filter(user=user).first()
+        if tenant is None:
+            return {'tenant': None}
+        lease = cls.current_leases(tenant).select_related('unit__building').first()
+        snapshot = {'tenant': tenant, 'lease': lease}
+        if lease:
+            snapshot['payment_summary'] = lease.get_payment_summary()
+            snapshot['documents'] = list(lease.documents.all())
+            snapshot['maintenance_requests'] = list(MaintenanceRequest.objects.filter(lease=lease).order_by('-reported_date')[:5])
+        return snapshot
+
+    @staticmethod
+    def current_leases(tenant):
+        """Running leases, newest first; the first one is what the portal shows"""
+        return Lease.objects.filter(tenant=tenant, status__in=['active', 'expiring_soon']).order_by('-start_date')
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        keys = [cls.cache_key(user_id) for user_id in set(user_ids) if user_id]
+        if keys:
+            cache.delete_many(keys)
+
+    @classmethod
+    def invalidate_tenants(cls, tenant_ids):
+        cls.invalidate_users(Tenant.objects.filter(pk__in=set(tenant_ids), user__isnull=False).values_list('user_id', flat=True))
+
+    @classmethod
+    def invalidate_leases(cls, lease_ids):
+        cls.invalidate_users(Lease.objects.filter(pk__in=set(lease_ids), tenant__user__isnull=False).values_list('tenant__user_id', flat=True))
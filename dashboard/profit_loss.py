@@ -0,0 +1,163 @@
+"""
+Profit and loss aggregates.
+
+Income and expenses are each read with one query grouped by month and
+building (plus payment method for income and category for expenses), so a
+year of activity comes back as a few hundred rows however many payments and
+expenses it holds. summarize() turns those rows into the month, building,
+category and payment method tables the P&L reports render.
+
+Months closed through period_close.py are read from their IncomeSnapshot and
+ExpenseSnapshot rows instead (period_rows()), so only open months are
+aggregated live and back-dated edits cannot change a closed month's figures.
+"""
+import calendar
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncMonth
+from .models import Payment, Expense, AccountingPeriod, IncomeSnapshot, ExpenseSnapshot
+
+
+class ProfitLossService:
+    """Grouped income and expense rows and the P&L summary built from them"""
+
+    @staticmethod
+    def _month(value):
+        # TruncMonth yields a date on DateFields, a datetime on some backends
+        return value.date() if isinstance(value, datetime.datetime) else value
+
+    @classmethod
+    def income_rows(cls, start, end, ranges=None):
+        """Payments between start and end (inclusive) per (month, building, payment method)"""
+        rows = Payment.objects.filter(cls._date_filter('payment_date', ranges or [(start, end)])) \
+            .annotate(period=TruncMonth('payment_date')) \
+            .values('period', 'lease__unit__building_id', 'lease__unit__building__name', 'payment_method') \
+            .annotate(total=Sum('amount'), count=Count('id')).order_by()
+        return [{
+            'period': cls._month(row['period']), 'building_id': row['lease__unit__building_id'],
+            'building_name': row['lease__unit__building__name'], 'payment_method': row['payment_method'],
+            'total': row['total'], 'count': row['count'],
+        } for row in rows]
+
+    @classmethod
+    def expense_rows(cls, start, end, ranges=None):
+        """Expenses between start and end (inclusive) per (month, building, category)"""
+        rows = Expense.objects.filter(cls._date_filter('expense_date', ranges or [(start, end)])) \
+            .annotate(period=TruncMonth('expense_date')) \
+            .values('period', 'building_id', 'building__name', 'category') \
+            .annotate(total=Sum('amount'), count=Count('id')).order_by()
+        return [{
+            'period': cls._month(row['period']), 'building_id': row['building_id'],
+            'building_name': row['building__name'], 'category': row['category'],
+            'total': row['total'], 'count': row['count'],
+        } for row in rows]
+
+    @staticmethod
+    def _date_filter(field, ranges):
+        condition = Q()
+        for first, last in ranges:
+            condition |= Q(**{f'{field}__gte': first, f'{field}__lte': last})
+        return condition
+
+    @classmethod
+    def period_rows(cls, start, end):
+        """
+        (income rows, expense rows) for start..end: closed months come from
+        their snapshots, the remaining days from live grouped queries.
+        """
+        closed_months = AccountingPeriod.closed_months()
+        closed, open_ranges = [], []
+        month = start.replace(day=1)
+        while month <= end:
+            month_end = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+            first, last = max(month, start), min(month_end, end)
+            if (month.year, month.month) in closed_months and (first, last) == (month, month_end):
+                closed.append(month)
+            elif open_ranges and open_ranges[-1][1] + datetime.timedelta(days=1) == first:
+                open_ranges[-1] = (open_ranges[-1][0], last)
+            else:
+                open_ranges.append((first, last))
+            if month_end >= end:
+                break
+            month = month_end + datetime.timedelta(days=1)
+
+        income, expenses = [], []
+        if open_ranges:
+            income += cls.income_rows(start, end, open_ranges)
+            expenses += cls.expense_rows(start, end, open_ranges)
+        if closed:
+            periods = Q()
+            for month in closed:
+                periods |= Q(period__year=month.year, period__month=month.month)
+            for row in IncomeSnapshot.objects.filter(periods).values(
+                    'period__year', 'period__month', 'building_id', 'building_name', 'payment_method', 'total', 'count'):
+                income.append(cls._snapshot_row(row, payment_method=row['payment_method']))
+            for row in ExpenseSnapshot.objects.filter(periods).values(
+                    'period__year', 'period__month', 'building_id', 'building_name', 'category', 'total', 'count'):
+                expenses.append(cls._snapshot_row(row, category=row['category']))
+        return income, expenses
+
+    @staticmethod
+    def _snapshot_row(row, **extra):
+        return dict(extra, period=datetime.date(row['period__year'], row['period__month'], 1),
+                    building_id=row['building_id'], building_name=row['building_name'],
+                    total=row['total'], count=row['count'])
+
+    @staticmethod
+    def _totals(rows, key, labels=None, label_key=None):
+        groups = {}
+        for row in rows:
+            label = row[label_key] if label_key else (labels or {}).get(row[key], row[key])
+            group = groups.setdefault(row[key], {
+                'key': row[key], 'label': label or '-',
+                'total': Decimal('0'), 'count': 0,
+            })
+            group['total'] += row['total']
+            group['count'] += row['count']
+        return sorted(groups.values(), key=lambda group: group['total'], reverse=True)
+
+    @classmethod
+    def summarize(cls, start, end, income_rows, expense_rows):
+        """Month, building, payment method and category tables plus the overall totals"""
+        months = OrderedDict()
+        month = start.replace(day=1)
+        while month <= end:
+            months[month] = {'period': month, 'income': Decimal('0'), 'expenses': Decimal('0')}
+            month += relativedelta(months=1)
+        for row in income_rows:
+            months[row['period']]['income'] += row['total']
+        for row in expense_rows:
+            months[row['period']]['expenses'] += row['total']
+        for month in months.values():
+            month['net'] = month['income'] - month['expenses']
+
+        total_income = sum((row['total'] for row in income_rows), Decimal('0'))
+        total_expenses = sum((row['total'] for row in expense_rows), Decimal('0'))
+        return {
+            'months': list(months.values()),
+            'income_by_building': cls._totals(income_rows, 'building_id', label_key='building_name'),
+            'income_by_method': cls._totals(income_rows, 'payment_method', dict(Payment.PAYMENT_METHOD_CHOICES)),
+            'expenses_by_building': cls._totals(expense_rows, 'building_id', label_key='building_name'),
+            'expenses_by_category': cls._totals(expense_rows, 'category', dict(Expense.EXPENSE_CATEGORY_CHOICES)),
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'net_profit': total_income - total_expenses,
+            'income_count': sum(row['count'] for row in income_rows),
+            'expense_count': sum(row['count'] for row in expense_rows),
+        }
+
+    @classmethod
+    def report(cls, start, end):
+        return cls.summarize(start, end, *cls.period_rows(start, end))
+
+    @classmethod
+    def annual(cls, year):
+        return cls.report(datetime.date(year, 1, 1), datetime.date(year, 12, 31))
+
+    @classmethod
+    def monthly(cls, year, month):
+        start = datetime.date(year, month, 1)
+        return cls.report(start, start + relativedelta(months=1, days=-1))
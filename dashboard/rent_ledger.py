@@ -0,0 +1,77 @@
+"""
+Portfolio-wide expected-versus-paid rent per lease and month.
+
+Lease.get_payment_summary() answers this for one lease with a few queries per
+month. RentLedger answers it for every lease at once: the expected months
+come from each lease's start and end dates, and the paid amounts from a
+single query grouped by lease, payment_for_year and payment_for_month. Cheques
+count as paid by the same rule as the aging report (Payment.received_by).
+"""
+import calendar
+import datetime
+from decimal import Decimal
+from django.db.models import Sum
+from django.utils import timezone
+from .models import Lease, Payment
+
+
+class RentLedger:
+    """Expected and paid rent per (lease, month) for a set of leases"""
+
+    ACTIVE_STATUSES = ('active', 'expiring_soon')
+
+    @staticmethod
+    def lease_months(start_date, end_date, until=None):
+        """
+        (year, month) pairs billed by a lease, optionally stopping after `until`.
+        Matches get_payment_summary(), which adds one month at a time to the
+        start date, so the day of month only ever shrinks (31 -> 28 -> 28 ...).
+        """
+        year, month, day = start_date.year, start_date.month, start_date.day
+        last = (end_date.year, end_date.month, end_date.day)
+        if until:
+            last = min(last, (until.year, until.month, 31))
+        while (year, month, day) <= last:
+            yield year, month
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            day = min(day, calendar.monthrange(year, month)[1])
+
+    @classmethod
+    def paid_amounts(cls, as_of, statuses=ACTIVE_STATUSES):
+        """{(lease_id, year, month): total received by `as_of`} for leases in `statuses`, in one query"""
+        rows = Payment.objects.filter(Payment.received_by(as_of), lease__status__in=statuses).values(
+            'lease_id', 'payment_for_year', 'payment_for_month'
+        ).annotate(total=Sum('amount')).order_by()
+        return {(r['lease_id'], r['payment_for_year'], r['payment_for_month']): r['total'] for r in rows}
+
+    @classmethod
+    def month_rows(cls, until=None, statuses=ACTIVE_STATUSES, as_of=None):
+        """
+        One dict per lease and billed month up to `until` with rent_due,
+        amount_paid and balance, plus the lease fields notifications need.
+        amount_paid counts cheques received by `as_of` (default `until`, else today).
+        """
+        paid = cls.paid_amounts(as_of or until or timezone.now().date(), statuses)
+        leases = Lease.objects.filter(status__in=statuses).values(
+            'id', 'contract_number', 'monthly_rent', 'start_date', 'end_date', 'tenant__user_id'
+        ).order_by('id')
+        for lease in leases:
+            for year, month in cls.lease_months(lease['start_date'], lease['end_date'], until):
+                amount_paid = paid.get((lease['id'], year, month)) or Decimal('0')
+                yield {
+                    'lease_id': lease['id'],
+                    'contract_number': lease['contract_number'],
+                    'tenant_user_id': lease['tenant__user_id'],
+                    'year': year,
+                    'month': month,
+                    'rent_due': lease['monthly_rent'],
+                    'amount_paid': amount_paid,
+                    'balance': lease['monthly_rent'] - amount_paid,
+                }
+
+    @classmethod
+    def arrears(cls, as_of, statuses=ACTIVE_STATUSES):
+        """Rows for months before the month of `as_of` that still have a balance"""
+        first_of_month = as_of.replace(day=1)
+        last_closed = first_of_month - datetime.timedelta(days=1)
+        return [row for row in cls.month_rows(last_closed, statuses, as_of) if row['balance'] > 0]
@@ -0,0 +1,176 @@
+"""
+Rent roll: expected versus collected rent per lease and month.
+
+The whole window is computed from two values_list queries, one for the
+leases and one for the payments grouped by lease and billed month. The
+amounts are loaded into (leases x months) NumPy matrices of integer
+hundredths (baisa-style minor units, so sums stay exact). Totals by month,
+unit and building, collection rates and cumulative arrears are then
+computed with array operations instead of get_payment_summary() per lease.
+"""
+import calendar
+import datetime
+from decimal import Decimal
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+from .models import Lease, Payment
+
+
+class RentRoll:
+    """Builds the rent-roll matrices for a window of months"""
+
+    def __init__(self, start, months=12, as_of=None, building_id=None):
+        self.start = start.replace(day=1)
+        self.months = months
+        self.as_of = as_of or timezone.now().date()
+        self.building_id = building_id
+        self.first_index = self.month_index(self.start)
+        self.month_indexes = np.arange(self.first_index, self.first_index + months)
+        self._load()
+
+    @classmethod
+    def for_year(cls, year, **kwargs):
+        return cls(datetime.date(year, 1, 1), 12, **kwargs)
+
+    @staticmethod
+    def month_index(day):
+        return day.year * 12 + day.month - 1
+
+    @staticmethod
+    def to_cents(value):
+        return int((value or 0) * 100)
+
+    @staticmethod
+    def to_decimal(cents):
+        return Decimal(int(cents)).scaleb(-2)
+
+    @classmethod
+    def last_billed_index(cls, start_date, end_date):
+        """
+        Index of the last month billed by a lease. get_payment_summary() adds one
+        month at a time to the start date, so a start on the 29th-31st drifts
+        down to the shortest month it passes and may bill the end month too.
+        """
+        day = start_date.day
+        if day > 28:
+            year, month = start_date.year, start_date.month
+            while (year, month) < (end_date.year, end_date.month) and day > 28:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                day = min(day, calendar.monthrange(year, month)[1])
+        index = cls.month_index(end_date)
+        return index if day <= end_date.day else index - 1
+
+    def _load(self):
+        last = self.first_index + self.months - 1
+        window_end = datetime.date(last // 12, last % 12 + 1, calendar.monthrange(last // 12, last % 12 + 1)[1])
+        leases = Lease.objects.exclude(status='cancelled').filter(start_date__lte=window_end, end_date__gte=self.start)
+        if self.building_id:
+            leases = leases.filter(unit__building_id=self.building_id)
+        lease_rows = list(leases.order_by('unit__building__name', 'unit__unit_number', 'id').values_list(
+            'id', 'contract_number', 'tenant__name', 'unit_id', 'unit__unit_number',
+            'unit__building_id', 'unit__building__name', 'monthly_rent', 'start_date', 'end_date',
+        ))
+        self.leases = [{
+            'id': row[0], 'contract_number': row[1], 'tenant_name': row[2], 'unit_id': row[3],
+            'unit_number': row[4], 'building_id': row[5], 'building_name': row[6],
+        } for row in lease_rows]
+        count = len(lease_rows)
+        rent = np.array([self.to_cents(row[7]) for row in lease_rows], dtype=np.int64)
+        first = np.array([self.month_index(row[8]) for row in lease_rows], dtype=np.int64)
+        last_billed = np.array([self.last_billed_index(row[8], row[9]) for row in lease_rows], dtype=np.int64)
+        self.unit_ids = np.array([row[3] for row in lease_rows], dtype=np.int64)
+        self.building_ids = np.array([row[5] for row in lease_rows], dtype=np.int64)
+
+        # Expected: the rent in every month between the lease's first and last billed month
+        billed = (self.month_indexes[None, :] >= first[:, None]) & (self.month_indexes[None, :] <= last_billed[:, None])
+        self.expected = billed * rent[:, None]
+
+        # Collected: payments received by as_of summed by the month they pay for, scattered into the matrix
+        self.collected = np.zeros((count, self.months), dtype=np.int64)
+        payments = Payment.objects.filter(Payment.received_by(self.as_of), lease__in=leases.values('id'), payment_for_year__gte=self.start.year,
+                                          payment_for_year__lte=last // 12) \
+            .values_list('lease_id', 'payment_for_year', 'payment_for_month').annotate(total=Sum('amount')).order_by()
+        payment_rows = list(payments)
+        if payment_rows and count:
+            position = {lease['id']: i for i, lease in enumerate(self.leases)}
+            lease_idx = np.array([position[row[0]] for row in payment_rows], dtype=np.int64)
+            month_idx = np.array([row[1] * 12 + row[2] - 1 for row in payment_rows], dtype=np.int64) - self.first_index
+            amounts = np.array([self.to_cents(row[3]) for row in payment_rows], dtype=np.int64)
+            inside = (month_idx >= 0) & (month_idx < self.months)
+            np.add.at(self.collected, (lease_idx[inside], month_idx[inside]), amounts[inside])
+
+        # Only months that have started can be in arrears
+        self.due = self.month_indexes <= self.month_index(self.as_of)
+        due = self.due[None, :]
+        self.shortfall = (self.expected - self.collected) * due
+        self.lease_expected = self.expected.sum(axis=1)
+        self.lease_collected = self.collected.sum(axis=1)
+        self.lease_due_expected = (self.expected * due).sum(axis=1)
+        self.lease_due_collected = (self.collected * due).sum(axis=1)
+
+    def _group(self, keys):
+        """Sum the per-lease totals of the lease rows sharing a key"""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sums = [
+            np.bincount(inverse, weights=values, minlength=len(unique)).round().astype(np.int64)
+            for values in (self.lease_expected, self.lease_collected, self.lease_due_expected, self.lease_due_collected)
+        ]
+        return unique, sums
+
+    def _summary(self, expected, collected, due_expected, due_collected):
+        return {
+            'expected': self.to_decimal(expected),
+            'collected': self.to_decimal(collected),
+            'variance': self.to_decimal(collected - expected),
+            'arrears': self.to_decimal(due_expected - due_collected),
+            'collection_rate': round(float(due_collected / due_expected * 100), 1) if due_expected else None,
+        }
+
+    def by_month(self):
+        expected = self.expected.sum(axis=0)
+        collected = self.collected.sum(axis=0)
+        cumulative = np.cumsum(self.shortfall.sum(axis=0))
+        rows = []
+        for i, index in enumerate(self.month_indexes):
+            rows.append({
+                'year': int(index // 12), 'month': int(index % 12 + 1), 'is_due': bool(self.due[i]),
+                'expected': self.to_decimal(expected[i]),
+                'collected': self.to_decimal(collected[i]),
+                'variance': self.to_decimal(collected[i] - expected[i]),
+                'collection_rate': round(float(collected[i] / expected[i] * 100), 1) if expected[i] else None,
+                'cumulative_arrears': self.to_decimal(cumulative[i]),
+            })
+        return rows
+
+    def _by(self, keys, label):
+        unique, sums = self._group(keys)
+        first_row = {}
+        for i, key in enumerate(keys.tolist()):
+            first_row.setdefault(key, i)
+        groups = sorted(enumerate(unique.tolist()), key=lambda item: first_row[item[1]])
+        return [{
+            **label(self.leases[first_row[key]]),
+            **self._summary(*(values[g] for values in sums)),
+        } for g, key in groups]
+
+    def by_building(self):
+        return self._by(self.building_ids, lambda lease: {'building_id': lease['building_id'], 'building_name': lease['building_name']})
+
+    def by_unit(self):
+        return self._by(self.unit_ids, lambda lease: {
+            'unit_id': lease['unit_id'], 'unit_number': lease['unit_number'], 'building_name': lease['building_name'],
+        })
+
+    def by_lease(self):
+        """Per-lease rows with the monthly collected amounts, for the Excel export"""
+        return [{
+            **lease,
+            'monthly_collected': [self.to_decimal(v) for v in self.collected[i]],
+            **self._summary(self.lease_expected[i], self.lease_collected[i], self.lease_due_expected[i], self.lease_due_collected[i]),
+        } for i, lease in enumerate(self.leases)]
+
+    def totals(self):
+        return self._summary(
+            self.lease_expected.sum(), self.lease_collected.sum(), self.lease_due_expected.sum(), self.lease_due_collected.sum()
+        )
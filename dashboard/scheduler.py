@@ -0,0 +1,203 @@
+"""
+In-project periodic job scheduler.
+
+Jobs are registered with a five-field cron expression (minute hour
+day-of-month month day-of-week) and executed by the run_scheduler management
+command. Before running, a process takes the job's JobLock row with a
+conditional UPDATE, so several web or worker processes can run the scheduler
+and a job still executes only once per slot. Every execution is recorded in
+JobRun with its duration, rows affected and error.
+"""
+import datetime
+import logging
+import os
+import socket
+import time
+import traceback
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import JobLock, JobRun
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """Five-field cron expression supporting *, */n, a-b, a-b/n and comma lists"""
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 6))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Invalid cron expression: {expression!r}")
+        self.expression = expression
+        values = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            values[name] = self._parse(part, low, high)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            sorted(values['minute']), sorted(values['hour']), values['day'], values['month'], values['weekday']
+        )
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+
+    @staticmethod
+    def _parse(part, low, high):
+        # cron allows 7 for Sunday
+        top = 7 if high == 6 else high
+        result = set()
+        for item in part.split(','):
+            step = 1
+            if '/' in item:
+                item, step = item.split('/')
+                step = int(step)
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = (int(v) for v in item.split('-'))
+            else:
+                start = end = int(item)
+            if start < low or end > top or step < 1:
+                raise ValueError(f"Cron field {part!r} out of range {low}-{high}")
+            result.update(range(start, end + 1, step))
+        return {0 if high == 6 and v == 7 else v for v in result}
+
+    def _matches_day(self, day):
+        # Python: Monday=0; cron: Sunday=0
+        weekday = (day.weekday() + 1) % 7
+        if day.month not in self.months:
+            return False
+        if self.day_restricted and self.weekday_restricted:
+            return day.day in self.days or weekday in self.weekdays
+        return day.day in self.days and weekday in self.weekdays
+
+    def previous_run(self, now):
+        """Latest scheduled minute at or before `now`, or None within the last year"""
+        now = now.replace(second=0, microsecond=0)
+        for offset in range(367):
+            day = now.date() - datetime.timedelta(days=offset)
+            if not self._matches_day(day):
+                continue
+            for hour in reversed(self.hours):
+                if offset == 0 and hour > now.hour:
+                    continue
+                for minute in reversed(self.minutes):
+                    if offset == 0 and hour == now.hour and minute > now.minute:
+                        continue
+                    return now.replace(year=day.year, month=day.month, day=day.day, hour=hour, minute=minute)
+        return None
+
+    def next_run(self, now):
+        """Earliest scheduled minute after `now`"""
+        now = now.replace(second=0, microsecond=0)
+        for offset in range(367):
+            day = now.date() + datetime.timedelta(days=offset)
+            if not self._matches_day(day):
+                continue
+            for hour in self.hours:
+                if offset == 0 and hour < now.hour:
+                    continue
+                for minute in self.minutes:
+                    if offset == 0 and (hour, minute) <= (now.hour, now.minute):
+                        continue
+                    return now.replace(year=day.year, month=day.month, day=day.day, hour=hour, minute=minute)
+        return None
+
+
+class ScheduledJob:
+    def __init__(self, name, schedule, func, description='', lock_seconds=3600):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+        self.description = description
+        self.lock_seconds = lock_seconds
+
+
+class JobScheduler:
+    """Registry of scheduled jobs and the logic that runs them once per slot"""
+
+    jobs = {}
+
+    @classmethod
+    def register(cls, name, schedule, description='', lock_seconds=3600):
+        """Decorator registering a function returning the number of affected rows (or None)"""
+        def decorator(func):
+            cls.jobs[name] = ScheduledJob(name, schedule, func, description, lock_seconds)
+            return func
+        return decorator
+
+    @classmethod
+    def owner_id(cls):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def acquire_lock(cls, name, seconds):
+        """Take the job's lock row; True only for the one process that wins"""
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                JobLock.objects.get_or_create(name=name, defaults={'locked_until': now - datetime.timedelta(seconds=1)})
+        except IntegrityError:
+            # Another process created the row at the same moment
+            pass
+        acquired = JobLock.objects.filter(name=name, locked_until__lt=now).update(
+            owner=cls.owner_id(), locked_until=now + datetime.timedelta(seconds=seconds)
+        )
+        return acquired == 1
+
+    @classmethod
+    def release_lock(cls, name):
+        JobLock.objects.filter(name=name, owner=cls.owner_id()).update(locked_until=timezone.now())
+
+    @classmethod
+    def last_run_started(cls, name):
+        return JobRun.objects.filter(job_name=name).order_by('-started_at').values_list('started_at', flat=True).first()
+
+    @classmethod
+    def is_due(cls, job, now):
+        scheduled = job.schedule.previous_run(now)
+        if scheduled is None:
+            return False
+        last_started = cls.last_run_started(job.name)
+        return last_started is None or last_started < scheduled
+
+    @classmethod
+    def run_job(cls, job, now=None, force=False):
+        """
+        Run one job under its lock and record the outcome. Returns the JobRun,
+        or None when another process holds the lock or already ran this slot.
+        """
+        if not cls.acquire_lock(job.name, job.lock_seconds):
+            logger.info(f"Job {job.name} is already running elsewhere")
+            return None
+        if not force and not cls.is_due(job, now or timezone.localtime()):
+            # Another process finished this slot between our check and the lock
+            cls.release_lock(job.name)
+            return None
+        run = JobRun.objects.create(job_name=job.name, started_at=timezone.now(), host=cls.owner_id())
+        started = time.monotonic()
+        try:
+            rows = job.func()
+            run.status = 'success'
+            run.rows_affected = rows if isinstance(rows, int) else None
+        except Exception as e:
+            logger.error(f"Scheduled job {job.name} failed: {str(e)}")
+            run.status = 'failed'
+            run.error = traceback.format_exc()
+        finally:
+            run.finished_at = timezone.now()
+            run.duration = round(time.monotonic() - started, 3)
+            run.save()
+            cls.release_lock(job.name)
+        return run
+
+    @classmethod
+    def run_pending(cls, now=None):
+        """Run every job whose latest scheduled slot has not been run yet"""
+        now = now or timezone.localtime()
+        runs = []
+        for job in cls.jobs.values():
+            if cls.is_due(job, now):
+                run = cls.run_job(job, now)
+                if run:
+                    runs.append(run)
+        return runs
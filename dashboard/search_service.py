@@ -0,0 +1,284 @@
+"""
+Search index service for tenants, leases, units, buildings and invoices.
+
+Every searchable record gets one SearchEntry row holding normalized Arabic
+and English tokens. On SQLite the rows are mirrored into an FTS5 table and on
+MySQL they carry a FULLTEXT index (see migration 0023), so list-view searches
+become an index lookup ranked by relevance instead of OR-ed icontains scans.
+
+MySQL's FULLTEXT parser drops words shorter than innodb_ft_min_token_size (3)
+and its stopwords, so those query words are matched with LIKE on the rows the
+remaining words select. Phone numbers are also matched as substrings, as the
+old tenant search did, because people type the middle or the end of a number.
+"""
+import re
+import logging
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Case, When, IntegerField, Q
+from .models import SearchEntry, Tenant, Lease, Unit, Building, Invoice
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'dashboard_searchentry_fts'
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه', 'ى': 'ي', 'ؤ': 'و', 'ئ': 'ي',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+})
+NON_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+MYSQL_MIN_TOKEN_SIZE = 3
+# InnoDB's default FULLTEXT stopword list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+MYSQL_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in',
+    'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'will', 'with', 'und', 'www',
+))
+
+
+def normalize_text(text):
+    """Fold Arabic spelling variants and case so that indexed text and queries match"""
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS.sub('', str(text))
+    text = text.translate(ARABIC_LETTER_MAP).casefold()
+    return ' '.join(NON_WORD.sub(' ', text).split())
+
+
+def tokenize(text):
+    return normalize_text(text).replace('_', ' ').split()
+
+
+def _translated(instance, field):
+    """Return the Arabic and English values that modeltranslation stores for a field"""
+    return [getattr(instance, f"{field}_ar", None), getattr(instance, f"{field}_en", None), getattr(instance, field, None)]
+
+
+def _tenant_values(tenant):
+    return _translated(tenant, 'name') + _translated(tenant, 'authorized_signatory') + [tenant.phone, tenant.email]
+
+
+def _building_values(building):
+    return _translated(building, 'name') + _translated(building, 'address')
+
+
+def _unit_values(unit):
+    return [unit.unit_number, unit.get_unit_type_display()] + _translated(unit.building, 'name')
+
+
+def _lease_values(lease):
+    return [lease.contract_number, lease.contract_form_number, lease.electricity_meter, lease.water_meter] \
+        + _translated(lease.tenant, 'name') + _unit_values(lease.unit)
+
+
+def _invoice_values(invoice):
+    values = [invoice.invoice_number] + _translated(invoice.tenant, 'name')
+    if invoice.lease_id:
+        values.append(invoice.lease.contract_number)
+    return values
+
+
+class SearchService:
+    """Keeps the search index in sync and answers ranked searches"""
+
+    # model -> (values builder, select_related for bulk indexing)
+    INDEXED_MODELS = {
+        Tenant: (_tenant_values, ()),
+        Building: (_building_values, ()),
+        Unit: (_unit_values, ('building',)),
+        Lease: (_lease_values, ('tenant', 'unit', 'unit__building')),
+        Invoice: (_invoice_values, ('tenant', 'lease')),
+    }
+    # model -> fields also matched as substrings of the query with its spaces removed
+    SUBSTRING_FIELDS = {
+        Tenant: ('phone',),
+    }
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def is_indexed(cls, model):
+        return model in cls.INDEXED_MODELS
+
+    @classmethod
+    def build_content(cls, instance):
+        values_builder, _ = cls.INDEXED_MODELS[type(instance)]
+        return cls.join_tokens(values_builder(instance))
+
+    @staticmethod
+    def join_tokens(values):
+        tokens = []
+        for value in values:
+            for token in tokenize(value):
+                if token not in tokens:
+                    tokens.append(token)
+        return ' '.join(tokens)
+
+    @classmethod
+    def index_instance(cls, instance):
+        """Create or refresh the index entry of a single record"""
+        content_type = ContentType.objects.get_for_model(type(instance))
+        SearchEntry.objects.update_or_create(
+            content_type=content_type, object_id=instance.pk,
+            defaults={'content': cls.build_content(instance)}
+        )
+
+    @classmethod
+    def remove_instance(cls, instance):
+        content_type = ContentType.objects.get_for_model(type(instance))
+        SearchEntry.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+
+    @classmethod
+    def index_queryset(cls, queryset):
+        """Re-index a queryset in batches using bulk writes. Returns the number of indexed rows."""
+        model = queryset.model
+        _, select_related = cls.INDEXED_MODELS[model]
+        content_type = ContentType.objects.get_for_model(model)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        count = 0
+        batch = []
+        for instance in queryset.order_by('pk').iterator(chunk_size=cls.BATCH_SIZE):
+            batch.append(SearchEntry(content_type=content_type, object_id=instance.pk, content=cls.build_content(instance)))
+            if len(batch) >= cls.BATCH_SIZE:
+                count += cls._replace_entries(content_type, batch)
+                batch = []
+        if batch:
+            count += cls._replace_entries(content_type, batch)
+        return count
+
+    @classmethod
+    def _replace_entries(cls, content_type, entries):
+        with transaction.atomic():
+            SearchEntry.objects.filter(content_type=content_type, object_id__in=[e.object_id for e in entries]).delete()
+            SearchEntry.objects.bulk_create(entries)
+        return len(entries)
+
+    @classmethod
+    def index_related(cls, instance):
+        """Refresh entries whose content embeds values of the given record"""
+        if isinstance(instance, Tenant):
+            cls.index_queryset(Lease.objects.filter(tenant=instance))
+            cls.index_queryset(Invoice.objects.filter(tenant=instance))
+        elif isinstance(instance, Building):
+            cls.index_queryset(Unit.objects.filter(building=instance))
+            cls.index_queryset(Lease.objects.filter(unit__building=instance))
+        elif isinstance(instance, Unit):
+            cls.index_queryset(Lease.objects.filter(unit=instance))
+        elif isinstance(instance, Lease):
+            cls.index_queryset(Invoice.objects.filter(lease=instance))
+
+    @classmethod
+    def rebuild(cls, models=None):
+        """Drop and rebuild the index for the given models (all indexed models by default)"""
+        counts = {}
+        for model in models or cls.INDEXED_MODELS:
+            content_type = ContentType.objects.get_for_model(model)
+            SearchEntry.objects.filter(content_type=content_type).delete()
+            counts[model._meta.model_name] = cls.index_queryset(model.objects.all())
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+        return counts
+
+    @staticmethod
+    def result_limit():
+        return getattr(settings, 'SEARCH_RESULT_LIMIT', 500)
+
+    @classmethod
+    def search_ids(cls, model, query, limit=None):
+        """Return primary keys of `model` matching `query`, best match first"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        limit = limit or cls.result_limit()
+        content_type = ContentType.objects.get_for_model(model)
+        ids = None
+        try:
+            if connection.vendor == 'sqlite':
+                ids = cls._search_sqlite(content_type, tokens, limit)
+            elif connection.vendor == 'mysql':
+                ids = cls._search_mysql(content_type, tokens, limit)
+        except Exception as e:
+            logger.error(f"Full-text search failed, falling back to a table scan: {str(e)}")
+        if ids is None:
+            ids = cls._search_fallback(content_type, tokens, limit)
+        return ids + cls._search_substrings(model, tokens, ids, limit)
+
+    @classmethod
+    def _search_sqlite(cls, content_type, tokens, limit):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT e.object_id FROM {FTS_TABLE} f "
+                f"JOIN dashboard_searchentry e ON e.id = f.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND e.content_type_id = %s "
+                f"ORDER BY bm25({FTS_TABLE}) LIMIT %s",
+                [match, content_type.pk, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def _search_mysql(cls, content_type, tokens, limit):
+        indexed = [token for token in tokens if len(token) >= MYSQL_MIN_TOKEN_SIZE and token not in MYSQL_STOPWORDS]
+        if not indexed:
+            return cls._search_fallback(content_type, tokens, limit)
+        # Tokens never contain LIKE wildcards: tokenize() splits on everything but letters and digits
+        unindexed = [token for token in tokens if token not in indexed]
+        match = ' '.join(f'+{token}*' for token in indexed)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT object_id FROM dashboard_searchentry "
+                "WHERE content_type_id = %s AND MATCH(content) AGAINST (%s IN BOOLEAN MODE) "
+                + "AND content LIKE %s " * len(unindexed) +
+                "ORDER BY MATCH(content) AGAINST (%s IN BOOLEAN MODE) DESC LIMIT %s",
+                [content_type.pk, match, *[f'%{token}%' for token in unindexed], match, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def _search_fallback(cls, content_type, tokens, limit):
+        entries = SearchEntry.objects.filter(content_type=content_type)
+        for token in tokens:
+            entries = entries.filter(content__icontains=token)
+        return list(entries.values_list('object_id', flat=True)[:limit])
+
+    @classmethod
+    def _search_substrings(cls, model, tokens, found, limit):
+        """Rows whose SUBSTRING_FIELDS contain the query, ranked after the index matches"""
+        fields = cls.SUBSTRING_FIELDS.get(model)
+        if not fields or len(found) >= limit:
+            return []
+        needle = ''.join(tokens)
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': needle})
+        return list(model.objects.filter(condition).exclude(pk__in=found).order_by('pk')
+                    .values_list('pk', flat=True)[:limit - len(found)])
+
+    @classmethod
+    def search(cls, queryset, query):
+        """
+        Restrict a queryset to search matches ordered by relevance. Returns
+        (queryset, truncated); truncated is True when more than
+        SEARCH_RESULT_LIMIT records matched and only the best ones were kept.
+        """
+        limit = cls.result_limit()
+        ids = cls.search_ids(queryset.model, query, limit + 1)
+        truncated = len(ids) > limit
+        ids = ids[:limit]
+        if not ids:
+            return queryset.none(), truncated
+        ranking = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+        return queryset.filter(pk__in=ids).order_by(ranking), truncated
+
+    @classmethod
+    def filter_queryset(cls, queryset, query):
+        """Restrict a queryset to search matches and order it by relevance"""
+        return cls.search(queryset, query)[0]
@@ -1,48 +1,141 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
-from .models import Tenant, MaintenanceRequest, Lease, Notification, Building, Expense
+from .models import Tenant, MaintenanceRequest, Lease, Notification, Building, Expense, Invoice, InvoiceItem, Payment, Document
 from .utils import auto_translate_to_english
+from .search_service import SearchService
+from .tenant_accounts import TenantAccountService
+from .portal_snapshot import PortalSnapshotService
+from .notification_service import NotificationService
+from .live_events import LiveEventBroker
+from .building_pl import BuildingProfitLoss
+from .change_feed import ChangeFeed
 
 @receiver(post_save, sender=Tenant)
-def create_tenant_user_account(sender, instance, created, **kwargs):
-    if created and not instance.user:
-        if instance.email:
-            username = instance.email.split('@')[0]
-        else:
-            username = f"user_{instance.phone}"
-        if User.objects.filter(username=username).exists():
-            username = f"{username}_{instance.id}"
-        user = User.objects.create_user(username=username, email=instance.email, password=instance.phone)
-        user.first_name = instance.name
-        user.save()
-        instance.user = user
-        instance.save()
+def create_tenant_user_account(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.user_id:
+        TenantAccountService.provision([instance])
 
 @receiver(post_save, sender=MaintenanceRequest)
 def maintenance_request_notification(sender, instance, created, **kwargs):
     if created:
         message = _("'تم تقديم طلب صيانة جديد بعنوان {} من قبل المستأجر {}'").format(instance.title, instance.lease.tenant.name)
-        staff_users = User.objects.filter(is_staff=True)
-        for user in staff_users:
-            Notification.objects.create(user=user, message=message, related_object=instance)
+        staff_ids = User.objects.filter(is_staff=True).values_list('id', flat=True)
+        NotificationService.notify(staff_ids, message, f"maintenance:{instance.pk}:created", instance)
     else:
         try:
             old_instance = MaintenanceRequest.objects.get(pk=instance.pk)
             if old_instance.status != instance.status:
                 message = _("'تم تحديث حالة طلب الصيانة {} إلى {}'").format(instance.title, instance.get_status_display())
-                if instance.lease.tenant.user:
-                    Notification.objects.create(user=instance.lease.tenant.user, message=message, related_object=instance)
+                NotificationService.notify([instance.lease.tenant.user_id], message, related_object=instance)
         except MaintenanceRequest.DoesNotExist:
             pass
 
 @receiver(post_save, sender=Lease)
 def lease_status_notification(sender, instance, **kwargs):
-    if instance.status == 'expiring_soon' and instance.tenant.user:
+    if instance.status == 'expiring_soon' and instance.tenant.user_id:
         message = _("'عقد الإيجار الخاص بك رقم {} سينتهي قريب في تاريخ {}'").format(instance.contract_number, instance.end_date.strftime('%Y-%m-%d'))
-        if not Notification.objects.filter(user=instance.tenant.user, message=message).exists():
-            Notification.objects.create(user=instance.tenant.user, message=message, related_object=instance)
+        dedupe_key = f"lease:{instance.pk}:expiring:{instance.end_date.strftime('%Y-%m')}"
+        NotificationService.notify([instance.tenant.user_id], message, dedupe_key, instance)
+
+
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def update_invoice_total(sender, instance, **kwargs):
+    # An item moved to another invoice changes the total of the one it left as well
+    Invoice.recalculate_totals({instance.invoice_id, instance.get_loaded_value('invoice')} - {None})
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_portal_snapshot(sender, instance, **kwargs):
+    # Relinking the tenant to another account changes both users' portal
+    PortalSnapshotService.invalidate_users([instance.user_id, instance.get_loaded_value('user')])
+
+
+@receiver(post_save, sender=Lease)
+@receiver(post_delete, sender=Lease)
+def invalidate_lease_portal_snapshot(sender, instance, **kwargs):
+    PortalSnapshotService.invalidate_tenants([instance.tenant_id, instance.get_loaded_value('tenant')])
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+@receiver(post_save, sender=MaintenanceRequest)
+@receiver(post_delete, sender=MaintenanceRequest)
+def invalidate_related_portal_snapshot(sender, instance, **kwargs):
+    PortalSnapshotService.invalidate_leases([instance.lease_id])
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_counters(sender, instance, **kwargs):
+    # Single saves and deletes (admin, shell); notify() and the inbox keep the counters in step themselves
+    NotificationService.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_building_pl(sender, instance, **kwargs):
+    BuildingProfitLoss.invalidate(instance.payment_date, instance.get_loaded_value('payment_date'))
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def invalidate_expense_building_pl(sender, instance, **kwargs):
+    BuildingProfitLoss.invalidate(instance.expense_date, instance.get_loaded_value('expense_date'))
+
+
+@receiver(pre_delete, sender=Payment)
+@receiver(pre_delete, sender=Expense)
+def protect_closed_period(sender, instance, **kwargs):
+    # Also reached through cascades (lease, building), which it aborts
+    instance.check_period_open(deleting=True)
+
+
+@receiver(post_save, sender=Payment)
+def publish_payment_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        LiveEventBroker.publish_on_commit('payment', {
+            'id': instance.pk, 'amount': instance.amount, 'payment_date': instance.payment_date,
+            'tenant': instance.lease.tenant.name, 'contract_number': instance.lease.contract_number,
+        })
+
+
+@receiver(post_save, sender=Expense)
+def publish_expense_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        LiveEventBroker.publish_on_commit('expense', {
+            'id': instance.pk, 'amount': instance.amount, 'expense_date': instance.expense_date,
+            'description': instance.description, 'category': instance.get_category_display(),
+        })
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+def publish_maintenance_event(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        LiveEventBroker.publish_on_commit('maintenance', {
+            'id': instance.pk, 'title': instance.title, 'created': created,
+            'status': instance.status, 'status_display': str(instance.get_status_display()),
+        })
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, created, raw=False, **kwargs):
+    if raw or not SearchService.is_indexed(sender):
+        return
+    SearchService.index_instance(instance)
+    if not created:
+        SearchService.index_related(instance)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    if SearchService.is_indexed(sender):
+        SearchService.remove_instance(instance)
 
 
 @receiver(pre_save, sender=Building)
@@ -67,4 +160,14 @@ def auto_translate_tenant(sender, instance, **kwargs):
 @receiver(pre_save, sender=Expense)
 def auto_translate_expense(sender, instance, **kwargs):
     if instance.description_ar and not instance.description_en:
-        instance.description_en = auto_translate_to_english(instance.description_ar)
\ No newline at end of file
+        instance.description_en = auto_translate_to_english(instance.description_ar)
+
+
+@receiver(post_delete, sender=Tenant)
+@receiver(post_delete, sender=Lease)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=MaintenanceRequest)
+def record_change_tombstone(sender, instance, **kwargs):
+    ChangeFeed.record_deletion(instance)
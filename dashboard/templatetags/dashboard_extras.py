@@ -1,5 +1,6 @@
 from django import template
 from dashboard.models import Company
+from dashboard.notification_service import NotificationService
 
 register = template.Library()
 
@@ -11,4 +12,15 @@ def get_company_name():
 @register.simple_tag
 def get_company_logo():
     company = Company.objects.first()
-    return company.logo.url if company and company.logo else None
\ No newline at end of file
+    return company.logo.url if company and company.logo else None
+
+@register.simple_tag(takes_context=True)
+def unread_notification_count(context):
+    user = context['request'].user
+    return NotificationService.unread_count(user) if user.is_authenticated else 0
+
+@register.simple_tag(takes_context=True)
+def latest_notification_id(context):
+    """Where the page's long poll starts waiting, so loading a page asks the server nothing"""
+    user = context['request'].user
+    return NotificationService.latest_id(user) if user.is_authenticated else 0
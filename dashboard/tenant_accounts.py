@@ -0,0 +1,107 @@
+"""
+Tenant portal account provisioning.
+
+Accounts are created with unusable passwords (no PBKDF2 hashing) in bulk and
+linked to their tenants with a single UPDATE. Tenants activate them through
+the OTP login flow, which finds the user by the phone number stored on the
+UserProfile created here.
+"""
+import re
+import logging
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, When, Value, IntegerField
+from django.utils import timezone
+from .models import Tenant, UserProfile
+
+logger = logging.getLogger(__name__)
+
+OMAN_PHONE = re.compile(r'^\+968\d{8}$')
+
+
+class TenantAccountService:
+    """Creates and links portal user accounts for tenants"""
+
+    BATCH_SIZE = 500
+
+    @classmethod
+    def normalize_phone(cls, phone):
+        """Return the phone in +968XXXXXXXX form used by OTP login, or None"""
+        digits = re.sub(r'[^\d+]', '', phone or '')
+        if digits.startswith('00968'):
+            digits = '+' + digits[2:]
+        elif digits.startswith('968') and len(digits) == 11:
+            digits = '+' + digits
+        elif len(digits) == 8 and digits.isdigit():
+            digits = '+968' + digits
+        return digits if OMAN_PHONE.match(digits) else None
+
+    @classmethod
+    def base_username(cls, tenant):
+        if tenant.email:
+            return tenant.email.split('@')[0]
+        return f"user_{tenant.phone}"
+
+    @classmethod
+    def provision(cls, tenants):
+        """
+        Create portal accounts for the given tenants that don't have one yet.
+        Returns the number of accounts created.
+        """
+        tenants = [tenant for tenant in tenants if tenant.pk and not tenant.user_id]
+        created = 0
+        for start in range(0, len(tenants), cls.BATCH_SIZE):
+            created += cls._provision_batch(tenants[start:start + cls.BATCH_SIZE])
+        return created
+
+    @classmethod
+    def provision_missing(cls):
+        """Provision every tenant without an account, e.g. after a bulk import"""
+        return cls.provision(Tenant.objects.filter(user__isnull=True).only('id', 'name', 'phone', 'email', 'user'))
+
+    @classmethod
+    def _provision_batch(cls, tenants):
+        if not tenants:
+            return 0
+        base_names = {tenant.pk: cls.base_username(tenant) for tenant in tenants}
+        taken = set(User.objects.filter(username__in=base_names.values()).values_list('username', flat=True))
+
+        usernames = {}
+        users = []
+        for tenant in tenants:
+            username = base_names[tenant.pk]
+            if username in taken:
+                username = f"{username}_{tenant.pk}"
+            taken.add(username)
+            usernames[tenant.pk] = username
+            user = User(username=username, email=tenant.email or '', first_name=tenant.name[:150])
+            user.set_unusable_password()
+            users.append(user)
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # bulk_create does not return primary keys on every backend
+            user_ids = dict(User.objects.filter(username__in=usernames.values()).values_list('username', 'id'))
+
+            phones = {tenant.pk: cls.normalize_phone(tenant.phone) for tenant in tenants}
+            used_phones = set(UserProfile.objects.filter(phone_number__in=[p for p in phones.values() if p]).values_list('phone_number', flat=True))
+            profiles = []
+            for tenant in tenants:
+                phone = phones[tenant.pk]
+                if phone and phone not in used_phones:
+                    used_phones.add(phone)
+                else:
+                    if phone:
+                        logger.warning(f"Phone {phone} already belongs to another account; tenant {tenant.pk} must set up OTP manually")
+                    phone = None
+                profiles.append(UserProfile(user_id=user_ids[usernames[tenant.pk]], phone_number=phone))
+            UserProfile.objects.bulk_create(profiles)
+
+            Tenant.objects.filter(pk__in=usernames).update(user=Case(
+                *[When(pk=pk, then=Value(user_ids[username])) for pk, username in usernames.items()],
+                output_field=IntegerField(),
+            ), updated_at=timezone.now(), change_seq=Tenant.sequence_case(usernames))
+
+        for tenant in tenants:
+            tenant.user_id = user_ids[usernames[tenant.pk]]
+        return len(users)
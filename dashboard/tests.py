@@ -1,3 +1,775 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.signals import post_save
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic import View
+from .models import (
+    CHANGE_SEQUENCE, AccountingPeriod, Building, Unit, Tenant, Lease, Payment, Expense, Invoice, InvoiceItem, NumberSequence,
+    SearchEntry, Notification, DashboardEvent, JobLock, JobRun,
+)
+from .notification_service import NotificationService
+from .aging import AgingReport
+from .building_pl import BuildingProfitLoss
+from .change_feed import ChangeFeed
+from .jobs import send_lease_notifications, send_payment_reminders
+from .checks import check_live_events_backend
+from .conditional import ConditionalGetMixin
+from .cheque_service import ChequeService
+from .lease_renewal import LeaseRenewalService
+from .live_events import LiveEventBroker
+from .pagination import encode_cursor
+from .portal_snapshot import PortalSnapshotService
+from .rent_ledger import RentLedger
+from .rent_roll import RentRoll
+from .scheduler import CronSchedule, JobScheduler, ScheduledJob
+from .payment_import import PaymentImportService
+from .search_service import SearchService
+from .views import LeaseListView
 
-# Create your tests here.
+# The pre_save receivers translate names through an online service
+_translate = mock.patch('dashboard.signals.auto_translate_to_english', side_effect=lambda text: text)
+
+
+def setUpModule():
+    _translate.start()
+
+
+def tearDownModule():
+    _translate.stop()
+
+
+def run_data_migration(name, function):
+    """Call a data migration's function with the historical models it runs against"""
+    state = MigrationExecutor(connection).loader.project_state(('dashboard', name), at_end=False)
+    getattr(importlib.import_module(f'dashboard.migrations.{name}'), function)(state.apps, None)
+
+
+class RentalFixture:
+    """One building, unit, tenant and 2026 lease at 100 a month, plus a staff client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.building = Building.objects.create(name='B1', address='x')
+        cls.unit = Unit.objects.create(building=cls.building, unit_number='12', unit_type='shop', floor=1)
+        cls.tenant = Tenant.objects.create(name='Ahmed', tenant_type='individual', phone='99999999')
+        cls.lease = Lease.objects.create(
+            unit=cls.unit, tenant=cls.tenant, contract_number='C1', monthly_rent=Decimal('100'),
+            start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 12, 31),
+        )
+        cls.staff = User.objects.create(username='staff', is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        # The development cache is process memory and outlives each test's rollback
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def pay(self, amount, day, **kwargs):
+        return Payment.objects.create(
+            lease=kwargs.pop('lease', self.lease), amount=Decimal(amount), payment_date=day,
+            payment_for_month=day.month, payment_for_year=day.year, payment_method=kwargs.pop('payment_method', 'cash'), **kwargs
+        )
+
+
+class InvoiceTotalTests(RentalFixture, TestCase):
+    def make_invoice(self, number):
+        return Invoice.objects.create(tenant=self.tenant, lease=self.lease, invoice_number=number, due_date=datetime.date(2026, 2, 1))
+
+    def test_total_follows_item_changes(self):
+        invoice = self.make_invoice('INV-1')
+        item = InvoiceItem.objects.create(invoice=invoice, description='rent', amount=Decimal('100'))
+        InvoiceItem.objects.create(invoice=invoice, description='fee', amount=Decimal('5'))
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total, Decimal('105'))
+        item.delete()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total, Decimal('5'))
+
+    def test_moving_an_item_updates_both_invoices(self):
+        first, second = self.make_invoice('INV-1'), self.make_invoice('INV-2')
+        item = InvoiceItem.objects.create(invoice=first, description='rent', amount=Decimal('100'))
+        item = InvoiceItem.objects.get(pk=item.pk)
+        item.invoice = second
+        item.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.total, Decimal('0'))
+        self.assertEqual(second.total, Decimal('100'))
+
+    def test_amount_filter_rejects_non_finite_values(self):
+        self.make_invoice('INV-1')
+        for value in ('NaN', 'Infinity', '-inf', 'abc'):
+            response = self.client.get(reverse('invoice_list'), {'min_amount': value})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['invoices']), 1)
+        response = self.client.get(reverse('invoice_list'), {'min_amount': '50'})
+        self.assertEqual(len(response.context['invoices']), 0)
+
+
+class SearchTests(RentalFixture, TestCase):
+    def search_tenants(self, query):
+        response = self.client.get(reverse('tenant_list'), {'q': query})
+        return response, [tenant.name for tenant in response.context['tenants']]
+
+    def test_phone_numbers_match_anywhere(self):
+        Tenant.objects.create(name='Salem', tenant_type='individual', phone='+96522345678')
+        self.assertEqual(self.search_tenants('5678')[1], ['Salem'])
+        self.assertEqual(self.search_tenants('٢٢٣٤٥٦')[1], ['Salem'])
+
+    @override_settings(SEARCH_RESULT_LIMIT=1)
+    def test_truncated_results_are_flagged(self):
+        Tenant.objects.create(name='Ahmed Ali', tenant_type='individual', phone='11111111')
+        response, names = self.search_tenants('ahmed')
+        self.assertEqual(len(names), 1)
+        self.assertIn('1', ' '.join(str(message) for message in response.context['messages']))
+        response, names = self.search_tenants('ali')
+        self.assertEqual(names, ['Ahmed Ali'])
+        self.assertEqual(len(response.context['messages']), 0)
+
+    def test_migration_backfills_existing_rows(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(SearchService.search_ids(Lease, 'C1'), [])
+        run_data_migration('0033_backfill_search_index', 'backfill_search_index')
+        self.assertEqual(SearchService.search_ids(Lease, 'C1'), [self.lease.pk])
+        self.assertEqual(SearchService.search_ids(Tenant, 'ahmed'), [self.tenant.pk])
+        # Rows indexed after 0023 are kept rather than duplicated
+        run_data_migration('0033_backfill_search_index', 'backfill_search_index')
+        self.assertEqual(SearchEntry.objects.filter(object_id=self.lease.pk, content_type__model='lease').count(), 1)
+
+
+class KeysetPaginationTests(RentalFixture, TestCase):
+    def test_empty_cursor_page_falls_back_to_the_first_page(self):
+        payments = [self.pay('100', datetime.date(2026, month, 1)) for month in (1, 2, 3)]
+        for direction, day in (('prev', datetime.date(2026, 12, 1)), ('next', datetime.date(2025, 1, 1))):
+            cursor = encode_cursor(day, 1, direction)
+            response = self.client.get(reverse('payment_list'), {'cursor': cursor})
+            self.assertEqual([payment.pk for payment in response.context['payments']], [p.pk for p in reversed(payments)])
+            self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_total_is_capped(self):
+        Lease.objects.create(unit=self.unit, tenant=self.tenant, contract_number='C2', monthly_rent=Decimal('100'),
+                             start_date=datetime.date(2027, 1, 1), end_date=datetime.date(2027, 12, 31))
+        with mock.patch.object(LeaseListView, 'paginate_by', 1):
+            page = self.client.get(reverse('lease_list')).context['page_obj']
+            self.assertEqual((page.total_count, page.total_capped), (2, False))
+            with mock.patch.object(LeaseListView, 'keyset_count_cap', 1):
+                page = self.client.get(reverse('lease_list')).context['page_obj']
+                self.assertEqual((page.total_count, page.total_capped), (1, True))
+
+    def test_total_is_cached_per_filter(self):
+        total = lambda **params: self.client.get(reverse('lease_list'), params).context['page_obj'].total_count
+        self.assertEqual(total(), 1)
+        Lease.objects.create(unit=self.unit, tenant=self.tenant, contract_number='C2', monthly_rent=Decimal('100'),
+                             start_date=datetime.date(2027, 1, 1), end_date=datetime.date(2027, 12, 31))
+        self.assertEqual(total(), 1)
+        self.assertEqual(total(status='active'), 2)
+        cache.clear()
+        self.assertEqual(total(), 2)
+
+
+class PaymentImportTests(RentalFixture, TestCase):
+    HEADER = 'contract_number,payment_date,amount,payment_method,check_number,bank_name,payment_for_year\n'
+
+    def import_rows(self, *rows, dry_run=False):
+        upload = SimpleUploadedFile('statement.csv', (self.HEADER + ''.join(f'{row}\n' for row in rows)).encode())
+        return PaymentImportService.import_file(upload, dry_run=dry_run)
+
+    def test_field_limits_are_checked(self):
+        result = self.import_rows(
+            f"C1,2026-03-01,100,check,{'9' * 51},Bank,2026",
+            f"C1,2026-03-01,100,check,1,{'b' * 101},2026",
+            'C1,2026-03-01,123456789012,cash,,,2026',
+            'C1,2026-03-01,100,cash,,,1800',
+        )
+        self.assertEqual([row for row, messages in result['errors']], [2, 3, 4, 5])
+        self.assertEqual(result['valid'], 0)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_reimporting_a_statement_adds_nothing(self):
+        rows = ('C1,2026-03-01,100,check,501,Bank,2026', 'C1,2026-03-01,100,check,502,Bank,2026', 'C1,2026-03-02,50,cash,,,2026')
+        self.assertEqual(self.import_rows(*rows)['created'], 3)
+        result = self.import_rows(*rows, 'C1,2026-03-03,50,cash,,,2026')
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([row for row, messages in result['errors']], [2, 3, 4])
+        self.assertEqual(Payment.objects.count(), 4)
+
+    def test_rows_are_imported_in_chunks(self):
+        rows = ['C1,2026-03-01,100,cash,,,2026', 'C1,2026-03-01,100,cash,,,2026', 'X9,2026-03-01,100,cash,,,2026']
+        rows += [f'C1,2026-03-02,100,check,{number},Bank,2026' for number in range(601, 605)]
+        with mock.patch.object(PaymentImportService, 'BATCH_SIZE', 2), \
+                mock.patch.object(Payment.objects, 'bulk_create', wraps=Payment.objects.bulk_create) as bulk_create:
+            result = self.import_rows(*rows)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 1, 2, 1])
+        self.assertEqual((result['total_rows'], result['created']), (7, 6))
+        self.assertEqual([row for row, messages in result['errors']], [4])
+        self.assertEqual(self.import_rows(*rows)['created'], 0)
+
+    def test_corrupt_workbook_is_reported(self):
+        upload = SimpleUploadedFile('statement.xlsx', b'not a zip file')
+        response = self.client.post(reverse('payment_import'), {'file': upload}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['messages']), 1)
+
+    def test_import_refreshes_cached_building_pl(self):
+        start, end = BuildingProfitLoss.period(2026, 3)
+        self.assertEqual(BuildingProfitLoss.get(start, end)['totals']['income'], Decimal('0'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.import_rows('C1,2026-03-01,100,cash,,,2026')
+        self.assertEqual(BuildingProfitLoss.get(start, end)['totals']['income'], Decimal('100'))
+
+
+class LeaseRenewalTests(RentalFixture, TestCase):
+    def test_renewal_terms_and_numbering(self):
+        other = Lease.objects.create(
+            unit=Unit.objects.create(building=self.building, unit_number='13', unit_type='shop', floor=1),
+            tenant=self.tenant, contract_number='C2-R4', monthly_rent=Decimal('200'),
+            start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        renewed = LeaseRenewalService.renew([self.lease, other], '1y', rent_change_percent=Decimal('10'))
+        self.assertEqual([lease.contract_number for lease in renewed], ['C1-R1', 'C2-R2'])
+        self.assertEqual([lease.monthly_rent for lease in renewed], [Decimal('110.00'), Decimal('220.00')])
+        self.assertEqual((renewed[0].start_date, renewed[0].end_date), (datetime.date(2027, 1, 1), datetime.date(2027, 12, 31)))
+        self.lease.refresh_from_db()
+        self.assertEqual(self.lease.status, 'expired')
+
+    def test_rent_change_is_bounded(self):
+        for percent in ('-150', '-50.01', '100.01', 'NaN'):
+            with self.assertRaises(ValueError):
+                LeaseRenewalService.renew([self.lease], '1y', rent_change_percent=Decimal(percent))
+        self.assertEqual(Lease.objects.count(), 1)
+
+    def test_a_lease_is_renewed_once(self):
+        LeaseRenewalService.renew([self.lease], '1y')
+        with self.assertRaises(ValueError):
+            LeaseRenewalService.renew([self.lease], '1y')
+        response = self.client.post(reverse('lease_renew', args=[self.lease.pk]), {'duration': '1y'})
+        self.assertRedirects(response, reverse('lease_detail', args=[self.lease.pk]), fetch_redirect_response=False)
+        self.assertEqual(Lease.objects.count(), 2)
+
+    def make_renewed_lease(self, contract_number):
+        return Lease.objects.create(
+            unit=Unit.objects.create(building=self.building, unit_number='13', unit_type='shop', floor=1),
+            tenant=self.tenant, contract_number=contract_number, monthly_rent=Decimal('100'),
+            start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 6, 30),
+        )
+
+    def test_existing_suffixes_are_skipped(self):
+        renewal = self.make_renewed_lease('C1-R1')
+        self.assertEqual([lease.contract_number for lease in LeaseRenewalService.renew([renewal], '1y')], ['C1-R2'])
+
+    def test_migration_seeds_the_sequence_past_existing_suffixes(self):
+        self.make_renewed_lease('C1-R7')
+        run_data_migration('0036_seed_lease_renewal_sequence', 'seed_lease_renewal_sequence')
+        self.assertEqual(NumberSequence.objects.get(name=LeaseRenewalService.SEQUENCE_NAME).next_value, 8)
+
+    def test_bulk_renewal_ignores_malformed_ids(self):
+        response = self.client.post(reverse('lease_bulk_renew'), {'lease_ids': ['abc'], 'days': '400'}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message.level_tag for message in response.context['messages']], ['error'])
+
+
+class ChequeServiceTests(RentalFixture, TestCase):
+    def test_total_counts_cheques_without_status(self):
+        self.pay('100', datetime.date(2026, 3, 1), payment_method='check', check_status='pending', check_date=datetime.date(2026, 3, 1))
+        self.pay('100', datetime.date(2026, 4, 1), payment_method='check', check_status='cashed', check_date=datetime.date(2026, 4, 1))
+        Payment.objects.filter(check_status='cashed').update(check_status=None)
+        counts = ChequeService.status_counts()
+        self.assertEqual((counts['pending'], counts['cashed'], counts['total']), (1, 0, 2))
+
+    def test_undated_pending_cheques_are_listed(self):
+        self.pay('100', datetime.date(2026, 3, 1), payment_method='check', check_status='pending', check_date=datetime.date(2026, 3, 1))
+        undated = self.pay('40', datetime.date(2026, 3, 2), payment_method='check', check_status='pending', check_number='77')
+        calendar = ChequeService.maturity_calendar(datetime.date(2026, 2, 1), 60)
+        self.assertEqual((calendar['count'], calendar['undated']['count'], calendar['undated']['total']), (1, 1, Decimal('40')))
+        response = self.client.get(reverse('cheque_deposit_batch'), {'date': '2026-03-01'})
+        self.assertEqual(response.context['count'], 1)
+        self.assertEqual(list(response.context['undated']), [undated])
+        self.assertContains(response, '#77')
+        self.assertEqual(self.client.get(reverse('cheque_maturity_calendar')).status_code, 200)
+
+    def test_deposit_slip_csv_lists_due_cheques_by_bank(self):
+        self.pay('100', datetime.date(2026, 3, 1), payment_method='check', check_status='pending',
+                 check_date=datetime.date(2026, 3, 1), check_number='12', bank_name='NBK')
+        self.pay('60', datetime.date(2026, 3, 1), payment_method='check', check_status='pending', check_date=datetime.date(2026, 3, 1))
+        self.pay('40', datetime.date(2026, 4, 1), payment_method='check', check_status='pending', check_date=datetime.date(2026, 4, 1))
+        response = self.client.get(reverse('cheque_deposit_slip'), {'date': '2026-03-01', 'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()[1:]
+        self.assertEqual(lines, ['غير محدد,,2026-03-01,Ahmed,C1,60.00', 'NBK,12,2026-03-01,Ahmed,C1,100.00'])
+        response = self.client.get(reverse('cheque_deposit_slip'), {'date': '2026-03-01', 'bank': 'NBK', 'format': 'csv'})
+        self.assertEqual(len(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()), 2)
+
+
+class PortalSnapshotTests(RentalFixture, TestCase):
+    def test_relinking_a_tenant_drops_both_users_snapshots(self):
+        old_user = self.tenant.user
+        new_user = User.objects.create(username='ahmed2')
+        self.assertEqual(PortalSnapshotService.get(old_user)['tenant'], self.tenant)
+        self.assertIsNone(PortalSnapshotService.get(new_user)['tenant'])
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        tenant.user = new_user
+        tenant.save()
+        self.assertIsNone(cache.get(PortalSnapshotService.cache_key(old_user.pk)))
+        self.assertIsNone(cache.get(PortalSnapshotService.cache_key(new_user.pk)))
+        self.assertIsNone(PortalSnapshotService.get(old_user)['tenant'])
+        self.assertEqual(PortalSnapshotService.get(new_user)['tenant'], tenant)
+
+
+class NotificationTests(RentalFixture, TestCase):
+    def test_unread_count_is_kept_in_the_cache(self):
+        def counted(expected):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(NotificationService.unread_count(self.staff), expected)
+            self.assertFalse([query for query in queries if Notification._meta.db_table in query['sql']])
+
+        NotificationService.notify([self.staff.pk], 'one')
+        self.assertEqual(NotificationService.unread_count(self.staff), 1)
+        counted(1)
+        NotificationService.notify([self.staff.pk], 'two')
+        counted(2)
+        NotificationService.mark_read(self.staff, [Notification.objects.filter(user=self.staff).earliest('id').pk])
+        counted(1)
+        NotificationService.mark_all_read(self.staff)
+        counted(0)
+
+    def test_page_seeds_the_poll_with_the_latest_id(self):
+        NotificationService.notify([self.staff.pk], 'one')
+        latest = Notification.objects.get(user=self.staff).pk
+        response = self.client.get(reverse('lease_detail', args=[self.lease.pk]))
+        self.assertContains(response, f'pollNotifications({latest});')
+
+    def test_unread_count_follows_the_table(self):
+        NotificationService.notify([self.staff.pk], 'one', 'event:1')
+        NotificationService.notify([self.staff.pk], 'one again', 'event:1')
+        NotificationService.notify([self.staff.pk], 'two')
+        self.assertEqual(NotificationService.unread_count(self.staff), 2)
+        # Single saves outside the service drop the cached counter
+        Notification.objects.create(user=self.staff, message='three')
+        self.assertEqual(NotificationService.unread_count(self.staff), 3)
+        NotificationService.mark_read(self.staff, [Notification.objects.filter(user=self.staff).order_by('id').first().pk])
+        self.assertEqual(NotificationService.unread_count(self.staff), 2)
+
+    def test_poll_answers_with_new_notifications(self):
+        response = self.client.get(reverse('notification_poll'))
+        self.assertEqual(response.json(), {'results': [], 'latest_id': 0, 'unread_count': 0})
+        NotificationService.notify([self.staff.pk], 'welcome')
+        since = self.client.get(reverse('notification_poll')).json()['latest_id']
+        NotificationService.notify([self.staff.pk], 'hello')
+        response = self.client.get(reverse('notification_poll'), {'since': since})
+        self.assertEqual([n['message'] for n in response.json()['results']], ['hello'])
+        latest = response.json()['latest_id']
+        self.assertGreater(latest, since)
+        with override_settings(NOTIFICATION_POLL_TIMEOUT=0):
+            response = self.client.get(reverse('notification_poll'), {'since': latest})
+        self.assertEqual(response.json(), {'results': [], 'latest_id': latest, 'unread_count': 2})
+
+
+class ReportYearTests(RentalFixture, TestCase):
+    def test_out_of_range_years_fall_back_to_the_current_year(self):
+        for year, shown in (('0', datetime.date.today().year), ('10000', datetime.date.today().year), ('9999', 9999), ('2026', 2026)):
+            response = self.client.get(reverse('report_rent_roll'), {'year': year})
+            self.assertEqual((response.status_code, response.context['year']), (200, shown))
+            self.assertEqual(self.client.get(reverse('report_rent_roll_export'), {'year': year, 'format': 'csv'}).status_code, 200)
+            self.assertEqual(self.client.get(reverse('report_building_pl'), {'year': year, 'month': '12'}).status_code, 200)
+
+
+class ChequeRuleTests(RentalFixture, TestCase):
+    """The aging report, rent roll and rent ledger count the same cheques as paid"""
+
+    def test_reports_agree_on_cheques(self):
+        as_of = datetime.date(2026, 3, 15)
+        self.pay('100', datetime.date(2026, 1, 5))
+        self.pay('100', datetime.date(2026, 2, 5), payment_method='check', check_status='cashed', check_date=datetime.date(2026, 2, 5))
+        self.pay('100', datetime.date(2026, 3, 1), payment_method='check', check_status='pending', check_date=datetime.date(2026, 3, 1))
+        self.pay('100', datetime.date(2026, 3, 2), payment_method='check', check_status='returned', return_reason='x')
+        # Post-dated cheque for April handed over in March
+        Payment.objects.create(lease=self.lease, amount=Decimal('100'), payment_date=datetime.date(2026, 3, 10),
+                               payment_for_month=4, payment_for_year=2026, payment_method='check',
+                               check_status='pending', check_date=datetime.date(2026, 4, 1))
+
+        aging = AgingReport(as_of=as_of)
+        self.assertEqual((aging.totals['total'], aging.totals['credit']), (Decimal('0'), Decimal('0')))
+        roll = RentRoll.for_year(2026, as_of=as_of)
+        self.assertEqual([m['collected'] for m in roll.by_month()[:4]], [Decimal('100'), Decimal('100'), Decimal('100'), Decimal('0')])
+        ledger = {row['month']: row['amount_paid'] for row in RentLedger.month_rows(datetime.date(2026, 4, 30), as_of=as_of)}
+        self.assertEqual([ledger[month] for month in (1, 2, 3, 4)], [Decimal('100'), Decimal('100'), Decimal('100'), Decimal('0')])
+        # Once its date arrives the post-dated cheque counts everywhere
+        later = datetime.date(2026, 4, 2)
+        self.assertEqual(AgingReport(as_of=later).totals['total'], Decimal('0'))
+        ledger = {row['month']: row['amount_paid'] for row in RentLedger.month_rows(datetime.date(2026, 4, 30), as_of=later)}
+        self.assertEqual(ledger[4], Decimal('100'))
+
+
+class ClosedPeriodTests(RentalFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.payment = self.pay('100', datetime.date(2026, 3, 5))
+        self.period = AccountingPeriod.objects.create(year=2026, month=3)
+
+    def test_close_and_reopen_apply_at_once(self):
+        self.assertTrue(AccountingPeriod.is_closed(datetime.date(2026, 3, 31)))
+        self.period.delete()
+        self.assertFalse(AccountingPeriod.is_closed(datetime.date(2026, 3, 31)))
+
+    def test_expense_save_is_guarded_without_clean(self):
+        with self.assertRaises(ValidationError):
+            Expense.objects.create(building=self.building, category='other', description='x',
+                                   amount=Decimal('5'), expense_date=datetime.date(2026, 3, 10))
+        expense = Expense.objects.create(building=self.building, category='other', description='x',
+                                         amount=Decimal('5'), expense_date=datetime.date(2026, 4, 10))
+        expense.expense_date = datetime.date(2026, 3, 10)
+        with self.assertRaises(ValidationError):
+            expense.save()
+        expense.description = 'y'
+        expense.expense_date = datetime.date(2026, 4, 10)
+        expense.save()
+
+    def test_cascading_delete_is_refused_with_a_message(self):
+        for name, obj in (('lease_delete', self.lease), ('tenant_delete', self.tenant),
+                          ('unit_delete', self.unit), ('building_delete', self.building)):
+            response = self.client.post(reverse(name, args=[obj.pk]), follow=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([message.level_tag for message in response.context['messages']], ['error'])
+        self.assertTrue(Payment.objects.filter(pk=self.payment.pk).exists())
+        self.assertTrue(Lease.objects.filter(pk=self.lease.pk).exists())
+
+
+class CsvExportTests(RentalFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        Tenant.objects.filter(pk=self.tenant.pk).update(name='=HYPERLINK("http://x")')
+
+    def test_formula_cells_are_escaped(self):
+        response = self.client.get(reverse('export_tenants_excel'), {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertIn('"\'=HYPERLINK(""http://x"")"', content)
+
+    async def test_asgi_download_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('export_tenants_excel'), {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8-sig')
+        self.assertIn("'=HYPERLINK", content)
+
+
+class ChangeFeedTests(RentalFixture, TestCase):
+    def read_all(self, since, limit, seen, deleted):
+        while True:
+            page = ChangeFeed.page(since, limit, ['tenant', 'lease', 'payment'])
+            self.assertGreaterEqual(page['cursor'], since)
+            for name, block in page['changes'].items():
+                seq_index = block['columns'].index('change_seq')
+                seen.update((name, row[0], row[seq_index]) for row in block['rows'])
+            for name, ids in page['deleted'].items():
+                deleted.update((name, pk) for pk in ids)
+            since = page['cursor']
+            if not page['has_more']:
+                return since
+
+    def test_paging_between_writes_never_skips_a_change(self):
+        seen, deleted = set(), set()
+        since = self.read_all(0, 2, seen, deleted)
+        first = self.pay('10', datetime.date(2026, 1, 5))
+        second = self.pay('20', datetime.date(2026, 2, 5))
+        since = self.read_all(since, 1, seen, deleted)
+        self.tenant.phone = '11111111'
+        self.tenant.save(update_fields=['phone'])
+        first_pk = first.pk
+        first.delete()
+        second.amount = Decimal('25')
+        second.save()
+        self.pay('30', datetime.date(2026, 3, 5))
+        self.read_all(since, 1, seen, deleted)
+
+        for model in (Tenant, Lease, Payment):
+            for pk, change_seq in model.objects.values_list('pk', 'change_seq'):
+                self.assertIn((model._meta.model_name, pk, change_seq), seen)
+        self.assertEqual(deleted, {('payment', first_pk)})
+
+    def test_number_is_taken_after_pre_save_receivers(self):
+        numbers = []
+        def translate(text):
+            numbers.append(NumberSequence.objects.get(name=CHANGE_SEQUENCE).next_value)
+            return text
+        with mock.patch('dashboard.signals.auto_translate_to_english', side_effect=translate):
+            tenant = Tenant.objects.create(name='Sara', tenant_type='individual', phone='88888888')
+        self.assertEqual(numbers[0], tenant.change_seq)
+
+
+class ConditionalGetTests(RentalFixture, TestCase):
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_is_304_until_a_row_changes(self):
+        url = reverse('lease_detail', args=[self.lease.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        payment = self.pay('100', datetime.date(2026, 1, 5))
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        # A deletion leaves no newer updated_at behind; the row count catches it
+        payment.delete()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_flash_messages_bypass_the_304(self):
+        url = reverse('lease_detail', args=[self.lease.pk])
+        etag = self.client.get(url)['ETag']
+        # A refused rating changes no row but leaves an error message for the next page
+        self.client.post(reverse('tenant_rate', args=[self.tenant.pk]), {'rating': 'x'})
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message.level_tag for message in response.context['messages']], ['error'])
+
+    def test_views_can_name_whole_tables(self):
+        class TenantCount(ConditionalGetMixin, View):
+            watermark_models = [Tenant]
+
+            def get(self, request):
+                return HttpResponse(Tenant.objects.count())
+
+        etag = TenantCount.as_view()(RequestFactory().get('/count/'))['ETag']
+        self.assertEqual(TenantCount.as_view()(RequestFactory().get('/count/', HTTP_IF_NONE_MATCH=etag)).status_code, 304)
+        Tenant.objects.create(name='Salem', tenant_type='individual', phone='11111111')
+        self.assertEqual(TenantCount.as_view()(RequestFactory().get('/count/', HTTP_IF_NONE_MATCH=etag)).status_code, 200)
+
+        class Unconfigured(ConditionalGetMixin, View):
+            pass
+
+        with self.assertRaises(ImproperlyConfigured):
+            Unconfigured.as_view()(RequestFactory().get('/count/'))
+
+
+class LeaseSaveTests(RentalFixture, TestCase):
+    def saved_fields(self, lease):
+        """update_fields of the post_save that lease.save() sends"""
+        calls = []
+        def receiver(sender, instance, update_fields, **kwargs):
+            calls.append(set(update_fields or ()))
+        post_save.connect(receiver, sender=Lease)
+        try:
+            lease.save()
+        finally:
+            post_save.disconnect(receiver, sender=Lease)
+        return calls
+
+    def test_moving_a_lease_frees_the_old_unit(self):
+        other = Unit.objects.create(building=self.building, unit_number='13', unit_type='shop', floor=1)
+        lease = Lease.objects.get(pk=self.lease.pk)
+        lease.unit = other
+        self.assertIn('unit', self.saved_fields(lease)[0])
+        self.assertEqual(set(Unit.objects.values_list('unit_number', 'is_available')), {('12', True), ('13', False)})
+
+    def test_cancelling_frees_the_unit(self):
+        lease = Lease.objects.get(pk=self.lease.pk)
+        lease.status = 'cancelled'
+        self.assertIn('status', self.saved_fields(lease)[0])
+        self.assertTrue(Unit.objects.get(pk=self.unit.pk).is_available)
+
+    def test_unchanged_save_still_sends_post_save(self):
+        lease = Lease.objects.get(pk=self.lease.pk)
+        self.assertEqual(self.saved_fields(lease), [{'updated_at'}])
+        self.assertFalse(Unit.objects.get(pk=self.unit.pk).is_available)
+
+    def test_any_edit_refreshes_the_status(self):
+        Lease.objects.filter(pk=self.lease.pk).update(end_date=datetime.date(2026, 2, 28))
+        lease = Lease.objects.get(pk=self.lease.pk)
+        lease.water_meter = 'W1'
+        self.assertEqual(self.saved_fields(lease), [{'water_meter', 'status', 'updated_at'}])
+        self.assertEqual(Lease.objects.get(pk=self.lease.pk).status, 'expired')
+
+
+class ListExportTests(RentalFixture, TestCase):
+    def csv_column(self, url_name, params, column=0):
+        response = self.client.get(reverse(url_name), {**params, 'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()[1:]
+        return [line.split(',')[column] for line in lines]
+
+    def test_filtered_and_searched_exports_match_the_list_page(self):
+        other_unit = Unit.objects.create(building=self.building, unit_number='13', unit_type='shop', floor=1)
+        other = Tenant.objects.create(name='Salem', tenant_type='individual', phone='77777777')
+        Lease.objects.create(unit=other_unit, tenant=other, contract_number='C2', monthly_rent=Decimal('100'),
+                             start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31))
+        params = {'status': 'active'}
+        shown = [lease.contract_number for lease in self.client.get(reverse('lease_list'), params).context['leases']]
+        self.assertEqual(shown, ['C1'])
+        self.assertEqual(self.csv_column('export_leases_excel', params), shown)
+
+        params = {'q': 'salem'}
+        shown = [tenant.name for tenant in self.client.get(reverse('tenant_list'), params).context['tenants']]
+        self.assertEqual(shown, ['Salem'])
+        self.assertEqual(self.csv_column('export_tenants_excel', params), shown)
+
+    @override_settings(SEARCH_RESULT_LIMIT=1)
+    def test_truncated_search_export_is_refused(self):
+        Tenant.objects.create(name='Ahmed Ali', tenant_type='individual', phone='11111111')
+        response = self.client.get(reverse('export_tenants_excel'), {'q': 'ahmed', 'format': 'csv'})
+        self.assertRedirects(response, f"{reverse('tenant_list')}?q=ahmed", fetch_redirect_response=False)
+        response = self.client.get(response['Location'])
+        self.assertEqual([message.level_tag for message in response.context['messages']], ['error', 'warning'])
+
+
+class LiveEventTests(RentalFixture, TestCase):
+    @staticmethod
+    async def read_frames(frames, count):
+        try:
+            return [await anext(frames) for _ in range(count)]
+        finally:
+            await frames.aclose()
+
+    def test_database_stream_resumes_after_the_last_event_id(self):
+        LiveEventBroker.publish('payment', {'amount': Decimal('100')})
+        LiveEventBroker.publish('expense', {'day': datetime.date(2026, 3, 1)})
+        first, second = DashboardEvent.objects.all()
+        self.assertEqual(first.payload, {'amount': '100'})
+        retry, frame = async_to_sync(self.read_frames)(LiveEventBroker.stream(str(first.pk)), 2)
+        self.assertEqual(retry, 'retry: 15000\n\n')
+        self.assertEqual(frame, f'id: {second.pk}\nevent: expense\ndata: {{"day": "2026-03-01"}}\n\n')
+
+    def test_old_events_are_pruned(self):
+        LiveEventBroker.publish('payment', {})
+        DashboardEvent.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        LiveEventBroker.publish('payment', {})
+        self.assertEqual(LiveEventBroker.prune(), 1)
+        self.assertEqual(DashboardEvent.objects.count(), 1)
+
+    @override_settings(LIVE_EVENTS_BACKEND='memory')
+    def test_memory_backend_reaches_open_streams(self):
+        async def publish_to_stream():
+            frames = LiveEventBroker.stream()
+            try:
+                await anext(frames)
+                pending = asyncio.ensure_future(anext(frames))
+                await asyncio.sleep(0)
+                LiveEventBroker.publish('payment', {'amount': 5})
+                return await pending
+            finally:
+                await frames.aclose()
+
+        self.assertRegex(async_to_sync(publish_to_stream)(), r'^id: \d+\nevent: payment\ndata: \{"amount": 5\}\n\n$')
+        self.assertEqual(LiveEventBroker._subscribers, set())
+        self.assertFalse(DashboardEvent.objects.exists())
+
+    @override_settings(LIVE_EVENTS_BACKEND='memory')
+    def test_memory_backend_with_several_workers_is_flagged(self):
+        with mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '4'}):
+            self.assertEqual([warning.id for warning in check_live_events_backend(None)], ['dashboard.W002'])
+        with mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '1'}):
+            self.assertEqual(check_live_events_backend(None), [])
+
+    def test_stream_view_is_staff_only_and_needs_asgi(self):
+        # The sync test client is a WSGI request, which gets 204 so EventSource stops reconnecting
+        self.assertEqual(self.client.get(reverse('dashboard_events')).status_code, 204)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('dashboard_events')).status_code, 403)
+
+    async def test_stream_view_serves_an_event_stream(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('dashboard_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        frames = aiter(response.streaming_content)
+        self.assertEqual(await anext(frames), b'retry: 15000\n\n')
+
+
+class SchedulerTests(TestCase):
+    def test_cron_fields(self):
+        schedule = CronSchedule('0-30/10,45 */6 1,15 * 1-5')
+        self.assertEqual(schedule.minutes, [0, 10, 20, 30, 45])
+        self.assertEqual(schedule.hours, [0, 6, 12, 18])
+        self.assertEqual(schedule.days, {1, 15})
+        self.assertEqual(schedule.months, set(range(1, 13)))
+        self.assertEqual(schedule.weekdays, {1, 2, 3, 4, 5})
+        self.assertEqual(CronSchedule('0 0 * * 5-7').weekdays, {0, 5, 6})
+        for expression in ('60 * * * *', '* 24 * * *', '* * 0 * *', '*/0 * * * *', '* * * *'):
+            with self.assertRaises(ValueError):
+                CronSchedule(expression)
+
+    def test_day_of_month_and_weekday(self):
+        # 2026-10-19 is a Monday
+        now = datetime.datetime(2026, 10, 19, 10, 0)
+        mondays = CronSchedule('0 9 * * 1')
+        self.assertEqual(mondays.previous_run(now), datetime.datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(mondays.next_run(now), datetime.datetime(2026, 10, 26, 9, 0))
+        # With both fields restricted cron matches either of them
+        first_or_monday = CronSchedule('0 9 1 * 1')
+        self.assertEqual(first_or_monday.next_run(datetime.datetime(2026, 10, 27)), datetime.datetime(2026, 11, 1, 9, 0))
+        self.assertEqual(first_or_monday.previous_run(datetime.datetime(2026, 10, 5)), datetime.datetime(2026, 10, 1, 9, 0))
+
+    def test_lock_is_exclusive_until_released_or_expired(self):
+        self.assertTrue(JobScheduler.acquire_lock('report', 60))
+        self.assertFalse(JobScheduler.acquire_lock('report', 60))
+        JobScheduler.release_lock('report')
+        self.assertTrue(JobScheduler.acquire_lock('report', 60))
+        JobLock.objects.filter(name='report').update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertTrue(JobScheduler.acquire_lock('report', 60))
+        self.assertEqual(JobLock.objects.get(name='report').owner, JobScheduler.owner_id())
+
+    def test_runs_are_recorded_once_per_slot(self):
+        job = ScheduledJob('report', '* * * * *', lambda: 3)
+        run = JobScheduler.run_job(job)
+        self.assertEqual((run.status, run.rows_affected, run.error), ('success', 3, ''))
+        self.assertIsNotNone(run.finished_at)
+        self.assertIsNotNone(run.duration)
+        self.assertIsNone(JobScheduler.run_job(job))
+        self.assertEqual(JobRun.objects.count(), 1)
+        # The lock was released after each attempt
+        self.assertTrue(JobScheduler.acquire_lock('report', 60))
+
+    def test_failed_runs_keep_the_traceback(self):
+        with self.assertLogs('dashboard.scheduler', 'ERROR'):
+            run = JobScheduler.run_job(ScheduledJob('report', '* * * * *', lambda: 1 / 0), force=True)
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'failed')
+        self.assertIn('ZeroDivisionError', run.error)
+
+
+class NotificationJobTests(RentalFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tenant.user = User.objects.create(username='tenant')
+        self.tenant.save()
+
+    def keys(self):
+        return sorted(Notification.objects.filter(user=self.tenant.user).values_list('dedupe_key', flat=True))
+
+    def test_payment_reminders_are_sent_once_per_month(self):
+        # Five days before April: January and February are overdue, April is due
+        self.assertEqual(send_payment_reminders(datetime.date(2026, 3, 27)), 6)
+        self.assertEqual(send_payment_reminders(datetime.date(2026, 3, 27)), 0)
+        self.assertEqual(send_payment_reminders(datetime.date(2026, 3, 28)), 0)
+        self.pay('100', datetime.date(2026, 4, 2))
+        self.assertEqual(send_payment_reminders(datetime.date(2026, 4, 26)), 4)
+        lease = self.lease.pk
+        self.assertEqual(self.keys(), [
+            f'lease:{lease}:overdue:2026-01', f'lease:{lease}:overdue:2026-02', f'lease:{lease}:overdue:2026-03',
+            f'lease:{lease}:reminder:2026-04', f'lease:{lease}:reminder:2026-05',
+        ])
+        self.assertEqual(Notification.objects.filter(user=self.staff).count(), 5)
+
+    def test_lease_notifications_are_sent_once_per_period(self):
+        Lease.objects.filter(pk=self.lease.pk).update(end_date=datetime.date(2026, 5, 10), status='expiring_soon')
+        self.assertEqual(send_lease_notifications(datetime.date(2026, 4, 15)), 2)
+        self.assertEqual(send_lease_notifications(datetime.date(2026, 4, 15)), 0)
+        self.assertEqual(send_lease_notifications(datetime.date(2026, 4, 16)), 0)
+        # A new month repeats the arrears warning but not the renewal question
+        self.assertEqual(send_lease_notifications(datetime.date(2026, 5, 1)), 1)
+        lease = self.lease.pk
+        self.assertEqual(self.keys(), [f'lease:{lease}:late:2026-04', f'lease:{lease}:late:2026-05', f'lease:{lease}:renewal:2026-05'])
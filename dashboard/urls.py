@@ -4,20 +4,26 @@ from .views import (
     TenantListView, TenantDetailView, TenantCreateView, TenantUpdateView, TenantDeleteView,
     UnitListView, UnitDetailView, UnitCreateView, UnitUpdateView, UnitDeleteView,
     BuildingListView, BuildingCreateView, BuildingUpdateView, BuildingDeleteView,
-    LeaseListView, LeaseDetailView, LeaseCreateView, LeaseUpdateView, LeaseDeleteView, renew_lease, LeaseCancelView,
+    LeaseListView, LeaseDetailView, LeaseCreateView, LeaseUpdateView, LeaseDeleteView, renew_lease, LeaseCancelView, LeaseBulkRenewView,
     DocumentUploadView, DocumentDeleteView,
     MaintenanceRequestAdminListView, MaintenanceRequestAdminUpdateView,
     ExpenseListView, ExpenseCreateView, ExpenseUpdateView, ExpenseDeleteView,
-    PaymentListView, PaymentCreateView, PaymentUpdateView, PaymentDeleteView, PaymentReceiptPDFView,
-    CheckManagementView, CheckStatusUpdateView,
+    PaymentListView, PaymentCreateView, PaymentUpdateView, PaymentDeleteView, PaymentReceiptPDFView, PaymentImportView,
+    CheckManagementView, CheckStatusUpdateView, ChequeDepositBatchView, ChequeMaturityCalendarView, JobRunListView,
     UserManagementView, UserCreateView, UserUpdateView, UserDeleteView,
-    ReportSelectionView, GenerateTenantStatementPDF, GenerateMonthlyPLReportPDF, GenerateAnnualPLReportPDF, GenerateOccupancyReportPDF, GeneratePaymentReceiptPDF,
+    ReportSelectionView, GenerateTenantStatementPDF, GenerateMonthlyPLReportPDF, GenerateAnnualPLReportPDF, GenerateOccupancyReportPDF, GeneratePaymentReceiptPDF, RentRollReportView,
+    AgingReportView, GenerateAgingReportPDF, BuildingPLReportView, GenerateBuildingPLReportPDF, AccountingPeriodListView,
     CompanyUpdateView, UpdateTenantRatingView,
     InvoiceListView, InvoiceDetailView, InvoiceCreateView, InvoiceUpdateView, InvoiceDeleteView,
 )
 from .auth_views import (
     EnhancedLoginView, send_login_otp, verify_login_otp, user_profile,
 )
+from .notification_views import (
+    NotificationInboxView, notification_unread_count, notification_mark_read, notification_mark_all_read, notification_poll,
+)
+from .event_views import dashboard_events
+from .change_feed_views import change_feed
 from .otp_views import (
     send_otp_view, verify_otp_view, setup_phone_number, verify_phone_number, send_phone_verification_otp
 )
@@ -29,10 +35,15 @@ from .export_views import (
     export_buildings_excel,
     export_units_excel,
     export_maintenance_excel,
+    export_cheque_deposit_slip,
+    export_rent_roll_excel,
+    export_aging_report_excel,
+    export_building_pl_excel,
 )
 
 urlpatterns = [
     path('', DashboardHomeView.as_view(), name='dashboard_home'),
+    path('events/', dashboard_events, name='dashboard_events'),
 
     # Company Settings
     path('settings/company/', CompanyUpdateView.as_view(), name='company_update'),
@@ -61,6 +72,7 @@ urlpatterns = [
     path('lease/', LeaseListView.as_view(), name='lease_list'),
     path('lease/<int:pk>/', LeaseDetailView.as_view(), name='lease_detail'),
     path('lease/new/', LeaseCreateView.as_view(), name='lease_create'),
+    path('lease/renew/bulk/', LeaseBulkRenewView.as_view(), name='lease_bulk_renew'),
     path('lease/<int:pk>/edit/', LeaseUpdateView.as_view(), name='lease_update'),
     path('lease/<int:pk>/delete/', LeaseDeleteView.as_view(), name='lease_delete'),
     path('lease/<int:pk>/renew/', renew_lease, name='lease_renew'),
@@ -86,6 +98,7 @@ urlpatterns = [
     # Payments
     path('payments/', PaymentListView.as_view(), name='payment_list'),
     path('payments/new/', PaymentCreateView.as_view(), name='payment_create'),
+    path('payments/import/', PaymentImportView.as_view(), name='payment_import'),
     path('payments/<int:pk>/edit/', PaymentUpdateView.as_view(), name='payment_update'),
     path('payments/<int:pk>/delete/', PaymentDeleteView.as_view(), name='payment_delete'), # ADDED
     path('payments/<int:pk>/receipt/', PaymentReceiptPDFView.as_view(), name='payment_receipt'),
@@ -93,7 +106,13 @@ urlpatterns = [
     # Check Management
     path('checks/', CheckManagementView.as_view(), name='check_management'),
     path('checks/<int:pk>/update-status/', CheckStatusUpdateView.as_view(), name='check_status_update'),
+    path('checks/deposit-batch/', ChequeDepositBatchView.as_view(), name='cheque_deposit_batch'),
+    path('checks/deposit-batch/export/', export_cheque_deposit_slip, name='cheque_deposit_slip'),
+    path('checks/calendar/', ChequeMaturityCalendarView.as_view(), name='cheque_maturity_calendar'),
     
+    # Scheduled jobs
+    path('jobs/', JobRunListView.as_view(), name='job_run_list'),
+
     # User Management
     path('users/', UserManagementView.as_view(), name='user_management'),
     path('users/new/', UserCreateView.as_view(), name='user_create'),
@@ -107,6 +126,15 @@ urlpatterns = [
     path('reports/monthly-pl/', GenerateMonthlyPLReportPDF.as_view(), name='report_monthly_pl'),
     path('reports/annual-pl/', GenerateAnnualPLReportPDF.as_view(), name='report_annual_pl'), # ADDED
     path('reports/occupancy/', GenerateOccupancyReportPDF.as_view(), name='report_occupancy'), # ADDED
+    path('reports/rent-roll/', RentRollReportView.as_view(), name='report_rent_roll'),
+    path('reports/rent-roll/export/', export_rent_roll_excel, name='report_rent_roll_export'),
+    path('reports/aging/', AgingReportView.as_view(), name='report_aging'),
+    path('reports/aging/export/', export_aging_report_excel, name='report_aging_export'),
+    path('reports/aging/pdf/', GenerateAgingReportPDF.as_view(), name='report_aging_pdf'),
+    path('reports/building-pl/', BuildingPLReportView.as_view(), name='report_building_pl'),
+    path('reports/building-pl/export/', export_building_pl_excel, name='report_building_pl_export'),
+    path('reports/building-pl/pdf/', GenerateBuildingPLReportPDF.as_view(), name='report_building_pl_pdf'),
+    path('reports/periods/', AccountingPeriodListView.as_view(), name='accounting_periods'),
     
     # Excel Exports
     path('export/tenants/', export_tenants_excel, name='export_tenants_excel'),
@@ -128,4 +156,12 @@ urlpatterns = [
     path('profile/', user_profile, name='profile'),
     path('setup-phone/', setup_phone_number, name='setup_phone'),
     path('verify-phone/', verify_phone_number, name='verify_phone'),
+
+    # Notifications
+    path('notifications/', NotificationInboxView.as_view(), name='notification_inbox'),
+    path('notifications/unread-count/', notification_unread_count, name='notification_unread_count'),
+    path('notifications/mark-read/', notification_mark_read, name='notification_mark_read'),
+    path('notifications/mark-all-read/', notification_mark_all_read, name='notification_mark_all_read'),
+    path('notifications/poll/', notification_poll, name='notification_poll'),
+    path('api/changes/', change_feed, name='api_changes'),
 ]
\ No newline at end of file
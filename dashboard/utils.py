@@ -7,6 +7,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def pdf_filename(context: dict) -> str:
+    """اسم ملف PDF: من السياق إن وُجد، وإلا اسم الإيصال للدفعات"""
+    if context.get('pdf_filename'):
+        return context['pdf_filename']
+    if context.get('payment'):
+        return f"receipt_{context['payment'].id}.pdf"
+    return "report.pdf"
+
 # الدالة الرئيسية لتوليد PDF
 def generate_pdf_receipt(template_path: str, context: dict) -> HttpResponse:
     """
@@ -32,7 +40,7 @@ def render_to_pdf_weasyprint(template_path: str, context: dict) -> HttpResponse:
         pdf_file = HTML(string=html, base_url=settings.BASE_DIR).write_pdf()
 
         response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="receipt_{context.get("payment").id}.pdf"'
+        response['Content-Disposition'] = f'inline; filename="{pdf_filename(context)}"'
         return response
 
     except Exception as e:
@@ -54,7 +62,7 @@ def render_to_pdf(template_path: str, context: dict) -> HttpResponse:
 
         if not pdf.err:
             response = HttpResponse(result.getvalue(), content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="receipt_{context.get("payment").id}.pdf"'
+            response['Content-Disposition'] = f'inline; filename="{pdf_filename(context)}"'
             return response
         else:
             return HttpResponse(f"PDF generation error: {pdf.err}")
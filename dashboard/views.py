@@ -13,34 +13,139 @@ from django.contrib.auth.views import LoginView
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import gettext_lazy
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
-from django.db import transaction
+from django.db.models import Sum, Count, Q, Max
+from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError
 from dateutil.relativedelta import relativedelta
 from io import BytesIO
 from django.http import HttpResponse
 from django.template.loader import get_template
 from django.utils.translation import gettext as _
 from django.conf import settings
+from django.core.paginator import Paginator
 from django import forms
 import json
+import datetime
+from decimal import Decimal, InvalidOperation
 
 from .models import (
     Tenant, Unit, Building, Lease, Document, MaintenanceRequest, 
-    Expense, Payment, Company, Invoice, InvoiceItem
+    Expense, Payment, Company, Invoice, InvoiceItem, JobRun, AccountingPeriod, Notification
 )
 from .forms import (
     TenantForm, UnitForm, BuildingForm, LeaseForm, DocumentForm, 
     MaintenanceRequestUpdateForm, ExpenseForm, PaymentForm, LeaseCancelForm, 
-    CompanyForm, TenantRatingForm, InvoiceForm, InvoiceItemFormSet
+    CompanyForm, TenantRatingForm, InvoiceForm, InvoiceItemFormSet, PaymentImportForm
 )
 from .utils import render_to_pdf
+from .search_service import SearchService
+from .cheque_service import ChequeService
+from .rent_roll import RentRoll
+from .aging import AgingReport
+from .cashflow import CashFlowForecast
+from .profit_loss import ProfitLossService
+from .building_pl import BuildingProfitLoss
+from .period_close import PeriodCloseService
+from .scheduler import JobScheduler
+from .pagination import KeysetPaginationMixin
+from .payment_import import PaymentImportService
+from .lease_renewal import LeaseRenewalService
+from .conditional import ConditionalGet, ConditionalGetMixin
 
 class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_staff
 
+class ListFilterMixin:
+    """
+    Query-string filters shared by a list page and its Excel/CSV export; the
+    export views build the same queryset through get_queryset().
+
+    date_filter_field: when set, ?date_from= and ?date_to= (YYYY-MM-DD) bound it.
+    """
+    date_filter_field = None
+
+    def get_date_range(self):
+        bounds = []
+        for param in ('date_from', 'date_to'):
+            try:
+                bounds.append(datetime.date.fromisoformat(self.request.GET.get(param, '')))
+            except ValueError:
+                bounds.append(None)
+        return bounds
+
+    def filter_date_range(self, queryset):
+        date_from, date_to = self.get_date_range()
+        if date_from:
+            queryset = queryset.filter(**{f'{self.date_filter_field}__gte': date_from})
+        if date_to:
+            queryset = queryset.filter(**{f'{self.date_filter_field}__lte': date_to})
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET.copy()
+        for param in ('page', 'cursor', 'format'):
+            params.pop(param, None)
+        context['export_query'] = params.urlencode()
+        return context
+
+class SearchFilterMixin:
+    """?q= narrows a list to search index matches; a capped result set is flagged on the page"""
+    search_truncated = False
+
+    def filter_search(self, queryset, search_query):
+        queryset, self.search_truncated = SearchService.search(queryset, search_query)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        # Exports build the same queryset but never render, so only the list page shows this
+        if self.search_truncated:
+            messages.warning(self.request, _("عدد النتائج كبير، تُعرض أفضل %(limit)s نتيجة فقط. الرجاء تضييق البحث.") % {
+                'limit': SearchService.result_limit()})
+        return super().get_context_data(**kwargs)
+
+class CascadeDeleteMixin:
+    """
+    Deletes that cascade down to payments or expenses: the closed-period guard
+    rejects rows dated in a closed month and the whole delete rolls back, which
+    is reported on the list page instead of as a server error.
+    """
+    success_message = None
+
+    def form_valid(self, form):
+        try:
+            # A savepoint of its own, so the rollback also leaves an enclosing transaction usable
+            with transaction.atomic():
+                response = super().form_valid(form)
+        except ValidationError as e:
+            messages.error(self.request, e.messages[0])
+            return redirect(self.success_url)
+        messages.success(self.request, self.success_message)
+        return response
+
+def lease_watermark(lease_pk):
+    """Rows a lease page, statement or receipt is rendered from"""
+    return [
+        Lease.objects.filter(pk=lease_pk), Tenant.objects.filter(lease=lease_pk), Unit.objects.filter(lease=lease_pk),
+        Building.objects.filter(unit__lease=lease_pk), Payment.objects.filter(lease=lease_pk),
+        Document.objects.filter(lease=lease_pk), Company.objects.all(),
+    ]
+
+def unread_notifications_watermark(user):
+    """The unread badge base.html renders into every dashboard page"""
+    return (Notification.objects.filter(user=user, read=False), 'timestamp')
+
+def pl_watermark(start, end):
+    """Rows the P&L reports for start..end are built from, including closed-period snapshots"""
+    return [
+        Payment.objects.filter(payment_date__range=(start, end)), Expense.objects.filter(expense_date__range=(start, end)),
+        (AccountingPeriod.objects.filter(year__range=(start.year, end.year)), 'closed_at'),
+        *ConditionalGet.tables(Lease, Unit, Building, Company),
+    ]
+
 # --- Dashboard Home ---
 class DashboardHomeView(StaffRequiredMixin, ListView):
     model = Lease
@@ -75,6 +180,10 @@ class DashboardHomeView(StaffRequiredMixin, ListView):
             trend_chart['expense_data'].append(float(monthly_expenses_trend))
         context['trend_chart'] = trend_chart
 
+        forecast = CashFlowForecast.get()
+        context['cashflow_forecast'] = forecast
+        context['cashflow_chart'] = json.dumps(CashFlowForecast.chart(forecast))
+
         # Recent financial movements
         recent_payments = Payment.objects.order_by('-payment_date')[:5]
         recent_expenses = Expense.objects.order_by('-expense_date')[:5]
@@ -115,7 +224,7 @@ class DashboardHomeView(StaffRequiredMixin, ListView):
         return context
 
 # --- Units Management ---
-class UnitListView(StaffRequiredMixin, ListView):
+class UnitListView(StaffRequiredMixin, ListFilterMixin, SearchFilterMixin, ListView):
     model = Unit
     template_name = 'dashboard/unit_list.html'
     context_object_name = 'units'
@@ -127,14 +236,14 @@ class UnitListView(StaffRequiredMixin, ListView):
         building_filter = self.request.GET.get('building', '')
         status_filter = self.request.GET.get('status', '')
         
-        if search_query:
-            queryset = queryset.filter(Q(unit_number__icontains=search_query) | Q(building__name__icontains=search_query))
         if building_filter:
             queryset = queryset.filter(building_id=building_filter)
         if status_filter == 'available':
             queryset = queryset.filter(is_available=True)
         elif status_filter == 'occupied':
             queryset = queryset.filter(is_available=False)
+        if search_query:
+            queryset = self.filter_search(queryset, search_query)
         
         return queryset
 
@@ -187,17 +296,14 @@ class UnitUpdateView(StaffRequiredMixin, UpdateView):
         messages.success(self.request, _("تم تحديث الوحدة بنجاح!"))
         return super().form_valid(form)
 
-class UnitDeleteView(StaffRequiredMixin, DeleteView):
+class UnitDeleteView(StaffRequiredMixin, CascadeDeleteMixin, DeleteView):
     model = Unit
     template_name = 'dashboard/unit_confirm_delete.html'
     success_url = reverse_lazy('unit_list')
-
-    def form_valid(self, form):
-        messages.success(self.request, _("تم حذف الوحدة بنجاح."))
-        return super().form_valid(form)
+    success_message = gettext_lazy("تم حذف الوحدة بنجاح.")
 
 # --- Tenants Management ---
-class TenantListView(StaffRequiredMixin, ListView):
+class TenantListView(StaffRequiredMixin, ListFilterMixin, SearchFilterMixin, ListView):
     model = Tenant
     template_name = 'dashboard/tenant_list.html'
     context_object_name = 'tenants'
@@ -208,10 +314,10 @@ class TenantListView(StaffRequiredMixin, ListView):
         search_query = self.request.GET.get('q', '')
         tenant_type = self.request.GET.get('type', '')
         
-        if search_query:
-            queryset = queryset.filter(Q(name__icontains=search_query) | Q(phone__icontains=search_query) | Q(email__icontains=search_query))
         if tenant_type:
             queryset = queryset.filter(tenant_type=tenant_type)
+        if search_query:
+            queryset = self.filter_search(queryset, search_query)
         
         return queryset
 
@@ -222,11 +328,19 @@ class TenantListView(StaffRequiredMixin, ListView):
         context['company_tenants'] = Tenant.objects.filter(tenant_type='company').count()
         return context
 
-class TenantDetailView(StaffRequiredMixin, DetailView):
+class TenantDetailView(StaffRequiredMixin, ConditionalGetMixin, DetailView):
     model = Tenant
     template_name = 'dashboard/tenant_detail.html'
     context_object_name = 'tenant'
 
+    def get_watermark_querysets(self):
+        pk = self.kwargs['pk']
+        return [
+            Tenant.objects.filter(pk=pk), Lease.objects.filter(tenant=pk), Payment.objects.filter(lease__tenant=pk),
+            Unit.objects.filter(lease__tenant=pk), Building.objects.filter(unit__lease__tenant=pk),
+            unread_notifications_watermark(self.request.user),
+        ]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['current_leases'] = Lease.objects.filter(tenant=self.object, status__in=['active', 'expiring_soon'])
@@ -264,22 +378,26 @@ class TenantUpdateView(StaffRequiredMixin, UpdateView):
         messages.success(self.request, _("تم تحديث بيانات المستأجر بنجاح!"))
         return super().form_valid(form)
 
-class TenantDeleteView(StaffRequiredMixin, DeleteView):
+class TenantDeleteView(StaffRequiredMixin, CascadeDeleteMixin, DeleteView):
     model = Tenant
     template_name = 'dashboard/tenant_confirm_delete.html'
     success_url = reverse_lazy('tenant_list')
-
-    def form_valid(self, form):
-        messages.success(self.request, _("تم حذف المستأجر بنجاح."))
-        return super().form_valid(form)
+    success_message = gettext_lazy("تم حذف المستأجر بنجاح.")
 
 # --- Buildings Management ---
-class BuildingListView(StaffRequiredMixin, ListView):
+class BuildingListView(StaffRequiredMixin, ListFilterMixin, SearchFilterMixin, ListView):
     model = Building
     template_name = 'dashboard/building_list.html'
     context_object_name = 'buildings'
     paginate_by = 20
 
+    def get_queryset(self):
+        queryset = Building.objects.all().order_by('name')
+        search_query = self.request.GET.get('q', '')
+        if search_query:
+            queryset = self.filter_search(queryset, search_query)
+        return queryset
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         for building in context['buildings']:
@@ -318,32 +436,47 @@ class BuildingUpdateView(StaffRequiredMixin, UpdateView):
         messages.success(self.request, _("تم تحديث المبنى بنجاح!"))
         return super().form_valid(form)
 
-class BuildingDeleteView(StaffRequiredMixin, DeleteView):
+class BuildingDeleteView(StaffRequiredMixin, CascadeDeleteMixin, DeleteView):
     model = Building
     template_name = 'dashboard/building_confirm_delete.html'
     success_url = reverse_lazy('building_list')
-
-    def form_valid(self, form):
-        messages.success(self.request, _("تم حذف المبنى بنجاح."))
-        return super().form_valid(form)
+    success_message = gettext_lazy("تم حذف المبنى بنجاح.")
 
 # --- Leases ---
-class LeaseListView(StaffRequiredMixin, ListView):
+class LeaseListView(StaffRequiredMixin, ListFilterMixin, SearchFilterMixin, KeysetPaginationMixin, ListView):
     model = Lease
     template_name = 'dashboard/lease_list.html'
     context_object_name = 'leases'
     paginate_by = 10
+    keyset_field = 'start_date'
+    keyset_total = True
+
+    def keyset_enabled(self):
+        # search results are ordered by relevance and already capped
+        return not self.request.GET.get('q')
+
     def get_queryset(self):
         queryset = Lease.objects.all().order_by('-start_date')
         search_query = self.request.GET.get('q', '')
+        status_filter = self.request.GET.get('status', '')
+        building_filter = self.request.GET.get('building', '')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        if building_filter.isdigit():
+            queryset = queryset.filter(unit__building_id=building_filter)
+        # Leases running at any time inside the date range
+        date_from, date_to = self.get_date_range()
+        if date_from:
+            queryset = queryset.filter(end_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(start_date__lte=date_to)
         if search_query:
-            queryset = queryset.filter(Q(contract_number__icontains=search_query) | Q(tenant__name__icontains=search_query) | Q(unit__unit_number__icontains=search_query))
+            queryset = self.filter_search(queryset, search_query)
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # This loop is inefficient, status should be updated by a scheduled task
-        # for lease in Lease.objects.all(): lease.save() 
+        # Lease statuses are kept current by the update_lease_statuses scheduled job
         active_leases = Lease.objects.filter(status='active')
         today = timezone.now()
         monthly_expenses = Expense.objects.filter(expense_date__year=today.year, expense_date__month=today.month).aggregate(total=Sum('amount'))['total'] or 0
@@ -365,12 +498,16 @@ class LeaseListView(StaffRequiredMixin, ListView):
             chart_data['labels'].append(str(status_display_map.get(item['status'], item['status'])))
             chart_data['data'].append(item['count'])
         context['chart_data'] = chart_data
+        context['buildings'] = Building.objects.order_by('name')
+        context['statuses'] = Lease.STATUS_CHOICES
         return context
 
-class LeaseDetailView(StaffRequiredMixin, DetailView):
+class LeaseDetailView(StaffRequiredMixin, ConditionalGetMixin, DetailView):
     model = Lease
     template_name = 'dashboard/lease_detail.html'
     context_object_name = 'lease'
+    def get_watermark_querysets(self):
+        return lease_watermark(self.kwargs['pk']) + [unread_notifications_watermark(self.request.user)]
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['document_form'] = DocumentForm()
@@ -407,10 +544,9 @@ class LeaseUpdateView(StaffRequiredMixin, UpdateView):
     def form_valid(self, form):
         messages.success(self.request, _("تم تحديث العقد بنجاح!")); return super().form_valid(form)
 
-class LeaseDeleteView(StaffRequiredMixin, DeleteView):
+class LeaseDeleteView(StaffRequiredMixin, CascadeDeleteMixin, DeleteView):
     model = Lease; template_name = 'dashboard/lease_confirm_delete.html'; success_url = reverse_lazy('lease_list')
-    def form_valid(self, form):
-        messages.success(self.request, _("تم حذف العقد بنجاح.")); return super().form_valid(form)
+    success_message = gettext_lazy("تم حذف العقد بنجاح.")
 
 # ADDED: Lease Cancellation View
 class LeaseCancelView(StaffRequiredMixin, UpdateView):
@@ -423,40 +559,86 @@ class LeaseCancelView(StaffRequiredMixin, UpdateView):
         return reverse('lease_detail', kwargs={'pk': self.object.pk})
 
     def form_valid(self, form):
+        # Lease.save frees the unit once the status change is detected
         lease = form.save(commit=False)
         lease.status = 'cancelled'
         lease.cancellation_date = timezone.now().date()
-        lease.unit.is_available = True
-        lease.unit.save()
         lease.save()
+        self.object = lease
         messages.success(self.request, _("تم إلغاء العقد بنجاح."))
-        return super().form_valid(form)
+        return redirect(self.get_success_url())
 
 # ... (renew_lease, Document views, Maintenance views, Expense views remain similar) ...
 
+# A concurrent edit took a contract number the renewal was about to use
+RENEWAL_CONFLICT = gettext_lazy("تعذر حفظ التجديد بسبب تعارض في رقم العقد، الرجاء المحاولة مرة أخرى.")
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def renew_lease(request, pk):
     original_lease = get_object_or_404(Lease, pk=pk)
     if request.method == 'POST':
-        duration = request.POST.get('duration')
-        new_start_date = original_lease.end_date + relativedelta(days=1)
-        if duration == '1y': new_end_date = new_start_date + relativedelta(years=1, days=-1)
-        elif duration == '6m': new_end_date = new_start_date + relativedelta(months=6, days=-1)
-        elif duration == '3m': new_end_date = new_start_date + relativedelta(months=3, days=-1)
-        else:
-            new_end_date = request.POST.get('manual_date')
-            if not new_end_date:
-                messages.error(request, _("الرجاء إدخال تاريخ انتهاء صحيح.")); return redirect('lease_detail', pk=pk)
-
-        # Create a new contract number to avoid unique constraint issues
-        new_contract_number = f"{original_lease.contract_number}-R{Lease.objects.filter(contract_number__startswith=original_lease.contract_number).count()}"
-
-        new_lease = Lease.objects.create(unit=original_lease.unit, tenant=original_lease.tenant, contract_number=new_contract_number, monthly_rent=original_lease.monthly_rent, start_date=new_start_date, end_date=new_end_date, electricity_meter=original_lease.electricity_meter, water_meter=original_lease.water_meter)
-        original_lease.status = 'expired'; original_lease.save()
+        try:
+            new_lease = LeaseRenewalService.renew([original_lease], request.POST.get('duration'), request.POST.get('manual_date'))[0]
+        except ValueError as e:
+            messages.error(request, str(e)); return redirect('lease_detail', pk=pk)
+        except IntegrityError:
+            messages.error(request, RENEWAL_CONFLICT); return redirect('lease_detail', pk=pk)
         messages.success(request, _("تم تجديد العقد بنجاح!")); return redirect('lease_detail', pk=new_lease.pk)
     return render(request, 'dashboard/lease_renew.html', {'lease': original_lease})
 
+class LeaseBulkRenewView(StaffRequiredMixin, View):
+    """Renew many expiring leases at once: select, preview the new terms, then confirm."""
+    template_name = 'dashboard/lease_bulk_renew.html'
+
+    def get_days(self, request):
+        try:
+            return int(request.GET.get('days') or request.POST.get('days') or 60)
+        except ValueError:
+            return 60
+
+    def get(self, request):
+        days = self.get_days(request)
+        return render(request, self.template_name, {
+            'leases': LeaseRenewalService.expiring_leases(days),
+            'days': days,
+            'duration_choices': LeaseRenewalService.DURATION_CHOICES,
+        })
+
+    def post(self, request):
+        days = self.get_days(request)
+        lease_ids = request.POST.getlist('lease_ids')
+        duration = request.POST.get('duration', '1y')
+        manual_date = request.POST.get('manual_date') or None
+        rent_change = request.POST.get('rent_change') or None
+        lease_ids = [int(pk) for pk in lease_ids if pk.isdigit()]
+        leases = LeaseRenewalService.expiring_leases(days).filter(pk__in=lease_ids)
+        if not lease_ids or not leases:
+            messages.error(request, _("الرجاء اختيار عقد واحد على الأقل."))
+            return redirect(f"{reverse('lease_bulk_renew')}?days={days}")
+        try:
+            if rent_change:
+                rent_change = Decimal(rent_change)
+            if request.POST.get('action') == 'confirm':
+                new_leases = LeaseRenewalService.renew(leases, duration, manual_date, rent_change)
+                messages.success(request, _("تم تجديد %(count)d عقد بنجاح!") % {'count': len(new_leases)})
+                return redirect('lease_list')
+            terms = LeaseRenewalService.preview(leases, duration, manual_date, rent_change)
+        except (ValueError, InvalidOperation) as e:
+            messages.error(request, str(e) if isinstance(e, ValueError) else _("نسبة تغيير الإيجار غير صحيحة."))
+            return redirect(f"{reverse('lease_bulk_renew')}?days={days}")
+        except IntegrityError:
+            messages.error(request, RENEWAL_CONFLICT)
+            return redirect(f"{reverse('lease_bulk_renew')}?days={days}")
+        return render(request, self.template_name, {
+            'preview': terms,
+            'days': days,
+            'duration': duration,
+            'manual_date': manual_date or '',
+            'rent_change': rent_change or '',
+            'duration_choices': LeaseRenewalService.DURATION_CHOICES,
+        })
+
 class DocumentUploadView(StaffRequiredMixin, CreateView):
     model = Document; form_class = DocumentForm
     def form_valid(self, form):
@@ -470,16 +652,45 @@ class DocumentDeleteView(StaffRequiredMixin, DeleteView):
     def form_valid(self, form):
         messages.success(self.request, _("تم حذف المستند بنجاح.")); return super().form_valid(form)
 
-class MaintenanceRequestAdminListView(StaffRequiredMixin, ListView):
+class MaintenanceRequestAdminListView(StaffRequiredMixin, ListFilterMixin, ListView):
     model = MaintenanceRequest; template_name = 'dashboard/maintenance_list.html'; context_object_name = 'requests'; paginate_by = 15
+    date_filter_field = 'reported_date__date'
+    def get_queryset(self):
+        queryset = MaintenanceRequest.objects.select_related('lease__tenant').order_by('-reported_date')
+        for param, field in (('status', 'status'), ('priority', 'priority')):
+            if self.request.GET.get(param):
+                queryset = queryset.filter(**{field: self.request.GET[param]})
+        if self.request.GET.get('building', '').isdigit():
+            queryset = queryset.filter(lease__unit__building_id=self.request.GET['building'])
+        return self.filter_date_range(queryset)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['buildings'] = Building.objects.order_by('name')
+        context['statuses'] = MaintenanceRequest.STATUS_CHOICES; context['priorities'] = MaintenanceRequest.PRIORITY_CHOICES
+        return context
 
 class MaintenanceRequestAdminUpdateView(StaffRequiredMixin, UpdateView):
     model = MaintenanceRequest; form_class = MaintenanceRequestUpdateForm; template_name = 'dashboard/maintenance_detail.html'; success_url = reverse_lazy('maintenance_admin_list')
     def form_valid(self, form):
         messages.success(self.request, _("تم تحديث حالة طلب الصيانة بنجاح.")); return super().form_valid(form)
 
-class ExpenseListView(StaffRequiredMixin, ListView):
+class ExpenseListView(StaffRequiredMixin, ListFilterMixin, KeysetPaginationMixin, ListView):
     model = Expense; template_name = 'dashboard/expense_list.html'; context_object_name = 'expenses'; paginate_by = 20
+    keyset_field = 'expense_date'
+    date_filter_field = 'expense_date'
+    def get_queryset(self):
+        queryset = Expense.objects.select_related('building')
+        if self.request.GET.get('building', '').isdigit():
+            queryset = queryset.filter(building_id=self.request.GET['building'])
+        if self.request.GET.get('category'):
+            queryset = queryset.filter(category=self.request.GET['category'])
+        if self.request.GET.get('q'):
+            queryset = queryset.filter(description__icontains=self.request.GET['q'])
+        return self.filter_date_range(queryset)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['buildings'] = Building.objects.order_by('name'); context['categories'] = Expense.EXPENSE_CATEGORY_CHOICES
+        return context
 
 class ExpenseCreateView(StaffRequiredMixin, CreateView):
     model = Expense; form_class = ExpenseForm; template_name = 'dashboard/expense_form.html'; success_url = reverse_lazy('expense_list')
@@ -498,11 +709,31 @@ class ExpenseUpdateView(StaffRequiredMixin, UpdateView):
 class ExpenseDeleteView(StaffRequiredMixin, DeleteView):
     model = Expense; template_name = 'dashboard/expense_confirm_delete.html'; success_url = reverse_lazy('expense_list')
     def form_valid(self, form):
+        try:
+            self.object.check_period_open(deleting=True)
+        except ValidationError as e:
+            messages.error(self.request, e.messages[0]); return redirect(self.success_url)
         messages.success(self.request, _("تم حذف المصروف بنجاح.")); return super().form_valid(form)
 
 
-class PaymentListView(StaffRequiredMixin, ListView):
+class PaymentListView(StaffRequiredMixin, ListFilterMixin, KeysetPaginationMixin, ListView):
     model = Payment; template_name = 'dashboard/payment_list.html'; context_object_name = 'payments'; paginate_by = 20
+    keyset_field = 'payment_date'
+    date_filter_field = 'payment_date'
+    def get_queryset(self):
+        queryset = Payment.objects.select_related('lease__tenant')
+        if self.request.GET.get('building', '').isdigit():
+            queryset = queryset.filter(lease__unit__building_id=self.request.GET['building'])
+        if self.request.GET.get('method'):
+            queryset = queryset.filter(payment_method=self.request.GET['method'])
+        if self.request.GET.get('q'):
+            query = self.request.GET['q']
+            queryset = queryset.filter(Q(lease__contract_number__icontains=query) | Q(lease__tenant__name__icontains=query))
+        return self.filter_date_range(queryset)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['buildings'] = Building.objects.order_by('name'); context['methods'] = Payment.PAYMENT_METHOD_CHOICES
+        return context
 
 class PaymentCreateView(StaffRequiredMixin, CreateView):
     model = Payment; form_class = PaymentForm; template_name = 'dashboard/payment_form.html'; success_url = reverse_lazy('payment_list')
@@ -518,15 +749,43 @@ class PaymentUpdateView(StaffRequiredMixin, UpdateView):
     def form_valid(self, form):
         messages.success(self.request, _("تم تحديث الدفعة بنجاح.")); return super().form_valid(form)
 
+class PaymentImportView(StaffRequiredMixin, View):
+    template_name = 'dashboard/payment_import.html'
+
+    def get(self, request):
+        return render(request, self.template_name, {'form': PaymentImportForm()})
+
+    def post(self, request):
+        form = PaymentImportForm(request.POST, request.FILES)
+        result = None
+        if form.is_valid():
+            try:
+                result = PaymentImportService.import_file(form.cleaned_data['file'], dry_run=form.cleaned_data['dry_run'])
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                if result['created']:
+                    messages.success(request, _("تم استيراد %(count)d دفعة بنجاح.") % {'count': result['created']})
+                if result['errors']:
+                    messages.warning(request, _("تعذر استيراد %(count)d صف. راجع الأخطاء أدناه.") % {'count': len(result['errors'])})
+        return render(request, self.template_name, {'form': form, 'result': result})
+
 # ADDED
 class PaymentDeleteView(StaffRequiredMixin, DeleteView):
     model = Payment
     template_name = 'dashboard/payment_confirm_delete.html'
     success_url = reverse_lazy('payment_list')
     def form_valid(self, form):
+        try:
+            self.object.check_period_open(deleting=True)
+        except ValidationError as e:
+            messages.error(self.request, e.messages[0]); return redirect(self.success_url)
         messages.success(self.request, _("تم حذف الدفعة بنجاح.")); return super().form_valid(form)
 
-class PaymentReceiptPDFView(View):
+class PaymentReceiptPDFView(ConditionalGetMixin, View):
+    def get_watermark_querysets(self):
+        return lease_watermark(Payment.objects.filter(pk=self.kwargs['pk']).values_list('lease', flat=True).first())
+
     def get(self, request, pk):
         try:
             payment = Payment.objects.get(pk=pk)
@@ -598,11 +857,12 @@ class PaymentReceiptPDFView(View):
             return HttpResponse(f"PDF Error: {str(e)}<hr>{html}")
 
 # --- Check Management ---
-class CheckManagementView(StaffRequiredMixin, ListView):
+class CheckManagementView(StaffRequiredMixin, KeysetPaginationMixin, ListView):
     model = Payment
     template_name = 'dashboard/check_management.html'
     context_object_name = 'checks'
     paginate_by = 20
+    keyset_field = 'payment_date'
     
     def get_queryset(self):
         queryset = Payment.objects.filter(payment_method='check').select_related('lease__tenant', 'lease__unit')
@@ -617,13 +877,61 @@ class CheckManagementView(StaffRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['status_filter'] = self.request.GET.get('status', '')
         
-        context['pending_count'] = Payment.objects.filter(payment_method='check', check_status='pending').count()
-        context['cashed_count'] = Payment.objects.filter(payment_method='check', check_status='cashed').count()
-        context['returned_count'] = Payment.objects.filter(payment_method='check', check_status='returned').count()
-        context['total_count'] = Payment.objects.filter(payment_method='check').count()
+        counts = ChequeService.status_counts()
+        context['pending_count'] = counts['pending']
+        context['cashed_count'] = counts['cashed']
+        context['returned_count'] = counts['returned']
+        context['total_count'] = counts['total']
         
         return context
 
+class ChequeDepositBatchView(StaffRequiredMixin, View):
+    """Pending cheques due for deposit on a given day, grouped by bank."""
+    def get(self, request):
+        try:
+            on_date = datetime.date.fromisoformat(request.GET.get('date', ''))
+        except ValueError:
+            on_date = timezone.now().date()
+        banks = ChequeService.deposit_batch(on_date)
+        return render(request, 'dashboard/cheque_deposit_batch.html', {
+            'banks': banks, 'on_date': on_date, 'undated': ChequeService.undated(),
+            'total': sum((bank['total'] for bank in banks), Decimal('0')),
+            'count': sum(bank['count'] for bank in banks),
+        })
+
+class ChequeMaturityCalendarView(StaffRequiredMixin, View):
+    """Expected clearing amounts per day for the next 90 days."""
+    def get(self, request):
+        return render(request, 'dashboard/cheque_maturity_calendar.html', {'calendar': ChequeService.maturity_calendar()})
+
+class JobRunListView(StaffRequiredMixin, KeysetPaginationMixin, ListView):
+    """Registered scheduled jobs and the history of their runs."""
+    model = JobRun
+    template_name = 'dashboard/job_run_list.html'
+    context_object_name = 'runs'
+    paginate_by = 50
+    keyset_field = 'started_at'
+
+    def get_queryset(self):
+        queryset = JobRun.objects.all()
+        if self.request.GET.get('job'):
+            queryset = queryset.filter(job_name=self.request.GET['job'])
+        if self.request.GET.get('status'):
+            queryset = queryset.filter(status=self.request.GET['status'])
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        now = timezone.localtime()
+        last_runs = {run.job_name: run for run in JobRun.objects.filter(
+            pk__in=JobRun.objects.values('job_name').annotate(last_id=Max('id')).values('last_id'))}
+        context['jobs'] = [{
+            'name': job.name, 'description': job.description, 'schedule': job.schedule.expression,
+            'next_run': job.schedule.next_run(now), 'last_run': last_runs.get(job.name),
+        } for job in JobScheduler.jobs.values()]
+        context['current_filters'] = {'job': self.request.GET.get('job', ''), 'status': self.request.GET.get('status', '')}
+        return context
+
 class CheckStatusUpdateView(StaffRequiredMixin, UpdateView):
     model = Payment
     fields = ['check_status', 'return_reason']
@@ -764,22 +1072,54 @@ class UserDeleteView(StaffRequiredMixin, DeleteView):
 
 # --- Reports ---
 # --- Invoice Views ---
-class InvoiceListView(StaffRequiredMixin, ListView):
+class InvoiceListView(StaffRequiredMixin, SearchFilterMixin, ListView):
     model = Invoice
     template_name = 'dashboard/invoice_list.html'
     context_object_name = 'invoices'
     paginate_by = 20
 
+    SORT_OPTIONS = {
+        'date': ('-issue_date', '-id'),
+        'date_asc': ('issue_date', 'id'),
+        'amount': ('-total', '-id'),
+        'amount_asc': ('total', 'id'),
+    }
+
     def get_queryset(self):
         queryset = Invoice.objects.select_related('tenant', 'lease').all()
         search_query = self.request.GET.get('q', '')
+        status_filter = self.request.GET.get('status', '')
+        min_amount = self.request.GET.get('min_amount', '')
+        max_amount = self.request.GET.get('max_amount', '')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        try:
+            bounds = {lookup: Decimal(value) for lookup, value in (('total__gte', min_amount), ('total__lte', max_amount)) if value}
+            # NaN and Infinity parse fine but are not amounts
+            if not all(amount.is_finite() for amount in bounds.values()):
+                raise InvalidOperation
+            queryset = queryset.filter(**bounds)
+        except InvalidOperation:
+            messages.error(self.request, _("الرجاء إدخال مبلغ صحيح."))
+        sort = self.request.GET.get('sort', '')
         if search_query:
-            queryset = queryset.filter(
-                Q(invoice_number__icontains=search_query) |
-                Q(tenant__name__icontains=search_query) |
-                Q(lease__contract_number__icontains=search_query)
-            )
-        return queryset.order_by('-issue_date')
+            queryset = self.filter_search(queryset, search_query)
+            if sort not in self.SORT_OPTIONS:
+                return queryset
+        return queryset.order_by(*self.SORT_OPTIONS.get(sort, self.SORT_OPTIONS['date']))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['outstanding_total'] = Invoice.outstanding_total()
+        context['status_choices'] = Invoice.INVOICE_STATUS_CHOICES
+        context['current_filters'] = {
+            'q': self.request.GET.get('q', ''),
+            'status': self.request.GET.get('status', ''),
+            'min_amount': self.request.GET.get('min_amount', ''),
+            'max_amount': self.request.GET.get('max_amount', ''),
+            'sort': self.request.GET.get('sort', ''),
+        }
+        return context
 
 class InvoiceDetailView(StaffRequiredMixin, DetailView):
     model = Invoice
@@ -859,7 +1199,10 @@ class ReportSelectionView(StaffRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         return render(request, 'dashboard/report_selection.html')
 
-class GenerateTenantStatementPDF(StaffRequiredMixin, View):
+class GenerateTenantStatementPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    def get_watermark_querysets(self):
+        return lease_watermark(self.kwargs['lease_pk'])
+
     def get(self, request, lease_pk, *args, **kwargs):
         lease = get_object_or_404(Lease, pk=lease_pk)
         context = {
@@ -871,7 +1214,10 @@ class GenerateTenantStatementPDF(StaffRequiredMixin, View):
         return render_to_pdf('dashboard/reports/tenant_statement.html', context)
 
 # ADDED
-class GeneratePaymentReceiptPDF(StaffRequiredMixin, View):
+class GeneratePaymentReceiptPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    def get_watermark_querysets(self):
+        return lease_watermark(Payment.objects.filter(pk=self.kwargs['pk']).values_list('lease', flat=True).first())
+
     def get(self, request, pk, *args, **kwargs):
         payment = get_object_or_404(Payment, pk=pk)
         context = {
@@ -881,43 +1227,196 @@ class GeneratePaymentReceiptPDF(StaffRequiredMixin, View):
         }
         return render_to_pdf('dashboard/reports/payment_receipt.html', context)
 
-class GenerateMonthlyPLReportPDF(StaffRequiredMixin, View):
+class GenerateMonthlyPLReportPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    def get_watermark_querysets(self):
+        year, month = building_pl_period(self.request.GET)
+        return pl_watermark(*BuildingProfitLoss.period(year, month or 1))
+
     def get(self, request, *args, **kwargs):
         year = request.GET.get('year'); month = request.GET.get('month')
         if not year or not month:
             messages.error(request, _("الرجاء تحديد السنة والشهر.")); return redirect('report_selection')
         year, month = int(year), int(month)
-        income = Payment.objects.filter(payment_date__year=year, payment_date__month=month)
-        expenses = Expense.objects.filter(expense_date__year=year, expense_date__month=month)
-        total_income = income.aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or 0
+        summary = ProfitLossService.monthly(year, month)
         context = {
-            'income_list': income, 'expenses_list': expenses, 'total_income': total_income,
-            'total_expenses': total_expenses, 'net_profit': total_income - total_expenses,
-            'report_month': month, 'report_year': year, 'company': Company.objects.first() # ADDED
+            'summary': summary, 'report_month': month, 'report_year': year,
+            'closed_period': AccountingPeriod.objects.filter(year=year, month=month).first(),
+            'appendix': GenerateAnnualPLReportPDF.appendix(request, summary, year, month),
+            'company': Company.objects.first(), 'pdf_filename': f"pl_{year}_{month:02d}.pdf",
         }
         return render_to_pdf('dashboard/reports/monthly_pl_report.html', context)
 
 # ADDED
-class GenerateAnnualPLReportPDF(StaffRequiredMixin, View):
+class GenerateAnnualPLReportPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    """Annual P&L summary; ?detail=income|expenses&page=N renders one page of the itemised appendix."""
+    DETAIL_PAGE_SIZE = 500
+
+    def get_watermark_querysets(self):
+        year, month = building_pl_period(self.request.GET)
+        return pl_watermark(*BuildingProfitLoss.period(year))
+
     def get(self, request, *args, **kwargs):
         year = request.GET.get('year')
-        if not year:
+        if not year or not year.isdigit():
             messages.error(request, _("الرجاء تحديد السنة.")); return redirect('report_selection')
         year = int(year)
-        income = Payment.objects.filter(payment_date__year=year)
-        expenses = Expense.objects.filter(expense_date__year=year)
-        total_income = income.aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or 0
+        detail = request.GET.get('detail')
+        if detail in ('income', 'expenses'):
+            return self.detail_page(request, year, detail)
+
+        summary = ProfitLossService.annual(year)
         context = {
-            'income_list': income, 'expenses_list': expenses, 'total_income': total_income,
-            'total_expenses': total_expenses, 'net_profit': total_income - total_expenses,
-            'report_year': year, 'company': Company.objects.first()
+            'summary': summary, 'appendix': self.appendix(request, summary, year), 'report_year': year,
+            'company': Company.objects.first(), 'pdf_filename': f"pl_{year}.pdf",
         }
         return render_to_pdf('dashboard/reports/annual_pl_report.html', context)
 
+    @classmethod
+    def appendix(cls, request, summary, year, month=None):
+        """Links to every page of the income and expense detail"""
+        base_url = request.build_absolute_uri(reverse('report_annual_pl'))
+        period = f"year={year}" + (f"&month={month}" if month else '')
+        sections = []
+        for kind, label, count in (('income', _("الإيرادات"), summary['income_count']),
+                                   ('expenses', _("المصاريف"), summary['expense_count'])):
+            pages = (count + cls.DETAIL_PAGE_SIZE - 1) // cls.DETAIL_PAGE_SIZE
+            sections.append({
+                'label': label, 'count': count,
+                'pages': [(page, f"{base_url}?{period}&detail={kind}&page={page}") for page in range(1, pages + 1)],
+            })
+        return sections
+
+    def detail_page(self, request, year, detail):
+        month = int(request.GET['month']) if request.GET.get('month', '').isdigit() else None
+        if detail == 'income':
+            rows = Payment.objects.filter(payment_date__year=year).select_related('lease__tenant') \
+                .order_by('payment_date', 'id')
+            if month:
+                rows = rows.filter(payment_date__month=month)
+        else:
+            rows = Expense.objects.filter(expense_date__year=year).select_related('building') \
+                .order_by('expense_date', 'id')
+            if month:
+                rows = rows.filter(expense_date__month=month)
+        page_obj = Paginator(rows, self.DETAIL_PAGE_SIZE).get_page(request.GET.get('page'))
+        context = {
+            'detail': detail, 'page_obj': page_obj, 'report_year': year, 'report_month': month,
+            'company': Company.objects.first(),
+            'pdf_filename': f"pl_{year}{f'_{month:02d}' if month else ''}_{detail}_{page_obj.number}.pdf",
+        }
+        return render_to_pdf('dashboard/reports/annual_pl_detail.html', context)
+
+def report_year(params):
+    """?year= when it is a year dates can hold (1..9999), otherwise the current year"""
+    year = params.get('year', '')
+    return int(year) if year.isdigit() and datetime.MINYEAR <= int(year) <= datetime.MAXYEAR else timezone.now().year
+
+def building_pl_period(params):
+    """(year, month) from ?year= and ?month=; month is None for the whole year"""
+    year = report_year(params)
+    month = int(params['month']) if params.get('month', '').isdigit() and 1 <= int(params['month']) <= 12 else None
+    return year, month
+
+class BuildingPLReportView(StaffRequiredMixin, View):
+    """Side-by-side profit and loss of every building for a month or a year."""
+    def get(self, request):
+        year, month = building_pl_period(request.GET)
+        report = BuildingProfitLoss.get(*BuildingProfitLoss.period(year, month))
+        return render(request, 'dashboard/building_pl.html', {
+            'report': report, 'year': year, 'month': month, 'months': range(1, 13),
+            'chart': json.dumps(BuildingProfitLoss.chart(report)),
+            'category_totals': list(zip(report['category_labels'], report['totals']['expense_list'])),
+        })
+
+class GenerateBuildingPLReportPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    def get_watermark_querysets(self):
+        return pl_watermark(*BuildingProfitLoss.period(*building_pl_period(self.request.GET)))
+
+    def get(self, request, *args, **kwargs):
+        year, month = building_pl_period(request.GET)
+        report = BuildingProfitLoss.get(*BuildingProfitLoss.period(year, month))
+        context = {
+            'report': report, 'year': year, 'month': month, 'company': Company.objects.first(),
+            'pdf_filename': f"building_pl_{year}{f'_{month:02d}' if month else ''}.pdf",
+        }
+        return render_to_pdf('dashboard/reports/building_pl_report.html', context)
+
+class AccountingPeriodListView(StaffRequiredMixin, View):
+    """Recent months with their close status; staff close them, superusers can reopen."""
+    template_name = 'dashboard/accounting_periods.html'
+
+    def get(self, request):
+        return render(request, self.template_name, {'months': PeriodCloseService.months()})
+
+    def post(self, request):
+        try:
+            year, month = int(request.POST['year']), int(request.POST['month'])
+        except (KeyError, ValueError):
+            messages.error(request, _("الرجاء تحديد السنة والشهر.")); return redirect('accounting_periods')
+        if request.POST.get('action') == 'reopen':
+            if not request.user.is_superuser:
+                messages.error(request, _("إعادة فتح الفترات متاحة للمدير فقط.")); return redirect('accounting_periods')
+            period = get_object_or_404(AccountingPeriod, year=year, month=month)
+            PeriodCloseService.reopen(period)
+            messages.success(request, _("تمت إعادة فتح الفترة %(period)s.") % {'period': f"{month:02d}/{year}"})
+        else:
+            try:
+                PeriodCloseService.close(year, month, user=request.user)
+            except ValueError as e:
+                messages.error(request, str(e)); return redirect('accounting_periods')
+            messages.success(request, _("تم إقفال الفترة %(period)s.") % {'period': f"{month:02d}/{year}"})
+        return redirect('accounting_periods')
+
+class RentRollReportView(StaffRequiredMixin, View):
+    """Expected versus collected rent for a year by month, building and unit."""
+    def get(self, request):
+        year = report_year(request.GET)
+        building_id = int(request.GET['building']) if request.GET.get('building', '').isdigit() else None
+        roll = RentRoll.for_year(year, building_id=building_id)
+        return render(request, 'dashboard/rent_roll.html', {
+            'year': year, 'building_id': building_id, 'buildings': Building.objects.order_by('name'),
+            'months': roll.by_month(),
+            'group_by': 'unit' if building_id else 'building',
+            'group_rows': roll.by_unit() if building_id else roll.by_building(),
+            'totals': roll.totals(), 'lease_count': len(roll.leases),
+        })
+
+class AgingReportView(StaffRequiredMixin, View):
+    """Outstanding rent per lease in days-past-due buckets."""
+    def get(self, request):
+        report = AgingReport.from_query(request.GET)
+        page_obj = Paginator(report.rows, 100).get_page(request.GET.get('page'))
+        filters = request.GET.copy()
+        filters.pop('page', None)
+        bucket_labels = [label for key, label in AgingReport.bucket_labels()]
+        return render(request, 'dashboard/aging_report.html', {
+            'report': report, 'page_obj': page_obj, 'is_paginated': page_obj.has_other_pages(),
+            'bucket_labels': bucket_labels, 'bucket_totals': list(zip(bucket_labels, report.totals['buckets'])),
+            'buildings': Building.objects.order_by('name'), 'tenant_types': Tenant.TENANT_TYPE_CHOICES,
+            'current_filters': {
+                'date': report.as_of, 'building': report.building_id, 'tenant_type': report.tenant_type or '',
+            },
+            'query_string': filters.urlencode(),
+        })
+
+class GenerateAgingReportPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    watermark_models = [Lease, Payment, Tenant, Unit, Building, Company]
+
+    def get(self, request, *args, **kwargs):
+        report = AgingReport.from_query(request.GET)
+        context = {
+            'report': report, 'bucket_labels': [label for key, label in AgingReport.bucket_labels()],
+            'building': Building.objects.filter(pk=report.building_id).first() if report.building_id else None,
+            'tenant_type': dict(Tenant.TENANT_TYPE_CHOICES).get(report.tenant_type),
+            'company': Company.objects.first(),
+            'pdf_filename': f"aging_{report.as_of.isoformat()}.pdf",
+        }
+        return render_to_pdf('dashboard/reports/aging_report.html', context)
+
 # ADDED
-class GenerateOccupancyReportPDF(StaffRequiredMixin, View):
+class GenerateOccupancyReportPDF(StaffRequiredMixin, ConditionalGetMixin, View):
+    watermark_models = [Building, Unit, Lease, Tenant, Company]
+
     def get(self, request, *args, **kwargs):
         buildings = Building.objects.all().prefetch_related('unit_set')
         total_units = Unit.objects.count()
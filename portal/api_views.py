@@ -0,0 +1,165 @@
+"""
+Read-only JSON API for the signed-in tenant (mobile clients).
+
+Payloads come from values() queries, never full model instances. ?fields=a,b
+narrows each row to the named fields; list endpoints page newest first with
+an opaque ?cursor= and ?limit=. Every response carries an ETag from the
+tenant's rows (dashboard/conditional.py), so a phone revalidating with
+If-None-Match gets an empty 304 while nothing has changed.
+"""
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max, Q, Sum
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.generic import View
+from dashboard.conditional import ConditionalGet
+from dashboard.models import Building, Document, Lease, MaintenanceRequest, Payment, Tenant, Unit
+from dashboard.pagination import decode_cursor, encode_cursor
+from dashboard.portal_snapshot import PortalSnapshotService
+
+
+class PortalAPIView(LoginRequiredMixin, View):
+    """
+    fields: public name -> values() path; ?fields= picks a subset, default all.
+    transforms: public name -> callable applied to that value.
+    watermark_lookups: model -> path from it to the tenant; the ETag covers
+    the tenant's rows of each model.
+    Subclasses define get_payload(tenant, fields), returning the JSON body.
+    """
+    raise_exception = True
+    fields = {}
+    transforms = {}
+    watermark_lookups = {}
+
+    def selected_fields(self):
+        requested = [name for name in self.request.GET.get('fields', '').split(',') if name]
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(unknown)}")
+        return {name: self.fields[name] for name in requested} if requested else dict(self.fields)
+
+    def shape(self, row, fields):
+        return {name: self.transforms[name](row[path]) if name in self.transforms and row[path] else row[path]
+                for name, path in fields.items()}
+
+    def get_watermark_querysets(self, tenant):
+        if not self.watermark_lookups:
+            raise ImproperlyConfigured(f"{type(self).__name__} needs watermark_lookups or get_watermark_querysets()")
+        return [model.objects.filter(**{lookup: tenant}) for model, lookup in self.watermark_lookups.items()]
+
+    def get(self, request, *args, **kwargs):
+        tenant = Tenant.objects.filter(user=request.user).first()
+        if tenant is None:
+            return JsonResponse({'error': 'no tenant profile is linked to this account'}, status=404)
+        try:
+            fields = self.selected_fields()
+        except ValueError as e:
+            return JsonResponse({'error': str(e), 'fields': list(self.fields)}, status=400)
+        return ConditionalGet.respond(request, self.get_watermark_querysets(tenant),
+                                      lambda: JsonResponse(self.get_payload(tenant, fields)))
+
+
+class PortalKeysetAPIView(PortalAPIView):
+    """
+    Newest-first keyset pages of the tenant's rows of `model`, reached through
+    tenant_lookup, on (keyset_field, id) using the dashboard cursor format
+    """
+    model = None
+    tenant_lookup = 'lease__tenant'
+    keyset_field = None
+    page_size = 20
+    max_page_size = 100
+
+    def get_queryset(self, tenant):
+        return self.model.objects.filter(**{self.tenant_lookup: tenant})
+
+    def get_watermark_querysets(self, tenant):
+        return [self.get_queryset(tenant)]
+
+    def get_payload(self, tenant, fields):
+        limit = self.request.GET.get('limit', '')
+        limit = min(int(limit), self.max_page_size) if limit.isdigit() and int(limit) > 0 else self.page_size
+        queryset = self.get_queryset(tenant).order_by(f'-{self.keyset_field}', '-id')
+        cursor = decode_cursor(self.request.GET.get('cursor', ''))
+        if cursor and cursor[0] == 'next':
+            _, value, pk = cursor
+            queryset = queryset.filter(Q(**{f'{self.keyset_field}__lt': value}) | Q(**{self.keyset_field: value, 'id__lt': pk}))
+        rows = list(queryset.values(*set(fields.values()) | {self.keyset_field, 'id'})[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last[self.keyset_field], last['id'], 'next')
+        return {'results': [self.shape(row, fields) for row in rows[:limit]], 'next_cursor': next_cursor}
+
+
+class LeaseAPIView(PortalAPIView):
+    """The tenant's current lease, the one the portal home page shows"""
+    fields = {
+        'id': 'id', 'contract_number': 'contract_number', 'start_date': 'start_date', 'end_date': 'end_date',
+        'monthly_rent': 'monthly_rent', 'status': 'status', 'unit': 'unit__unit_number', 'building': 'unit__building__name',
+    }
+
+    watermark_lookups = {Lease: 'tenant', Unit: 'lease__tenant', Building: 'unit__lease__tenant'}
+
+    def get_payload(self, tenant, fields):
+        row = PortalSnapshotService.current_leases(tenant).values(*set(fields.values())).first()
+        return {'lease': self.shape(row, fields) if row else None}
+
+
+class PaymentScheduleAPIView(PortalAPIView):
+    """One row per month of the current lease: rent due, paid so far and status"""
+    fields = {name: name for name in (
+        'year', 'month', 'due_date', 'rent_due', 'amount_paid', 'balance', 'payments', 'last_payment_date', 'status',
+    )}
+
+    watermark_lookups = {Lease: 'tenant', Payment: 'lease__tenant'}
+
+    def get_payload(self, tenant, fields):
+        lease = PortalSnapshotService.current_leases(tenant).values('id', 'start_date', 'end_date', 'monthly_rent').first()
+        if lease is None:
+            return {'lease_id': None, 'schedule': []}
+        paid = {
+            (row['payment_for_year'], row['payment_for_month']): row
+            for row in Payment.objects.filter(lease=lease['id']).order_by()
+            .values('payment_for_year', 'payment_for_month')
+            .annotate(total=Sum('amount'), count=Count('id'), latest=Max('payment_date'))
+        }
+        today = timezone.now().date()
+        schedule = []
+        month = lease['start_date'].replace(day=1)
+        while month <= lease['end_date']:
+            row = paid.get((month.year, month.month), {})
+            amount_paid = row.get('total') or Decimal('0')
+            if amount_paid >= lease['monthly_rent']:
+                status = 'paid'
+            elif month < today:
+                status = 'overdue'
+            else:
+                status = 'partial' if amount_paid else 'due'
+            schedule.append(self.shape({
+                'year': month.year, 'month': month.month, 'due_date': month, 'rent_due': lease['monthly_rent'],
+                'amount_paid': amount_paid, 'balance': lease['monthly_rent'] - amount_paid,
+                'payments': row.get('count', 0), 'last_payment_date': row.get('latest'), 'status': status,
+            }, fields))
+            month += relativedelta(months=1)
+        return {'lease_id': lease['id'], 'schedule': schedule}
+
+
+class DocumentAPIView(PortalKeysetAPIView):
+    model = Document
+    keyset_field = 'uploaded_at'
+    fields = {'id': 'id', 'lease_id': 'lease_id', 'title': 'title', 'url': 'file', 'uploaded_at': 'uploaded_at'}
+    transforms = {'url': default_storage.url}
+
+
+class MaintenanceRequestAPIView(PortalKeysetAPIView):
+    model = MaintenanceRequest
+    keyset_field = 'reported_date'
+    fields = {name: name for name in (
+        'id', 'lease_id', 'title', 'description', 'priority', 'status', 'reported_date', 'image',
+    )}
+    transforms = {'image': default_storage.url}
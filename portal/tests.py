@@ -1,3 +1,90 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from dashboard.models import Building, Unit, Tenant, Lease, Payment, MaintenanceRequest
 
-# Create your tests here.
+# The pre_save receivers translate names through an online service
+_translate = mock.patch('dashboard.signals.auto_translate_to_english', side_effect=lambda text: text)
+
+
+def setUpModule():
+    _translate.start()
+
+
+def tearDownModule():
+    _translate.stop()
+
+
+class PortalAPITests(TestCase):
+    """A tenant with one 2026 lease at 100 a month, signed in through their provisioned account"""
+
+    @classmethod
+    def setUpTestData(cls):
+        building = Building.objects.create(name='B1', address='x')
+        unit = Unit.objects.create(building=building, unit_number='12', unit_type='shop', floor=1)
+        cls.tenant = Tenant.objects.create(name='Ahmed', tenant_type='individual', phone='99999999')
+        cls.lease = Lease.objects.create(
+            unit=unit, tenant=cls.tenant, contract_number='C1', monthly_rent=Decimal('100'),
+            start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 12, 31),
+        )
+        cls.tenant.refresh_from_db()
+
+    def setUp(self):
+        # The development cache is process memory and outlives each test's rollback
+        cache.clear()
+        self.client.force_login(self.tenant.user)
+
+    def test_lease_fields_can_be_narrowed(self):
+        response = self.client.get(reverse('portal_api_lease'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lease']['contract_number'], 'C1')
+        self.assertEqual(response.json()['lease']['unit'], '12')
+
+        response = self.client.get(reverse('portal_api_lease'), {'fields': 'contract_number,building'})
+        self.assertEqual(response.json()['lease'], {'contract_number': 'C1', 'building': 'B1'})
+        self.assertEqual(self.client.get(reverse('portal_api_lease'), {'fields': 'secret'}).status_code, 400)
+
+    def test_schedule_marks_paid_months(self):
+        Payment.objects.create(lease=self.lease, amount=Decimal('100'), payment_date=datetime.date(2026, 2, 3),
+                               payment_for_month=2, payment_for_year=2026, payment_method='cash')
+        schedule = self.client.get(reverse('portal_api_schedule'), {'fields': 'month,amount_paid,status'}).json()['schedule']
+        self.assertEqual(len(schedule), 12)
+        self.assertEqual((schedule[1]['month'], Decimal(schedule[1]['amount_paid']), schedule[1]['status']), (2, Decimal('100'), 'paid'))
+        self.assertEqual(schedule[0]['status'], 'overdue')
+
+    def test_keyset_pages_cover_every_request_once(self):
+        created = {MaintenanceRequest.objects.create(lease=self.lease, title=f'R{i}', description='x').pk for i in range(5)}
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, 'fields': 'id', **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(reverse('portal_api_maintenance'), params).json()
+            seen.extend(row['id'] for row in page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), len(created))
+        self.assertEqual(set(seen), created)
+
+    def test_staff_notes_stay_internal(self):
+        MaintenanceRequest.objects.create(lease=self.lease, title='Leak', description='x', staff_notes='internal')
+        row = self.client.get(reverse('portal_api_maintenance')).json()['results'][0]
+        self.assertNotIn('staff_notes', row)
+        self.assertEqual(self.client.get(reverse('portal_api_maintenance'), {'fields': 'staff_notes'}).status_code, 400)
+
+    def test_unchanged_payload_revalidates_to_304(self):
+        url = reverse('portal_api_schedule')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Payment.objects.create(lease=self.lease, amount=Decimal('50'), payment_date=datetime.date(2026, 3, 3),
+                               payment_for_month=3, payment_for_year=2026, payment_method='cash')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_other_accounts_are_refused(self):
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+        self.assertEqual(self.client.get(reverse('portal_api_lease')).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('portal_api_lease')).status_code, 403)
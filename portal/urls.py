@@ -1,8 +1,13 @@
 from django.urls import path
 from .views import PortalDashboardView, MaintenanceRequestListView, MaintenanceRequestCreateView
+from .api_views import LeaseAPIView, PaymentScheduleAPIView, DocumentAPIView, MaintenanceRequestAPIView
 
 urlpatterns = [
     path('', PortalDashboardView.as_view(), name='portal_dashboard'),
     path('maintenance/', MaintenanceRequestListView.as_view(), name='maintenance_list'),
     path('maintenance/new/', MaintenanceRequestCreateView.as_view(), name='maintenance_create'),
+    path('api/lease/', LeaseAPIView.as_view(), name='portal_api_lease'),
+    path('api/schedule/', PaymentScheduleAPIView.as_view(), name='portal_api_schedule'),
+    path('api/documents/', DocumentAPIView.as_view(), name='portal_api_documents'),
+    path('api/maintenance/', MaintenanceRequestAPIView.as_view(), name='portal_api_maintenance'),
 ]
\ No newline at end of file
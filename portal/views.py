@@ -6,22 +6,17 @@ from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from dashboard.models import Lease, Tenant, MaintenanceRequest
 from dashboard.forms import MaintenanceRequestForm
+from dashboard.portal_snapshot import PortalSnapshotService
 
 class PortalDashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'portal/dashboard.html'
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        try:
-            tenant = Tenant.objects.get(user=self.request.user)
-            lease = Lease.objects.filter(tenant=tenant, status__in=['active', 'expiring_soon']).order_by('-start_date').first()
-            context['tenant'] = tenant
-            context['lease'] = lease
-            if lease:
-                context['payment_summary'] = lease.get_payment_summary()
-                context['documents'] = lease.documents.all()
-                context['maintenance_requests'] = MaintenanceRequest.objects.filter(lease=lease).order_by('-reported_date')[:5]
-        except Tenant.DoesNotExist:
+        snapshot = PortalSnapshotService.get(self.request.user)
+        if snapshot['tenant'] is None:
             context['error'] = _("لا يوجد ملف مستأجر مرتبط بحسابك.")
+        else:
+            context.update(snapshot)
         return context
 
 class MaintenanceRequestListView(LoginRequiredMixin, ListView):
@@ -214,3 +214,39 @@ SMS_PROVIDER = 'console'  # Options: 'console', 'twilio', 'aws_sns'
 # AWS_ACCESS_KEY_ID = 'your_aws_access_key_id'
 # AWS_SECRET_ACCESS_KEY = 'your_aws_secret_access_key'
 # AWS_SNS_REGION = 'us-east-1'
+
+# Cache, chosen with the CACHE_URL environment variable. Portal snapshots and
+# report caches are invalidated by whichever process writes the data, so
+# production (several web workers plus the scheduler) needs a cache they all
+# share; the per-process LocMemCache used when CACHE_URL is unset is meant for
+# development and raises check dashboard.W001.
+#   redis://host:6379/0      Redis (pip install redis), preferred
+#   memcached://host:11211   Memcached (pip install pymemcache)
+#   db://dashboard_cache     DatabaseCache; run `manage.py createcachetable` on deploy
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                          'LOCATION': CACHE_URL.removeprefix('memcached://')}}
+elif CACHE_URL.startswith('db://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                          'LOCATION': CACHE_URL.removeprefix('db://')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Live dashboard updates (server-sent events, requires ASGI), chosen with the
+# LIVE_EVENTS_BACKEND environment variable. 'database' works with any number of
+# web workers and sees events published by the scheduler; 'memory' skips the
+# polling but only reaches streams of the publishing process, so it is for a
+# single development worker and raises check dashboard.W002 otherwise.
+LIVE_EVENTS_BACKEND = os.environ.get('LIVE_EVENTS_BACKEND', 'database')
+
+# Cash-flow forecast on the dashboard
+# Share of leases ending in the next 12 months expected to renew at the same rent
+CASHFLOW_RENEWAL_PROBABILITY = 0.7
+# Expense categories projected forward at their trailing 12-month average
+CASHFLOW_RECURRING_EXPENSE_CATEGORIES = ['utilities', 'salaries', 'admin', 'maintenance']
+
+# Per-building P&L of past periods (seconds); back-dated edits invalidate it
+BUILDING_PL_CACHE_TIMEOUT = 60 * 60 * 24 * 7